@@ -7,6 +7,7 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 
 from core.abstracts.models import ManagerBase, ModelBase
+from core.db.routers import use_replica
 from utils.formatting import format_bytes
 from utils.helpers import get_full_url
 from utils.models import OneToOneOrNoneField, UploadFilepathFactory
@@ -51,7 +52,8 @@ class Link(ModelBase):
 
     @property
     def link_visits(self):
-        return self.visits.aggregate(sum=models.Sum("amount")).get("sum", 0)
+        with use_replica():
+            return self.visits.aggregate(sum=models.Sum("amount")).get("sum", 0)
 
     def as_html(self, new_tab=True):
         if new_tab:
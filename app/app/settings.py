@@ -63,6 +63,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_celery_beat",
     "rest_framework",
     "rest_framework.authtoken",
@@ -83,6 +84,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestMetricsMiddleware",
+    "core.middleware.DatabaseRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -132,16 +135,47 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Seconds a worker keeps its database connection open between requests,
+# 0 to close after each request. Celery closes connections between tasks
+# the same way. Requires fewer worker processes than postgres connections.
+DB_CONN_MAX_AGE = int(os.environ.get("DJANGO_DB_CONN_MAX_AGE", 60))
+
+# Check persistent connections still work before reusing them
+DB_CONN_HEALTH_CHECKS = environ_bool("DJANGO_DB_CONN_HEALTH_CHECKS", 1)
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.db.postgresql",
         "HOST": os.environ.get("POSTGRES_HOST"),
         "NAME": os.environ.get("POSTGRES_NAME"),
         "USER": os.environ.get("POSTGRES_USER"),
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
     }
 }
 
+# Read only copy of the database, used for exports and GET requests to
+# model viewsets, see ``core.db.routers``
+POSTGRES_REPLICA_HOST = os.environ.get("POSTGRES_REPLICA_HOST", None)
+DATABASE_REPLICA_ALIAS = "replica" if POSTGRES_REPLICA_HOST else None
+
+# Tests can enable the replica, it mirrors the default database
+if POSTGRES_REPLICA_HOST or TESTING:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": POSTGRES_REPLICA_HOST or DATABASES["default"]["HOST"],
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["core.db.routers.ReplicaRouter"]
+
+# Seconds a client reads from the primary after writing, so it sees its changes
+# before they are copied to the replica
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.environ.get("DJANGO_DATABASE_REPLICA_PIN_SECONDS", 5)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -196,9 +230,36 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django Rest Framework
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "core.abstracts.pagination.KeysetPagination",
     "EXCEPTION_HANDLER": "core.views.api_exception_handler",
 }
 
+# Render and parse api json with orjson, falls back to the json module
+FAST_JSON = environ_bool("DJANGO_FAST_JSON", 0)
+
+if FAST_JSON:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "core.abstracts.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] = [
+        "core.abstracts.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ]
+
+# Seconds public pages are cached for, also cleared when clubs change
+PAGE_CACHE_TIMEOUT = int(os.environ.get("DJANGO_PAGE_CACHE_TIMEOUT", 60 * 10))
+
+# Seconds a token's user is cached for, before checking the database
+TOKEN_AUTH_CACHE_TIMEOUT = int(os.environ.get("DJANGO_TOKEN_AUTH_CACHE_TIMEOUT", 300))
+
+# Tokens cached in each process, 0 to only use the shared cache
+TOKEN_AUTH_LOCAL_CACHE_SIZE = int(
+    os.environ.get("DJANGO_TOKEN_AUTH_LOCAL_CACHE_SIZE", 0)
+)
+TOKEN_AUTH_LOCAL_CACHE_TIMEOUT = 5
+
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "Club Portal API",
@@ -236,10 +297,13 @@ AUTH_USER_MODEL = "users.User"
 LOGIN_REDIRECT_URL = "/"
 LOGIN_URL = "/auth/login/"
 AUTHENTICATION_BACKENDS = [
-    "allauth.account.auth_backends.AuthenticationBackend",
     "core.backend.CustomBackend",
+    "allauth.account.auth_backends.AuthenticationBackend",
 ]
 
+# Lets Prometheus read /metrics/ with "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get("DJANGO_METRICS_TOKEN", None)
+
 # Used for logging in a user via api
 DEFAULT_AUTH_BACKEND = "core.backend.CustomBackend"
 
@@ -324,14 +388,12 @@ CELERY_BEAT_SCHEDULE = {}
 
 DJANGO_REDIS_URL = os.environ.get("DJANGO_REDIS_URL", None)
 
+# Workers share the redis cache, otherwise each process caches in memory,
+# and cached pages are not cleared in other workers when clubs change
 if DJANGO_REDIS_URL is not None:
-    assert (
-        DEV is True or DEBUG is True
-    ), "Django needs a redis server in production mode."
-
     CACHES = {
         "default": {
-            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "BACKEND": "django_redis.cache.RedisCache",
             "LOCATION": os.environ.get("DJANGO_REDIS_URL"),
         }
     }
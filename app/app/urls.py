@@ -24,6 +24,7 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 from analytics.views import redirect_link_view
 from app.settings import DEV
+from core.views import admin_metrics
 
 apipatterns = [
     path("schema/club-manager", SpectacularAPIView.as_view(), name="api-schema"),
@@ -40,6 +41,7 @@ apipatterns = [
 urlpatterns = [
     path("", include("core.urls")),
     path("r/<int:link_id>/", redirect_link_view, name="redirect-link"),
+    path("admin/metrics/", admin.site.admin_view(admin_metrics), name="admin-metrics"),
     path("admin/", admin.site.urls),
     path("auth/", include("users.authentication.urls")),
     path("auth/", include("django.contrib.auth.urls")),
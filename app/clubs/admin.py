@@ -1,7 +1,10 @@
+from datetime import timedelta
 from typing import Optional
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
+from clubs.conflicts import get_event_conflicts
 from clubs.forms import TeamMembershipForm
 from clubs.models import (
     Club,
@@ -13,12 +16,13 @@ from clubs.models import (
     EventAttendance,
     EventAttendanceLink,
     EventTag,
+    PointsTransaction,
     RecurringEvent,
     Team,
     TeamMembership,
 )
 from clubs.serializers import ClubCsvSerializer, ClubMembershipCsvSerializer
-from clubs.services import ClubService
+from clubs.services import ClubService, RecurringEventService
 from core.abstracts.admin import ModelAdminBase
 
 
@@ -90,7 +94,7 @@ class RecurringEventAdmin(admin.ModelAdmin):
         "start_date",
         "end_date",
     )
-    actions = ("sync_events",)
+    actions = ("sync_events", "create_upcoming_events")
 
     @admin.action(description="Sync Events")
     def sync_events(self, request, queryset):
@@ -100,6 +104,22 @@ class RecurringEventAdmin(admin.ModelAdmin):
 
         return
 
+    @admin.action(description="Create Events for Next 30 Days")
+    def create_upcoming_events(self, request, queryset):
+        """Store upcoming occurrences, so they can be edited individually."""
+
+        today = timezone.now().date()
+
+        for recurring in queryset.all():
+            service = RecurringEventService(recurring)
+
+            for occurrence_date in service.get_occurrence_dates(
+                today, today + timedelta(days=30)
+            ):
+                service.materialize(occurrence_date)
+
+        return
+
 
 class EventAttendanceInlineAdmin(admin.TabularInline):
     """List event attendees in event admin."""
@@ -139,6 +159,18 @@ class EventAdmin(admin.ModelAdmin):
     inlines = (EventAttendenceLinkInlineAdmin, EventAttendanceInlineAdmin)
     filter_horizontal = ("tags", "other_clubs")
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+
+        # Co-hosts are saved with related objects, so conflicts are checked after
+        event = form.instance
+        for conflict in get_event_conflicts(event):
+            other = Event.objects.get(id=conflict["conflicting_event_id"])
+            messages.warning(
+                request,
+                f"{event} conflicts with {other}: {conflict['type'].label.lower()}.",
+            )
+
 
 class TeamMembershipInlineAdmin(admin.TabularInline):
     """Manage user assignments to a team."""
@@ -164,10 +196,27 @@ class TeamAdmin(admin.ModelAdmin):
     inlines = (TeamMembershipInlineAdmin,)
 
 
+class PointsTransactionInlineAdmin(admin.TabularInline):
+    """List points history in club membership admin."""
+
+    model = PointsTransaction
+    fk_name = "member"
+    extra = 0
+    readonly_fields = ("amount", "balance", "reason", "created_at")
+    exclude = ("club",)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 class ClubMembershipAdmin(ModelAdminBase):
     """Manage club memberships in admin."""
 
     csv_serializer_class = ClubMembershipCsvSerializer
+    inlines = (PointsTransactionInlineAdmin,)
 
     list_display = (
         "__str__",
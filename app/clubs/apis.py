@@ -5,6 +5,7 @@ from . import viewsets
 
 router = DefaultRouter()
 router.register("clubs", viewsets.ClubViewSet, basename="club")
+router.register("events", viewsets.EventViewSet, basename="event")
 router.register(
     r"clubs/(?P<club_id>.+)/members",
     viewsets.ClubMembershipViewSet,
@@ -16,4 +17,9 @@ app_name = "api-clubs"
 urlpatterns = [
     path("", include(router.urls)),
     path("clubs/<int:id>/invite/", viewsets.InviteClubMemberView.as_view(), name="invite"),
+    path(
+        "clubs/<int:id>/attendance/",
+        viewsets.EventAttendanceBatchView.as_view(),
+        name="attendance",
+    ),
 ]
@@ -0,0 +1,100 @@
+"""
+Cache public pages that list clubs, until any club changes.
+"""
+
+import time
+from functools import wraps
+from typing import Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+
+CATALOG_VERSION_KEY = "clubs:catalog_version"
+
+
+def get_catalog_version() -> int:
+    """
+    Get current version of the club catalog, changed when clubs are saved.
+
+    Cached pages include the version in their key, so they are replaced
+    in every worker once the version changes.
+    """
+
+    version = cache.get(CATALOG_VERSION_KEY)
+
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+
+    return version
+
+
+def bump_catalog_version():
+    """Stop using pages cached for the current club catalog."""
+
+    cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_catalog_cache_key(name: str, version=None):
+    """Get cache key for name, for the current catalog version by default."""
+
+    version = version if version is not None else get_catalog_version()
+    return f"clubs:catalog:{version}:{name}"
+
+
+def get_page_cache_key(request: HttpRequest, query_params: tuple[str, ...]):
+    """Get cache key for page, ignoring query params the page does not use."""
+
+    params = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        if name in query_params
+        for value in values
+    )
+    path = f"{request.path}?{urlencode(params)}" if params else request.path
+
+    return get_catalog_cache_key(f"page:{path}")
+
+
+def cache_catalog_page(view=None, *, query_params: Optional[tuple[str, ...]] = None):
+    """
+    Cache successful responses of a page until the club catalog changes.
+
+    Only visitors without a session get cached pages, since logged in
+    users may see content for their account. Pages are cached by path,
+    list the query params that change the page in ``query_params``. Other
+    params, like tracking params, share the page cached for the path.
+    """
+
+    if view is None:
+        return lambda view: cache_catalog_page(view, query_params=query_params)
+
+    query_params = query_params or ()
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs):
+        if (
+            request.method not in ("GET", "HEAD")
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+        ):
+            return view(request, *args, **kwargs)
+
+        key = get_page_cache_key(request, query_params)
+        response = cache.get(key)
+
+        if response is not None:
+            return response
+
+        response = view(request, *args, **kwargs)
+
+        if response.status_code == 200 and not response.streaming:
+            if hasattr(response, "render"):
+                response.render()
+
+            cache.set(key, response, timeout=settings.PAGE_CACHE_TIMEOUT)
+
+        return response
+
+    return wrapper
@@ -0,0 +1,164 @@
+"""
+Detect events that are scheduled at the same time.
+"""
+
+from datetime import datetime
+from typing import Optional, TypedDict
+
+from django.db import models
+from django.db.models.functions import Lower
+
+from clubs.models import Event
+from utils.intervals import IntervalTree
+
+
+class ConflictType(models.TextChoices):
+    """Why two events cannot happen at the same time."""
+
+    VENUE = "venue", "Same location"
+    CLUB = "club", "Same host club"
+
+
+class EventConflict(TypedDict):
+    event_id: int
+    conflicting_event_id: int
+    type: ConflictType
+
+
+def get_event_hosts(event_ids: list[int]) -> dict[int, set[int]]:
+    """Get ids of clubs co-hosting each event."""
+
+    hosts: dict[int, set[int]] = {}
+    rows = Event.other_clubs.through.objects.filter(event_id__in=event_ids)
+
+    for event_id, club_id in rows.values_list("event_id", "club_id"):
+        hosts.setdefault(event_id, set()).add(club_id)
+
+    return hosts
+
+
+def get_event_conflicts(event: Event) -> list[EventConflict]:
+    """
+    Find events that overlap with event, at the same location or hosted by the same club.
+
+    Uses the event time range index, so only overlapping events are read.
+    """
+
+    if not event.start_at or not event.end_at or event.end_at <= event.start_at:
+        return []
+
+    hosts = {event.club_id}
+    if event.id is not None:
+        hosts |= get_event_hosts([event.id]).get(event.id, set())
+
+    cohosted_ids = Event.other_clubs.through.objects.filter(club_id__in=hosts).values(
+        "event_id"
+    )
+    conflict_filter = models.Q(club_id__in=hosts) | models.Q(id__in=cohosted_ids)
+
+    location = event.location.lower() if event.location else None
+    if location:
+        conflict_filter |= models.Q(location_key=location)
+
+    query = (
+        Event.objects.filter_overlapping(event.start_at, event.end_at)
+        .annotate(location_key=Lower("location"))
+        .filter(conflict_filter)
+        .exclude(id=event.id)
+        .values("id", "club_id", "location_key")
+    )
+    others = list(query)
+    other_hosts = get_event_hosts([other["id"] for other in others])
+
+    conflicts: list[EventConflict] = []
+    for other in others:
+        if location and other["location_key"] == location:
+            conflicts.append(
+                {
+                    "event_id": event.id,
+                    "conflicting_event_id": other["id"],
+                    "type": ConflictType.VENUE,
+                }
+            )
+
+        if hosts & ({other["club_id"]} | other_hosts.get(other["id"], set())):
+            conflicts.append(
+                {
+                    "event_id": event.id,
+                    "conflicting_event_id": other["id"],
+                    "type": ConflictType.CLUB,
+                }
+            )
+
+    return conflicts
+
+
+def find_conflicts(
+    start: datetime, end: datetime, club_ids: Optional[list[int]] = None
+) -> list[EventConflict]:
+    """
+    Find all pairs of conflicting events during time range.
+
+    Events in the range are loaded once, and grouped into an interval tree
+    per location and per host club, so each event is only compared with
+    events it overlaps.
+
+    Parameters
+    ----------
+        - start (datetime): Start of range.
+        - end (datetime): End of range.
+        - club_ids (list[int]): Only include conflicts with events hosted by these clubs.
+    """
+
+    events = list(
+        Event.objects.filter_overlapping(start, end).values(
+            "id", "club_id", "location", "start_at", "end_at"
+        )
+    )
+    hosts = get_event_hosts([event["id"] for event in events])
+
+    groups: dict[tuple[ConflictType, object], list] = {}
+    for event in events:
+        interval = (event["start_at"], event["end_at"], event)
+
+        if event["location"]:
+            key = (ConflictType.VENUE, event["location"].lower())
+            groups.setdefault(key, []).append(interval)
+
+        event["hosts"] = {event["club_id"]} | hosts.get(event["id"], set())
+        for club_id in event["hosts"]:
+            groups.setdefault((ConflictType.CLUB, club_id), []).append(interval)
+
+    conflicts: list[EventConflict] = []
+    for (conflict_type, _), intervals in groups.items():
+        if len(intervals) < 2:
+            continue
+
+        tree = IntervalTree(intervals)
+
+        for event_start, event_end, event in intervals:
+            for other in tree.overlap(event_start, event_end):
+                # Report each pair once, from the first event
+                if other["id"] <= event["id"]:
+                    continue
+
+                if club_ids is not None and not (
+                    (event["hosts"] | other["hosts"]) & set(club_ids)
+                ):
+                    continue
+
+                conflicts.append(
+                    {
+                        "event_id": event["id"],
+                        "conflicting_event_id": other["id"],
+                        "type": conflict_type,
+                    }
+                )
+
+    # Events co-hosted by the same clubs are only reported once per type
+    unique = {
+        (c["event_id"], c["conflicting_event_id"], c["type"]): c for c in conflicts
+    }
+    return sorted(
+        unique.values(), key=lambda c: (c["event_id"], c["conflicting_event_id"])
+    )
@@ -0,0 +1,278 @@
+"""
+Rank club members by points.
+"""
+
+import uuid
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from typing import Optional, TypedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from clubs.models import ClubMembership
+
+LEADERBOARD_CACHE_TIMEOUT = 60 * 10
+"""Seconds before a leaderboard is rebuilt from member balances."""
+
+LEADERBOARD_LOCK_TIMEOUT = 5
+"""Seconds a single leaderboard update can hold the lock."""
+
+LEADERBOARD_REDIS_BACKEND = "django_redis.cache.RedisCache"
+"""Cache backend that rankings are stored in as redis sorted sets."""
+
+LEADERBOARD_BUILT_MARKER = "built"
+"""Member of redis rankings with no points, so rankings of empty clubs exist."""
+
+LEADERBOARD_UPDATE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    redis.call("ZADD", KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+"""Move member in redis ranking, unless it expired and will be rebuilt."""
+
+
+class LeaderboardEntry(TypedDict):
+    rank: int
+    member_id: int
+    points: int
+
+
+class ClubLeaderboard:
+    """
+    Cached ranking of club members by points.
+
+    With redis, members are stored in a sorted set scored by negative
+    points, so ranks are found and updated in O(log n) without loading
+    the ranking. Other caches store a sorted list of ``(-points, member_id)``
+    pairs, so finding a member's rank is a binary search.
+
+    Each points transaction moves a single member instead of rebuilding the
+    ranking, and increments the leaderboard version. Updates read the
+    member's balance while holding the lock, so concurrent transactions
+    cannot be applied out of order. Rebuilds and updates that ran while the
+    version changed are discarded, since they may have read old balances.
+    If an update cannot get the lock, the ranking is cleared and rebuilt
+    on next read.
+
+    Members with the same points share the same rank.
+    """
+
+    def __init__(self, club_id: int):
+        self.club_id = club_id
+
+    @property
+    def cache_key(self):
+        return f"clubs:leaderboard:{self.club_id}"
+
+    @property
+    def lock_key(self):
+        return f"{self.cache_key}:lock"
+
+    @property
+    def version_key(self):
+        return f"{self.cache_key}:version"
+
+    @property
+    def uses_redis(self):
+        return settings.CACHES["default"]["BACKEND"] == LEADERBOARD_REDIS_BACKEND
+
+    def _get_client(self):
+        """Get redis client used by the cache."""
+
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    def _get_redis_key(self):
+        return cache.make_key(self.cache_key)
+
+    def _get_version(self) -> int:
+        cache.add(self.version_key, 0, timeout=None)
+        return cache.get(self.version_key, 0)
+
+    def _bump_version(self) -> int:
+        """Discard rankings that are being built with old balances."""
+
+        try:
+            return cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, 1, timeout=None)
+            return self._get_version()
+
+    def _get_balances(self) -> dict[int, int]:
+        return dict(
+            ClubMembership.objects.filter(club__id=self.club_id).values_list(
+                "id", "points"
+            )
+        )
+
+    def _build(self):
+        """Load ranking from member balances."""
+
+        version = self._get_version()
+        balances = self._get_balances()
+        entries = sorted((-points, member_id) for member_id, points in balances.items())
+        data = {"entries": entries, "balances": balances}
+
+        if self.uses_redis:
+            key = self._get_redis_key()
+            building_key = f"{key}:building:{uuid.uuid4().hex}"
+            scores = {str(member_id): -points for member_id, points in balances.items()}
+
+            # Swapped in at once, so readers never see a partial ranking
+            pipe = self._get_client().pipeline()
+            pipe.zadd(building_key, {LEADERBOARD_BUILT_MARKER: float("inf"), **scores})
+            pipe.expire(building_key, LEADERBOARD_CACHE_TIMEOUT)
+            pipe.rename(building_key, key)
+            pipe.execute()
+        else:
+            cache.set(self.cache_key, data, timeout=LEADERBOARD_CACHE_TIMEOUT)
+
+        if self._get_version() != version:
+            self.clear()
+
+        return data
+
+    def _load(self):
+        data = cache.get(self.cache_key)
+
+        if data is None:
+            data = self._build()
+
+        return data
+
+    @contextmanager
+    def _lock(self):
+        acquired = cache.add(self.lock_key, True, timeout=LEADERBOARD_LOCK_TIMEOUT)
+
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                cache.delete(self.lock_key)
+
+    def _get_ranked_entries(self, ranking: list[tuple[int, int]]):
+        """Add ranks to ``(member_id, points)`` pairs, sorted from the top."""
+
+        top: list[LeaderboardEntry] = []
+
+        for index, (member_id, points) in enumerate(ranking):
+            rank = (
+                top[-1]["rank"]
+                if len(top) > 0 and top[-1]["points"] == points
+                else index + 1
+            )
+            top.append({"rank": rank, "member_id": member_id, "points": points})
+
+        return top
+
+    def get_top(self, count=10) -> list[LeaderboardEntry]:
+        """Get highest ranked members."""
+
+        if self.uses_redis:
+            key = self._get_redis_key()
+            client = self._get_client()
+
+            if not client.exists(key):
+                self._build()
+
+            ranking = [
+                (int(member), -int(score))
+                for member, score in client.zrange(key, 0, count, withscores=True)
+                if member.decode() != LEADERBOARD_BUILT_MARKER
+            ]
+            return self._get_ranked_entries(ranking[:count])
+
+        entries = self._load()["entries"]
+        ranking = [(member_id, -points) for points, member_id in entries[:count]]
+
+        return self._get_ranked_entries(ranking)
+
+    def get_rank(self, member_id: int) -> Optional[LeaderboardEntry]:
+        """Get rank for a single member, or None if they are not in the club."""
+
+        if self.uses_redis:
+            key = self._get_redis_key()
+            client = self._get_client()
+
+            if not client.exists(key):
+                self._build()
+
+            score = client.zscore(key, str(member_id))
+            if score is None:
+                return None
+
+            rank = client.zcount(key, "-inf", f"({score}") + 1
+            return {"rank": rank, "member_id": member_id, "points": -int(score)}
+
+        data = self._load()
+        points = data["balances"].get(member_id, None)
+
+        if points is None:
+            return None
+
+        rank = bisect_left(data["entries"], (-points,)) + 1
+        return {"rank": rank, "member_id": member_id, "points": points}
+
+    def update(self, member_id: int):
+        """
+        Move member to their current position in the ranking.
+
+        Call once changes to the member's balance are committed.
+        """
+
+        version = self._bump_version()
+
+        with self._lock() as acquired:
+            if not acquired:
+                self.clear()
+                return
+
+            points = (
+                ClubMembership.objects.filter(id=member_id)
+                .values_list("points", flat=True)
+                .first()
+            )
+            if points is None:
+                self.clear()
+                return
+
+            self._move(member_id, points)
+
+            # Updates that could not get the lock may have been overwritten
+            if self._get_version() != version:
+                self.clear()
+
+    def _move(self, member_id: int, points: int):
+        """Set member's points in the cached ranking, if it exists."""
+
+        if self.uses_redis:
+            key = self._get_redis_key()
+            self._get_client().eval(
+                LEADERBOARD_UPDATE_SCRIPT, 1, key, -points, member_id
+            )
+            return
+
+        data = cache.get(self.cache_key)
+        if data is None:
+            # Will be built with the new balance on next read
+            return
+
+        entries, balances = data["entries"], data["balances"]
+        previous = balances.get(member_id, None)
+
+        if previous is not None:
+            index = bisect_left(entries, (-previous, member_id))
+            if index < len(entries) and entries[index] == (-previous, member_id):
+                entries.pop(index)
+
+        insort(entries, (-points, member_id))
+        balances[member_id] = points
+
+        cache.set(self.cache_key, data, timeout=LEADERBOARD_CACHE_TIMEOUT)
+
+    def clear(self):
+        """Remove cached ranking, rebuilt on next read."""
+
+        cache.delete(self.cache_key)
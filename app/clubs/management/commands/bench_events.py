@@ -0,0 +1,156 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from clubs.conflicts import find_conflicts, get_event_conflicts
+from clubs.models import Club, Event
+from clubs.viewsets import EventPagination
+
+
+class Command(BaseCommand):
+    """Benchmark event time range queries against a large generated dataset."""
+
+    help = "Generate events and time the event search queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=1_000_000)
+        parser.add_argument("--clubs", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--keep", action="store_true", help="Do not delete generated data."
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+
+        if not (settings.DEBUG or settings.DEV):
+            raise CommandError("Benchmarks can only run in DEBUG or DEV mode.")
+
+        self.repeat = options["repeat"]
+        clubs = self.generate(options["events"], options["clubs"])
+
+        try:
+            self.run(clubs)
+        finally:
+            if not options["keep"]:
+                self.stdout.write("Removing generated data...")
+                Club.objects.filter(id__in=[club.id for club in clubs]).delete()
+
+    def generate(self, event_count: int, club_count: int):
+        """Insert events spread over two years, with some co-hosted."""
+
+        prefix = f"Bench {uuid.uuid4().hex[:8]}"
+        clubs = Club.objects.bulk_create(
+            [
+                Club(name=f"{prefix} {i}", alias=f"B{uuid.uuid4().hex[:6]}")
+                for i in range(club_count)
+            ]
+        )
+        club_ids = [club.id for club in clubs]
+        start = timezone.now() - timedelta(days=365)
+
+        self.stdout.write(f"Generating {event_count} events for {club_count} clubs...")
+        started = time.perf_counter()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Event._meta.db_table}
+                    (created_at, updated_at, name, club_id, location, start_at, end_at)
+                SELECT now(), now(), 'Event ' || i,
+                    (%(club_ids)s::bigint[])[1 + i %% %(club_count)s],
+                    'Room ' || (i %% 500),
+                    %(start)s + i * %(spacing)s,
+                    %(start)s + i * %(spacing)s + (30 + i %% 150) * interval '1 minute'
+                FROM generate_series(1, %(event_count)s) AS i
+                """,
+                {
+                    "club_ids": club_ids,
+                    "club_count": club_count,
+                    "start": start,
+                    "spacing": timedelta(days=730) / event_count,
+                    "event_count": event_count,
+                },
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {Event.other_clubs.through._meta.db_table}
+                    (event_id, club_id)
+                SELECT id, (%(club_ids)s::bigint[])[1 + (id + 7) %% %(club_count)s]
+                FROM {Event._meta.db_table}
+                WHERE club_id = ANY(%(club_ids)s) AND id %% 20 = 0
+                """,
+                {"club_ids": club_ids, "club_count": club_count},
+            )
+            cursor.execute(f"ANALYZE {Event._meta.db_table}")
+
+        self.stdout.write(f"Generated in {time.perf_counter() - started:.1f}s\n")
+        return clubs
+
+    def time_call(self, label: str, func):
+        """Run function several times, report median latency."""
+
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(
+            f"{label:<40} median {statistics.median(timings):8.2f}ms"
+            f"  max {max(timings):8.2f}ms"
+        )
+
+    def time_query(self, label: str, get_query):
+        """Report latency for the first page of query."""
+
+        self.time_call(label, lambda: list(get_query()[: EventPagination.page_size]))
+
+    def run(self, clubs: list[Club]):
+        now = timezone.now()
+        week_end = now + timedelta(days=7)
+        club_ids = [club.id for club in clubs[:5]]
+        pagination = EventPagination()
+
+        self.time_query(
+            "Window, all clubs (1 week)",
+            lambda: Event.objects.filter_in_range(start=now, end=week_end),
+        )
+        self.time_query(
+            "Window, 5 clubs + co-hosted (1 week)",
+            lambda: Event.objects.filter_in_range(
+                start=now, end=week_end, club_ids=club_ids
+            ),
+        )
+        self.time_query(
+            "Window, 5 clubs, no co-hosted (1 week)",
+            lambda: Event.objects.filter_in_range(
+                start=now, end=week_end, club_ids=club_ids, include_other_clubs=False
+            ),
+        )
+
+        # Compare deep pages, with cursor of the event halfway through results
+        query = Event.objects.filter_in_range(club_ids=club_ids)
+        depth = query.count() // 2
+        middle = query[depth]
+        cursor_filter = pagination.get_cursor_filter([middle.start_at, middle.id])
+
+        self.time_query(f"Page at offset {depth}", lambda: query[depth:])
+        self.time_query(
+            "Page at keyset cursor (same position)",
+            lambda: query.filter(cursor_filter),
+        )
+
+        # Conflict detection only reads overlapping events
+        event = Event.objects.filter_in_range(start=now, club_ids=club_ids).first()
+        self.time_call("Conflicts for one event", lambda: get_event_conflicts(event))
+        self.time_call(
+            "All conflicts (1 day)",
+            lambda: find_conflicts(now, now + timedelta(days=1)),
+        )
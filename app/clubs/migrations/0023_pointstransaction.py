@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_opening_balances(apps, schema_editor):
+    """Record existing points in the ledger so balances match history."""
+
+    ClubMembership = apps.get_model("clubs", "ClubMembership")
+    PointsTransaction = apps.get_model("clubs", "PointsTransaction")
+
+    members = ClubMembership.objects.exclude(points=0).values_list(
+        "id", "club_id", "points"
+    )
+    PointsTransaction.objects.bulk_create(
+        [
+            PointsTransaction(
+                club_id=club_id,
+                member_id=member_id,
+                amount=points,
+                balance=points,
+                reason="Opening balance",
+            )
+            for member_id, club_id, points in members.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clubs", "0022_clubmembership_one_membership_per_user_and_club"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PointsTransaction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("amount", models.IntegerField()),
+                (
+                    "balance",
+                    models.IntegerField(help_text="Member's points after transaction."),
+                ),
+                ("reason", models.CharField(blank=True, max_length=128, null=True)),
+                (
+                    "club",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="points_transactions",
+                        to="clubs.club",
+                    ),
+                ),
+                (
+                    "member",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="points_transactions",
+                        to="clubs.clubmembership",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at", "-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["member", "-created_at"],
+                        name="clubs_point_member__2f2643_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:50
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clubs", "0023_pointstransaction"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["club", "start_at", "id"], name="event_club_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["start_at", "id"], name="event_start_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=django.contrib.postgres.indexes.GistIndex(
+                utils.models.TsTzRange(
+                    "start_at",
+                    django.db.models.functions.comparison.Greatest(
+                        "start_at", "end_at"
+                    ),
+                    bounds="[]",
+                ),
+                name="event_time_range_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:10
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+def set_occurrence_dates(apps, schema_editor):
+    """Link events created for recurring events to their occurrence."""
+
+    Event = apps.get_model("clubs", "Event")
+    seen = set()
+
+    for event in Event.objects.filter(recurring_event__isnull=False).order_by("id"):
+        key = (event.recurring_event_id, event.start_at.date())
+        if key in seen:
+            continue
+
+        seen.add(key)
+        event.occurrence_date = key[1]
+        event.save(update_fields=["occurrence_date"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clubs", "0024_event_time_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="occurrence_date",
+            field=models.DateField(
+                blank=True,
+                help_text="Date of recurring event occurrence this event stores changes for",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="recurringevent",
+            name="skip_dates",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.DateField(),
+                blank=True,
+                default=list,
+                help_text="Dates the event will not happen on",
+                size=None,
+            ),
+        ),
+        migrations.RunPython(set_occurrence_dates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="event",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("recurring_event__isnull", False)),
+                fields=("recurring_event", "occurrence_date"),
+                name="one_event_per_recurring_event_occurrence",
+            ),
+        ),
+    ]
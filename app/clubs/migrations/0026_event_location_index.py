@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:17
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clubs", "0025_recurring_event_occurrences"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                django.db.models.functions.text.Lower("location"),
+                models.F("start_at"),
+                name="event_location_start_idx",
+            ),
+        ),
+    ]
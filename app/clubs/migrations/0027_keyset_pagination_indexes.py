@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clubs", "0026_event_location_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="club",
+            index=models.Index(
+                fields=["created_at", "id"], name="clubs_club_created_9ab76b_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="clubmembership",
+            index=models.Index(
+                fields=["club", "created_at", "id"],
+                name="clubs_clubm_club_id_39ed32_idx",
+            ),
+        ),
+    ]
@@ -6,13 +6,18 @@ Club models.
 from typing import ClassVar, Optional
 
 from django.contrib.auth.models import Permission
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GistIndex
 from django.core import exceptions
+from django.core.cache import cache
 from django.core.validators import MinValueValidator
 from django.db import models, transaction
+from django.db.models.functions import Greatest, Lower
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.timezone import datetime
 from django.utils.translation import gettext_lazy as _
+from psycopg2.extras import DateTimeTZRange
 
 from analytics.models import Link
 from core.abstracts.models import (
@@ -26,7 +31,7 @@ from core.abstracts.models import (
 from users.models import User
 from utils.dates import get_day_count
 from utils.helpers import get_full_url
-from utils.models import UploadFilepathFactory
+from utils.models import TsTzRange, UploadFilepathFactory
 from utils.permissions import get_permission
 
 
@@ -97,6 +102,7 @@ class Club(UniqueModel):
 
     class Meta:
         permissions = [("preview_club", "Can view a set of limited fields for a club.")]
+        indexes = [models.Index(fields=("created_at", "id"))]
 
     def save(self, *args, **kwargs):
         # On save, set default alias from name
@@ -117,6 +123,10 @@ class ClubSocialProfile(SocialProfile):
     club = models.ForeignKey(Club, on_delete=models.CASCADE, related_name="socials")
 
 
+DEFAULT_ROLE_IDS_CACHE_TIMEOUT = 60 * 60
+"""Seconds to cache default role ids, also cleared when club roles are saved."""
+
+
 class ClubRoleManager(ManagerBase["ClubRole"]):
     """Manage club role queries."""
 
@@ -139,6 +149,28 @@ class ClubRoleManager(ManagerBase["ClubRole"]):
         for perm in permissions:
             role.permissions.add(perm)
 
+    def get_default_ids(self, club_id: int) -> list[int]:
+        """Get ids of the club's default roles, cached until a club role changes."""
+
+        key = self._get_default_ids_cache_key(club_id)
+        role_ids = cache.get(key)
+
+        if role_ids is None:
+            role_ids = list(
+                self.filter(club__id=club_id, default=True).values_list("id", flat=True)
+            )
+            cache.set(key, role_ids, timeout=DEFAULT_ROLE_IDS_CACHE_TIMEOUT)
+
+        return role_ids
+
+    def clear_default_ids_cache(self, club_id: int):
+        """Remove cached default role ids for club."""
+
+        cache.delete(self._get_default_ids_cache_key(club_id))
+
+    def _get_default_ids_cache_key(self, club_id: int):
+        return f"clubs:default_role_ids:{club_id}"
+
 
 class ClubRole(ModelBase):
     """Extend permission group to manage club roles."""
@@ -201,6 +233,91 @@ class ClubMembershipManager(ManagerBase["ClubMembership"]):
 
         return membership
 
+    def upsert(
+        self, club_id: int, user_id: int, role_ids: Optional[list[int]] = None
+    ) -> Optional["ClubMembership"]:
+        """
+        Create membership if it does not exist, in a single query.
+
+        New members are given the club's default roles if no roles are given,
+        given roles are also added to existing members. Roles from other clubs
+        are ignored. Returns None if the club does not exist, otherwise the
+        membership with a ``created`` attribute.
+
+        Sends ``post_save`` for new memberships once committed, like ``create``.
+        """
+
+        add_to_existing = role_ids is not None
+        if role_ids is None:
+            role_ids = ClubRole.objects.get_default_ids(club_id)
+
+        sql = f"""
+            WITH club AS (
+                SELECT id FROM {Club._meta.db_table} WHERE id = %(club_id)s
+            ), {self.get_upsert_sql()}
+            SELECT * FROM member
+        """
+        params = {
+            "now": timezone.now(),
+            "club_id": club_id,
+            "user_id": user_id,
+            "role_ids": role_ids,
+            "add_to_existing": add_to_existing,
+        }
+
+        membership = next(iter(self.raw(sql, params)), None)
+
+        if membership is not None and membership.created:
+            self.send_created_signal(membership)
+
+        return membership
+
+    def send_created_signal(self, membership: "ClubMembership"):
+        """Notify receivers of a membership created with raw sql, once committed."""
+
+        transaction.on_commit(
+            lambda: models.signals.post_save.send(
+                sender=self.model,
+                instance=membership,
+                created=True,
+                update_fields=None,
+                raw=False,
+                using=self.db,
+            )
+        )
+
+    def get_upsert_sql(self):
+        """
+        Common table expressions for creating a membership and its roles.
+
+        Expects a ``club`` expression with the club ``id``, and parameters
+        ``now``, ``user_id``, ``role_ids``, and ``add_to_existing``. Existing
+        memberships are touched by the conflict clause so they are returned
+        as ``member``, even when created by a concurrent transaction.
+        """
+
+        membership_table = self.model._meta.db_table
+        roles_table = self.model.roles.through._meta.db_table
+
+        return f"""
+            member AS (
+                INSERT INTO {membership_table} (
+                    created_at, updated_at, club_id, user_id, owner, points
+                )
+                SELECT %(now)s, %(now)s, club.id, %(user_id)s, false, 0 FROM club
+                ON CONFLICT (club_id, user_id)
+                    DO UPDATE SET updated_at = {membership_table}.updated_at
+                RETURNING *, (xmax = 0) AS created
+            ), member_roles AS (
+                INSERT INTO {roles_table} (clubmembership_id, clubrole_id)
+                SELECT member.id, role.id FROM member
+                JOIN {ClubRole._meta.db_table} role ON role.club_id = member.club_id
+                WHERE role.id = ANY(%(role_ids)s::bigint[])
+                    AND (member.created OR %(add_to_existing)s)
+                ON CONFLICT DO NOTHING
+            )
+        """
+
 
 class ClubMembership(ModelBase):
     """Connection between user and club."""
@@ -237,20 +354,18 @@ class ClubMembership(ModelBase):
                 name="one_membership_per_user_and_club", fields=("club", "user")
             ),
         ]
+        indexes = [models.Index(fields=("club", "created_at", "id"))]
 
     def add_roles(self, *roles, commit=True):
         """Add ClubRole to membership."""
 
-        for role in roles:
-            # If there's an issue, reverse all db ops
-            with transaction.atomic():
-                if role in self.roles.all():
-                    continue
-
-                self.roles.add(role)
+        # If there's an issue, reverse all db ops
+        with transaction.atomic():
+            # Skips roles the member already has
+            self.roles.add(*roles)
 
-                if commit:
-                    self.save()
+            if commit:
+                self.save()
 
     def delete(self, *args, **kwargs):
         assert self.owner is False, "Cannot delete owner of club."
@@ -339,6 +454,38 @@ class TeamMembership(ModelBase):
         return super().clean()
 
 
+class PointsTransaction(ModelBase):
+    """
+    Append-only record of a change to a member's points.
+
+    The member's ``points`` field is the running balance, updated in the
+    same database transaction the entry is recorded in.
+    """
+
+    club = models.ForeignKey(
+        Club, on_delete=models.CASCADE, related_name="points_transactions"
+    )
+    member = models.ForeignKey(
+        ClubMembership, on_delete=models.CASCADE, related_name="points_transactions"
+    )
+
+    amount = models.IntegerField()
+    balance = models.IntegerField(help_text="Member's points after transaction.")
+    reason = models.CharField(max_length=128, null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.member} {self.amount:+d}"
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [models.Index(fields=("member", "-created_at"))]
+
+    def save(self, *args, **kwargs):
+        assert self._state.adding, "Cannot change points transactions."
+
+        return super().save(*args, **kwargs)
+
+
 class EventFields(ModelBase):
     """Common fields for club event models."""
 
@@ -370,7 +517,12 @@ class RecurringEvent(EventFields):
     end_date = models.DateField(
         null=True, blank=True, help_text="Date of the last occurance of this event"
     )
-    # TODO: add skip_dates field
+    skip_dates = ArrayField(
+        models.DateField(),
+        default=list,
+        blank=True,
+        help_text="Dates the event will not happen on",
+    )
 
     # Relationships
     events: models.QuerySet["Event"]
@@ -383,7 +535,7 @@ class RecurringEvent(EventFields):
         else:
             end_date = self.end_date
 
-        return get_day_count(self.start_date, end_date, self.day)
+        return get_day_count(self.start_date, end_date, self.day, self.skip_dates)
 
 
 class EventManager(ManagerBase["Event"]):
@@ -406,6 +558,88 @@ class EventManager(ManagerBase["Event"]):
 
         return event
 
+    def filter_in_range(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        club_ids: Optional[list[int]] = None,
+        tag_ids: Optional[list[int]] = None,
+        include_other_clubs=True,
+    ) -> models.QuerySet["Event"]:
+        """
+        Find events happening during time range, sorted by start time.
+
+        Parameters
+        ----------
+            - start (datetime): Include events ending after this time.
+            - end (datetime): Include events starting before this time.
+            - club_ids (list[int]): Only include events for these clubs.
+            - tag_ids (list[int]): Only include events with any of these tags.
+            - include_other_clubs (bool): Include events co-hosted by the clubs.
+        """
+
+        query = self.filter(start_at__isnull=False)
+
+        if start is not None or end is not None:
+            query = query.annotate(time_range=EVENT_TIME_RANGE).filter(
+                time_range__overlap=(start, end)
+            )
+
+        if club_ids is not None:
+            club_filter = models.Q(club__id__in=club_ids)
+
+            if include_other_clubs:
+                cohosted_ids = self.model.other_clubs.through.objects.filter(
+                    club_id__in=club_ids
+                ).values("event_id")
+                club_filter |= models.Q(id__in=cohosted_ids)
+
+            query = query.filter(club_filter)
+
+        if tag_ids is not None:
+            tagged_ids = self.model.tags.through.objects.filter(
+                eventtag_id__in=tag_ids
+            ).values("event_id")
+            query = query.filter(id__in=tagged_ids)
+
+        return query.order_by("start_at", "id")
+
+    def filter_overlapping(
+        self, start: datetime, end: datetime, location: Optional[str] = None
+    ) -> models.QuerySet["Event"]:
+        """
+        Find events that overlap time range, for detecting conflicts.
+
+        Events that only touch the range, or do not have an end time, do
+        not overlap. Locations are compared case insensitive.
+
+        Parameters
+        ----------
+            - start (datetime): Start of range.
+            - end (datetime): End of range.
+            - location (str): Only include events at this location.
+        """
+
+        query = self.annotate(time_range=EVENT_TIME_RANGE).filter(
+            time_range__overlap=DateTimeTZRange(start, end, bounds="()"),
+            end_at__gt=models.F("start_at"),
+        )
+
+        if location is not None:
+            query = query.annotate(location_key=Lower("location")).filter(
+                location_key=location.lower()
+            )
+
+        return query.order_by("start_at", "id")
+
+
+EVENT_TIME_RANGE = TsTzRange("start_at", Greatest("start_at", "end_at"), bounds="[]")
+"""
+Time range of event, used for overlap queries with the range index.
+
+Events without an end, or that end before they start, are treated as an instant.
+"""
+
 
 class Event(EventFields):
     """
@@ -427,6 +661,11 @@ class Event(EventFields):
         blank=True,
         related_name="events",
     )
+    occurrence_date = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Date of recurring event occurrence this event stores changes for",
+    )
     other_clubs = models.ManyToManyField(Club, blank=True)
 
     tags = models.ManyToManyField(EventTag, blank=True)
@@ -451,6 +690,21 @@ class Event(EventFields):
                 fields=("start_at", "end_at", "club", "name"),
                 name="unique_event_name_per_timerange_per_club",
             ),
+            models.UniqueConstraint(
+                fields=("recurring_event", "occurrence_date"),
+                condition=models.Q(recurring_event__isnull=False),
+                name="one_event_per_recurring_event_occurrence",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=("club", "start_at", "id"), name="event_club_start_idx"
+            ),
+            models.Index(fields=("start_at", "id"), name="event_start_idx"),
+            GistIndex(EVENT_TIME_RANGE, name="event_time_range_idx"),
+            models.Index(
+                Lower("location"), models.F("start_at"), name="event_location_start_idx"
+            ),
         ]
 
     def clean(self):
@@ -465,6 +719,54 @@ class Event(EventFields):
         return super().clean()
 
 
+class EventAttendanceManager(ManagerBase["EventAttendance"]):
+    """Manage queries for event attendance."""
+
+    def upsert(
+        self, event_id: int, club_id: int, user_id: int
+    ) -> Optional["EventAttendance"]:
+        """
+        Record attendance for user, in a single query.
+
+        Creates club membership with default roles if the user is not a member.
+        Returns None if the event does not exist or is not part of the club,
+        otherwise the attendance with a ``created`` attribute.
+        """
+
+        sql = f"""
+            WITH club AS (
+                SELECT club_id AS id, id AS event_id FROM {Event._meta.db_table}
+                WHERE id = %(event_id)s AND club_id = %(club_id)s
+            ), {ClubMembership.objects.get_upsert_sql()}
+            INSERT INTO {self.model._meta.db_table}
+                (created_at, updated_at, event_id, member_id)
+            SELECT %(now)s, %(now)s, club.event_id, member.id FROM club, member
+            ON CONFLICT (event_id, member_id)
+                DO UPDATE SET updated_at = {self.model._meta.db_table}.updated_at
+            RETURNING *, (xmax = 0) AS created,
+                (SELECT member.created FROM member) AS member_created
+        """
+        params = {
+            "now": timezone.now(),
+            "event_id": event_id,
+            "club_id": club_id,
+            "user_id": user_id,
+            "role_ids": ClubRole.objects.get_default_ids(club_id),
+            "add_to_existing": False,
+        }
+
+        attendance = next(iter(self.raw(sql, params)), None)
+
+        if attendance is not None and attendance.member_created:
+            ClubMembership.objects.send_created_signal(
+                ClubMembership(
+                    id=attendance.member_id, club_id=club_id, user_id=user_id, points=0
+                )
+            )
+
+        return attendance
+
+
 class EventAttendance(ModelBase):
     """Records when members attend club event."""
 
@@ -475,6 +777,9 @@ class EventAttendance(ModelBase):
         ClubMembership, on_delete=models.CASCADE, related_name="event_attendance"
     )
 
+    # Overrides
+    objects: ClassVar[EventAttendanceManager] = EventAttendanceManager()
+
     class Meta:
 
         constraints = [
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0003_alter_choiceinput_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="poll",
+            index=models.Index(
+                fields=["created_at", "id"], name="polls_poll_created_fbca5e_idx"
+            ),
+        ),
+    ]
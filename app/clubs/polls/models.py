@@ -88,6 +88,9 @@ class Poll(ModelBase):
     # Overrides
     objects: ClassVar[PollManager] = PollManager()
 
+    class Meta:
+        indexes = [models.Index(fields=("created_at", "id"))]
+
 
 class PollField(ModelBase):
     """Custom question field for poll forms."""
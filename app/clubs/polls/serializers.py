@@ -174,3 +174,91 @@ class PollSerializer(ModelSerializer):
                 serializer.save()
 
         return poll
+
+
+class ChoiceInputOptionStructureSerializer(ChoiceInputOptionNestedSerializer):
+    """Choice option in poll structure, order is determined by list position."""
+
+    id = serializers.IntegerField(required=False)
+
+    class Meta(ChoiceInputOptionNestedSerializer.Meta):
+        read_only_fields = ["order"]
+
+
+class TextInputStructureSerializer(TextInputNestedSerializer):
+    """Text input in poll structure."""
+
+    class Meta(TextInputNestedSerializer.Meta):
+        extra_kwargs = {"question": {"read_only": True}}
+
+
+class ChoiceInputStructureSerializer(ChoiceInputNestedSerializer):
+    """Choice input in poll structure."""
+
+    options = ChoiceInputOptionStructureSerializer(many=True, required=False)
+
+    class Meta(ChoiceInputNestedSerializer.Meta):
+        fields = [
+            "id",
+            "multiple",
+            "multiple_choice_type",
+            "single_choice_type",
+            "options",
+            "question",
+        ]
+        extra_kwargs = {"question": {"read_only": True}}
+
+
+class RangeInputStructureSerializer(RangeInputNestedSerializer):
+    """Range input in poll structure."""
+
+    class Meta(RangeInputNestedSerializer.Meta):
+        extra_kwargs = {"question": {"read_only": True}}
+
+
+class UploadInputStructureSerializer(UploadInputNestedSerializer):
+    """Upload input in poll structure."""
+
+    class Meta(UploadInputNestedSerializer.Meta):
+        extra_kwargs = {"question": {"read_only": True}}
+
+
+class PollQuestionStructureSerializer(PollQuestionNestedSerializer):
+    """Question in poll structure, only the input matching input type is used."""
+
+    text_input = TextInputStructureSerializer(required=False, allow_null=True)
+    choice_input = ChoiceInputStructureSerializer(required=False, allow_null=True)
+    range_input = RangeInputStructureSerializer(required=False, allow_null=True)
+    upload_input = UploadInputStructureSerializer(required=False, allow_null=True)
+
+    class Meta(PollQuestionNestedSerializer.Meta):
+        extra_kwargs = {"field": {"read_only": True}}
+
+
+class PollMarkupStructureSerializer(PollMarkupNestedSerializer):
+    """Markup in poll structure."""
+
+    class Meta(PollMarkupNestedSerializer.Meta):
+        extra_kwargs = {"field": {"read_only": True}}
+
+
+class PollFieldStructureSerializer(PollFieldNestedSerializer):
+    """
+    Poll field in poll structure.
+
+    Fields with an id are updated, fields without one are created.
+    Order is determined by position in the list.
+    """
+
+    id = serializers.IntegerField(required=False)
+    question = PollQuestionStructureSerializer(required=False, allow_null=True)
+    markup = PollMarkupStructureSerializer(required=False, allow_null=True)
+
+    class Meta(PollFieldNestedSerializer.Meta):
+        read_only_fields = ["order"]
+
+
+class PollStructureSerializer(serializers.Serializer):
+    """Full field tree for a poll, used to bulk edit poll fields."""
+
+    fields = PollFieldStructureSerializer(many=True)
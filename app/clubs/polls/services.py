@@ -0,0 +1,422 @@
+"""
+Business logic for club polls.
+"""
+
+from typing import Optional, Type
+
+from django.core import exceptions
+from django.db import models, transaction
+from django.utils import timezone
+
+from clubs.polls.models import (
+    ChoiceInput,
+    ChoiceInputOption,
+    Poll,
+    PollField,
+    PollFieldType,
+    PollInputType,
+    PollMarkup,
+    PollMultiChoiceType,
+    PollQuestion,
+    PollSingleChoiceType,
+    RangeInput,
+    TextInput,
+    UploadInput,
+)
+from core.abstracts.services import ServiceBase
+from utils.ordering import get_gapped_orders
+
+POLL_INPUT_MODELS: dict[PollInputType, Type[models.Model]] = {
+    PollInputType.TEXT: TextInput,
+    PollInputType.CHOICE: ChoiceInput,
+    PollInputType.RANGE: RangeInput,
+    PollInputType.UPLOAD: UploadInput,
+}
+"""Map question input types to the model storing the input settings."""
+
+POLL_INPUT_KEYS: dict[PollInputType, str] = {
+    PollInputType.TEXT: "text_input",
+    PollInputType.CHOICE: "choice_input",
+    PollInputType.RANGE: "range_input",
+    PollInputType.UPLOAD: "upload_input",
+}
+"""Map question input types to their key in poll structure data."""
+
+
+class PollService(ServiceBase[Poll]):
+    """Manage poll objects, business logic."""
+
+    model = Poll
+
+    @staticmethod
+    def get_fields_queryset():
+        """Query fields with their questions, markup, and inputs."""
+
+        return PollField.objects.select_related(
+            "markup",
+            "question",
+            "question___text_input",
+            "question___choice_input",
+            "question___range_input",
+            "question___upload_input",
+        ).prefetch_related("question___choice_input__options")
+
+    def _get_fields_query(self):
+        """Query all fields for poll, with their questions, markup, and inputs."""
+
+        return self.get_fields_queryset().filter(poll=self.obj)
+
+    def _get_field_tree(self) -> dict[int, PollField]:
+        """Map field ids to fields for poll."""
+
+        return {field.id: field for field in self._get_fields_query()}
+
+    def get_structure(self) -> Poll:
+        """Get poll with all nested field objects loaded."""
+
+        return Poll.objects.prefetch_related(
+            models.Prefetch("fields", queryset=self.get_fields_queryset())
+        ).get(id=self.obj.id)
+
+    @staticmethod
+    def _get_related(obj: models.Model, related_name: str):
+        """Get reverse one to one object, or none."""
+
+        try:
+            return getattr(obj, related_name)
+        except exceptions.ObjectDoesNotExist:
+            return None
+
+    @staticmethod
+    def _set_attrs(obj: models.Model, data: dict) -> bool:
+        """Set attributes on object, returns whether anything changed."""
+        changed = False
+
+        for key, value in data.items():
+            if getattr(obj, key) != value:
+                setattr(obj, key, value)
+                changed = True
+
+        return changed
+
+    @staticmethod
+    def _bulk_update(model: Type[models.Model], objs: list, fields: set[str]):
+        if len(objs) == 0 or len(fields) == 0:
+            return
+
+        # Bulk updates skip auto_now, so set the update time on each object
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+
+        model.objects.bulk_update(objs, [*fields, "updated_at"])
+
+    def update_structure(self, fields_data: list[dict]) -> Poll:
+        """
+        Sync the poll's fields with the given field tree.
+
+        Fields are given in their display order. Fields with an ``id`` are updated,
+        fields without one are created, and existing fields that are not in the
+        list are deleted. All changes are applied with bulk queries in a single
+        transaction, so the number of queries does not grow with the poll size.
+
+        Order keys are gapped, moving a single field only updates that field's row.
+
+        Parameters
+        ----------
+            - fields_data (list[dict]): Validated ``PollFieldStructureSerializer`` data.
+        """
+
+        with transaction.atomic():
+            existing = self._get_field_tree()
+
+            unknown_ids = [
+                data["id"]
+                for data in fields_data
+                if data.get("id", None) is not None and data["id"] not in existing
+            ]
+            if len(unknown_ids) > 0:
+                raise exceptions.ValidationError(
+                    f"Fields {unknown_ids} do not belong to poll {self.obj}."
+                )
+
+            # Remove fields not in structure, db cascades to nested objects
+            kept_ids = {data.get("id", None) for data in fields_data}
+            removed_ids = [id for id in existing.keys() if id not in kept_ids]
+            if len(removed_ids) > 0:
+                PollField.objects.filter(id__in=removed_ids).delete()
+
+            fields = self._sync_fields(existing, fields_data)
+            self._sync_markups(fields, fields_data)
+            questions = self._sync_questions(fields, fields_data)
+            self._sync_inputs(questions, fields_data)
+
+            # Clients use the poll's updated_at to check for changes
+            self.obj.updated_at = timezone.now()
+            Poll.objects.filter(id=self.obj.id).update(updated_at=self.obj.updated_at)
+
+        return self.obj
+
+    def _sync_fields(self, existing: dict[int, PollField], fields_data: list[dict]):
+        """Create or update poll fields, returns fields in order of data."""
+
+        current_orders = [
+            existing[data["id"]].order if data.get("id", None) else None
+            for data in fields_data
+        ]
+        orders = get_gapped_orders(current_orders)
+
+        fields: list[PollField] = []
+        new_fields: list[PollField] = []
+        changed_fields: list[PollField] = []
+
+        for data, order in zip(fields_data, orders):
+            field_type = data.get("field_type", None) or PollFieldType.QUESTION
+
+            if data.get("id", None) is None:
+                field = PollField(poll=self.obj, field_type=field_type, order=order)
+                new_fields.append(field)
+            else:
+                field = existing[data["id"]]
+                if self._set_attrs(field, {"field_type": field_type, "order": order}):
+                    changed_fields.append(field)
+
+            fields.append(field)
+
+        PollField.objects.bulk_create(new_fields)
+        self._bulk_update(PollField, changed_fields, {"field_type", "order"})
+
+        return fields
+
+    def _sync_markups(self, fields: list[PollField], fields_data: list[dict]):
+        """Create, update, or remove markup for each field."""
+
+        new_markups: list[PollMarkup] = []
+        changed_markups: list[PollMarkup] = []
+        removed_ids: list[int] = []
+
+        for field, data in zip(fields, fields_data):
+            markup_data = {
+                key: value
+                for key, value in (data.get("markup", None) or {}).items()
+                if key != "field"
+            }
+            markup = self._get_related(field, "markup") if data.get("id") else None
+
+            if field.field_type != PollFieldType.MARKUP:
+                if markup is not None:
+                    removed_ids.append(markup.id)
+            elif markup is None:
+                new_markups.append(PollMarkup(field=field, **markup_data))
+            elif self._set_attrs(markup, markup_data):
+                changed_markups.append(markup)
+
+        if len(removed_ids) > 0:
+            PollMarkup.objects.filter(id__in=removed_ids).delete()
+
+        PollMarkup.objects.bulk_create(new_markups)
+        self._bulk_update(PollMarkup, changed_markups, {"content"})
+
+    def _sync_questions(self, fields: list[PollField], fields_data: list[dict]):
+        """
+        Create, update, or remove questions for each field.
+
+        Returns list the same length as fields, with the question for the field
+        and whether it was just created, or None if the field has no question.
+        """
+
+        questions: list[Optional[tuple[PollQuestion, bool]]] = []
+        new_questions: list[PollQuestion] = []
+        changed_questions: list[PollQuestion] = []
+        changed_keys: set[str] = set()
+        removed_ids: list[int] = []
+
+        for field, data in zip(fields, fields_data):
+            question_data = {
+                key: value
+                for key, value in (data.get("question", None) or {}).items()
+                if key not in POLL_INPUT_KEYS.values() and key != "field"
+            }
+            question = self._get_related(field, "question") if data.get("id") else None
+
+            if field.field_type != PollFieldType.QUESTION:
+                if question is not None:
+                    removed_ids.append(question.id)
+
+                questions.append(None)
+                continue
+
+            if question is None and not question_data:
+                questions.append(None)
+                continue
+
+            if question is None:
+                question = PollQuestion(field=field, **question_data)
+                new_questions.append(question)
+                questions.append((question, True))
+                continue
+
+            if self._set_attrs(question, question_data):
+                changed_questions.append(question)
+                changed_keys.update(question_data.keys())
+
+            questions.append((question, False))
+
+        if len(removed_ids) > 0:
+            PollQuestion.objects.filter(id__in=removed_ids).delete()
+
+        PollQuestion.objects.bulk_create(new_questions)
+        self._bulk_update(PollQuestion, changed_questions, changed_keys)
+
+        return questions
+
+    def _sync_inputs(
+        self,
+        questions: list[Optional[tuple[PollQuestion, bool]]],
+        fields_data: list[dict],
+    ):
+        """Create, update, or remove the input settings for each question."""
+
+        new_inputs: dict[PollInputType, list] = {key: [] for key in POLL_INPUT_MODELS}
+        changed_inputs: dict[PollInputType, list] = {
+            key: [] for key in POLL_INPUT_MODELS
+        }
+        changed_keys: dict[PollInputType, set] = {
+            key: set() for key in POLL_INPUT_MODELS
+        }
+        removed_ids: dict[PollInputType, list] = {key: [] for key in POLL_INPUT_MODELS}
+        options_data: list[tuple[ChoiceInput, list[dict]]] = []
+
+        for entry, data in zip(questions, fields_data):
+            if entry is None:
+                continue
+
+            question, created = entry
+            question_data = data.get("question", None) or {}
+
+            for input_type, input_key in POLL_INPUT_KEYS.items():
+                input_obj = (
+                    self._get_related(question, "_" + input_key)
+                    if not created
+                    else None
+                )
+
+                if question.input_type != input_type:
+                    if input_obj is not None:
+                        removed_ids[input_type].append(input_obj.id)
+                    continue
+
+                if question_data.get(input_key, None) is None:
+                    continue
+
+                input_data = {**question_data[input_key]}
+                input_data.pop("question", None)
+                options = input_data.pop("options", None)
+
+                if input_obj is None:
+                    input_obj = POLL_INPUT_MODELS[input_type](
+                        question=question, **input_data
+                    )
+                    self._clean_choice_input(input_obj)
+                    new_inputs[input_type].append(input_obj)
+                else:
+                    changed = self._set_attrs(input_obj, input_data)
+                    cleaned_keys = self._clean_choice_input(input_obj)
+
+                    if changed or len(cleaned_keys) > 0:
+                        changed_inputs[input_type].append(input_obj)
+                        changed_keys[input_type].update(input_data.keys())
+                        changed_keys[input_type].update(cleaned_keys)
+
+                if options is not None:
+                    options_data.append((input_obj, options))
+
+        for input_type, model in POLL_INPUT_MODELS.items():
+            if len(removed_ids[input_type]) > 0:
+                model.objects.filter(id__in=removed_ids[input_type]).delete()
+
+            model.objects.bulk_create(new_inputs[input_type])
+            self._bulk_update(
+                model, changed_inputs[input_type], changed_keys[input_type]
+            )
+
+        self._sync_options(options_data)
+
+    def _clean_choice_input(self, input_obj: models.Model) -> list[str]:
+        """Mirror ``ChoiceInput.save`` defaults, skipped by bulk queries."""
+
+        if not isinstance(input_obj, ChoiceInput):
+            return []
+
+        if input_obj.multiple and input_obj.multiple_choice_type is None:
+            input_obj.multiple_choice_type = PollMultiChoiceType.CHECKBOX
+            return ["multiple_choice_type"]
+        elif not input_obj.multiple and input_obj.single_choice_type is None:
+            input_obj.single_choice_type = PollSingleChoiceType.RADIO
+            return ["single_choice_type"]
+
+        return []
+
+    def _sync_options(self, options_data: list[tuple[ChoiceInput, list[dict]]]):
+        """Create, update, or remove options for choice inputs."""
+
+        new_options: list[ChoiceInputOption] = []
+        changed_options: list[ChoiceInputOption] = []
+        changed_keys: set[str] = set()
+        kept_ids: set[int] = set()
+        input_ids: list[int] = []
+
+        for choice_input, options in options_data:
+            # Existing inputs have options prefetched, new inputs have none
+            prefetched = getattr(choice_input, "_prefetched_objects_cache", {})
+            existing = {option.id: option for option in prefetched.get("options", [])}
+            input_ids.append(choice_input.id)
+
+            unknown_ids = [
+                data["id"]
+                for data in options
+                if data.get("id", None) is not None and data["id"] not in existing
+            ]
+            if len(unknown_ids) > 0:
+                raise exceptions.ValidationError(
+                    f"Options {unknown_ids} do not belong to {choice_input}."
+                )
+
+            orders = get_gapped_orders(
+                [
+                    existing[data["id"]].order if data.get("id", None) else None
+                    for data in options
+                ]
+            )
+
+            for data, order in zip(options, orders):
+                option_id = data.get("id", None)
+                option_data = {
+                    **{key: value for key, value in data.items() if key != "id"},
+                    "order": order,
+                }
+
+                # Mirror ``ChoiceInputOption.clean``, value defaults to label
+                if (option_data.get("value", None) or "").strip() == "":
+                    option_data["value"] = option_data.get("label", "")
+
+                if option_id is None:
+                    new_options.append(
+                        ChoiceInputOption(input=choice_input, **option_data)
+                    )
+                    continue
+
+                option = existing[option_id]
+                kept_ids.add(option_id)
+
+                if self._set_attrs(option, option_data):
+                    changed_options.append(option)
+                    changed_keys.update(option_data.keys())
+
+        if len(input_ids) > 0:
+            ChoiceInputOption.objects.filter(input__id__in=input_ids).exclude(
+                id__in=kept_ids
+            ).delete()
+
+        ChoiceInputOption.objects.bulk_create(new_options)
+        self._bulk_update(ChoiceInputOption, changed_options, changed_keys)
@@ -1,7 +1,10 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from clubs.polls.models import (
     ChoiceInput,
+    ChoiceInputOption,
     Poll,
     PollField,
     PollMarkup,
@@ -171,3 +174,228 @@ class PollViewAuthTests(AuthViewsTestsBase):
         self.assertEqual(RangeInput.objects.count(), 1)
         self.assertEqual(UploadInput.objects.count(), 1)
         self.assertEqual(PollMarkup.objects.count(), 1)
+
+    def get_structure_url(self, poll: Poll):
+        return reverse("api-clubpolls:polls-structure", args=[poll.id])
+
+    def get_structure_payload(self, count: int):
+        """Create field tree with a mix of field types."""
+
+        fields = []
+
+        for i in range(count):
+            if i % 3 == 0:
+                fields.append(
+                    {
+                        "field_type": "question",
+                        "question": {
+                            "label": f"Text question {i}?",
+                            "input_type": "text",
+                            "text_input": {"text_type": "short"},
+                        },
+                    }
+                )
+            elif i % 3 == 1:
+                fields.append(
+                    {
+                        "field_type": "question",
+                        "question": {
+                            "label": f"Choice question {i}?",
+                            "input_type": "choice",
+                            "choice_input": {
+                                "multiple": True,
+                                "options": [
+                                    {"label": "Option 1"},
+                                    {"label": "Option 2", "value": "option2"},
+                                ],
+                            },
+                        },
+                    }
+                )
+            else:
+                fields.append(
+                    {"field_type": "markup", "markup": {"content": f"# Section {i}"}}
+                )
+
+        return {"fields": fields}
+
+    def test_update_poll_structure(self):
+        """Should create, update, and delete poll fields in one request."""
+
+        poll = Poll.objects.create(name=fake.title())
+        url = self.get_structure_url(poll)
+
+        res = self.client.put(url, self.get_structure_payload(6), format="json")
+        self.assertResOk(res)
+
+        self.assertEqual(PollField.objects.filter(poll=poll).count(), 6)
+        self.assertEqual(PollQuestion.objects.count(), 4)
+        self.assertEqual(TextInput.objects.count(), 2)
+        self.assertEqual(ChoiceInput.objects.count(), 2)
+        self.assertEqual(ChoiceInputOption.objects.count(), 4)
+        self.assertEqual(PollMarkup.objects.count(), 2)
+
+        choice_input = ChoiceInput.objects.first()
+        self.assertEqual(choice_input.multiple_choice_type, "checkbox")
+        self.assertEqual(choice_input.options.first().value, "Option 1")
+
+        # Keep first two fields, update second, add new one at the start
+        fields = res.json()["fields"]
+        payload = {
+            "fields": [
+                {"field_type": "page_break"},
+                fields[0],
+                {
+                    **fields[1],
+                    "question": {
+                        **fields[1]["question"],
+                        "label": "Updated question?",
+                        "choice_input": {
+                            **fields[1]["question"]["choice_input"],
+                            "options": [
+                                fields[1]["question"]["choice_input"]["options"][1]
+                            ],
+                        },
+                    },
+                },
+            ]
+        }
+
+        res = self.client.put(url, payload, format="json")
+        self.assertResOk(res)
+
+        self.assertEqual(PollField.objects.filter(poll=poll).count(), 3)
+        self.assertEqual(PollQuestion.objects.count(), 2)
+        self.assertEqual(ChoiceInputOption.objects.count(), 1)
+        self.assertEqual(PollMarkup.objects.count(), 0)
+
+        field_types = list(poll.fields.values_list("field_type", flat=True))
+        self.assertEqual(field_types, ["page_break", "question", "question"])
+
+        question = PollQuestion.objects.get(field__id=fields[1]["id"])
+        self.assertEqual(question.label, "Updated question?")
+        self.assertEqual(question.choice_input.options.first().value, "option2")
+
+    def test_reorder_poll_structure(self):
+        """Should only update the order of the moved field."""
+
+        poll = Poll.objects.create(name=fake.title())
+        url = self.get_structure_url(poll)
+
+        res = self.client.put(url, self.get_structure_payload(5), format="json")
+        self.assertResOk(res)
+
+        fields = res.json()["fields"]
+        orders_before = dict(poll.fields.values_list("id", "order"))
+        updated_before = dict(poll.fields.values_list("id", "updated_at"))
+
+        # Move last field to the second position
+        payload = {"fields": [fields[0], fields[4], *fields[1:4]]}
+
+        res = self.client.put(url, payload, format="json")
+        self.assertResOk(res)
+
+        orders_after = dict(poll.fields.values_list("id", "order"))
+        changed = [id for id in orders_before if orders_before[id] != orders_after[id]]
+        self.assertEqual(changed, [fields[4]["id"]])
+
+        # Only the moved field gets a new update time
+        updated_after = dict(poll.fields.values_list("id", "updated_at"))
+        self.assertGreater(
+            updated_after[fields[4]["id"]], updated_before[fields[4]["id"]]
+        )
+        self.assertEqual(
+            updated_after[fields[0]["id"]], updated_before[fields[0]["id"]]
+        )
+
+        ids = list(poll.fields.values_list("id", flat=True))
+        self.assertEqual(ids, [field["id"] for field in payload["fields"]])
+
+    def test_poll_structure_query_count(self):
+        """Number of queries should not depend on number of fields."""
+
+        small_poll = Poll.objects.create(name=fake.title())
+        large_poll = Poll.objects.create(name=fake.title())
+
+        with CaptureQueriesContext(connection) as small_queries:
+            self.client.put(
+                self.get_structure_url(small_poll),
+                self.get_structure_payload(6),
+                format="json",
+            )
+
+        with CaptureQueriesContext(connection) as large_queries:
+            self.client.put(
+                self.get_structure_url(large_poll),
+                self.get_structure_payload(60),
+                format="json",
+            )
+
+        self.assertEqual(PollField.objects.filter(poll=large_poll).count(), 60)
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_poll_structure_foreign_field(self):
+        """Should not allow editing fields from other polls."""
+
+        poll = Poll.objects.create(name=fake.title())
+        other_poll = Poll.objects.create(name=fake.title())
+        other_field = PollField.objects.create(
+            poll=other_poll, field_type="page_break", order=0
+        )
+
+        payload = {"fields": [{"id": other_field.id, "field_type": "markup"}]}
+        res = self.client.put(self.get_structure_url(poll), payload, format="json")
+
+        self.assertEqual(res.status_code, 400)
+        other_field.refresh_from_db()
+        self.assertEqual(other_field.field_type, "page_break")
+
+    def test_poll_list_query_count(self):
+        """Listing polls should not query fields of each poll separately."""
+
+        def create_polls(count: int):
+            for _ in range(count):
+                poll = Poll.objects.create(name=fake.title())
+                field = PollField.objects.create(poll=poll, order=0)
+                PollQuestion.objects.create(
+                    field=field, label="Question?", input_type="text", create_input=True
+                )
+
+        self.assertQueriesConstant(
+            lambda: self.assertResOk(self.client.get(POLLS_URL)), create_polls
+        )
+
+    def test_poll_structure_changes_etag(self):
+        """Clients should fetch poll again after its structure changes."""
+
+        poll = Poll.objects.create(name=fake.title())
+        url = reverse("api-clubpolls:polls-detail", args=[poll.id])
+        etag = self.client.get(url).headers["ETag"]
+
+        res = self.client.put(
+            self.get_structure_url(poll), self.get_structure_payload(2), format="json"
+        )
+        self.assertResOk(res)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertResOk(res)
+        self.assertLength(res.json()["fields"], 2)
+
+    def test_poll_list_sparse_fields(self):
+        """Should not prefetch poll fields unless they are requested."""
+
+        poll = Poll.objects.create(name=fake.title())
+        PollField.objects.create(poll=poll, field_type="page_break", order=0)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(POLLS_URL, {"fields": "id,name"})
+
+        self.assertResOk(res)
+        self.assertEqual(res.json()["results"], [{"id": poll.id, "name": poll.name}])
+        self.assertFalse(any("polls_pollfield" in q["sql"] for q in queries))
+
+        res = self.client.get(POLLS_URL, {"fields": "id,fields.id,fields.order"})
+        self.assertEqual(
+            res.json()["results"][0]["fields"],
+            [{"id": poll.fields.first().id, "order": 0}],
+        )
@@ -1,8 +1,31 @@
+from django.db.models import Prefetch
+from drf_spectacular.utils import extend_schema
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
+
 from clubs.polls.models import Poll
-from clubs.polls.serializers import PollSerializer
+from clubs.polls.serializers import PollSerializer, PollStructureSerializer
+from clubs.polls.services import PollService
 from core.abstracts.viewsets import ModelViewSetBase
 
 
 class PollViewset(ModelViewSetBase):
-    queryset = Poll.objects.all()
+    queryset = Poll.objects.prefetch_related(
+        Prefetch("fields", queryset=PollService.get_fields_queryset())
+    )
     serializer_class = PollSerializer
+
+    @extend_schema(request=PollStructureSerializer, responses=PollSerializer)
+    @action(detail=True, methods=["put"], url_path="structure")
+    def structure(self, request: Request, pk=None):
+        """Insert, update, delete, and reorder all poll fields at once."""
+
+        poll = self.get_object()
+        serializer = PollStructureSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        service = PollService(poll)
+        service.update_structure(serializer.validated_data["fields"])
+
+        return Response(PollSerializer(service.get_structure()).data)
@@ -1,13 +1,23 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.fields import empty
 
-from clubs.models import Club, ClubMembership, ClubRole
+from clubs.conflicts import ConflictType
+from clubs.models import Club, ClubMembership, ClubRole, Event
+from clubs.services import (
+    AttendanceRecordStatus,
+    ClubService,
+    MembershipBatchOperation,
+    MembershipBatchStatus,
+)
 from core.abstracts.serializers import ModelSerializerBase
 from querycsv.serializers import CsvModelSerializer, WritableSlugRelatedField
 from users.models import User
 
 
-class ClubMemberNestedSerializer(serializers.ModelSerializer):
+class ClubMemberNestedSerializer(ModelSerializerBase):
     """Represents a user's membership within a club."""
 
     user_id = serializers.IntegerField(source="user.id", read_only=True)
@@ -28,7 +38,9 @@ class ClubMemberNestedSerializer(serializers.ModelSerializer):
 class ClubSerializer(ModelSerializerBase):
     """Convert club model to JSON fields."""
 
-    members = ClubMemberNestedSerializer(many=True, read_only=True)
+    members = ClubMemberNestedSerializer(
+        source="memberships", many=True, read_only=True
+    )
 
     class Meta:
         model = Club
@@ -38,6 +50,7 @@ class ClubSerializer(ModelSerializerBase):
             "logo",
             "members",
         ]
+        expandable_fields = ["members"]
 
 
 class ClubCsvSerializer(CsvModelSerializer):
@@ -69,6 +82,70 @@ class ClubMembershipSerializer(ModelSerializerBase):
         ]
 
 
+class ClubMembershipOperationSerializer(serializers.Serializer):
+    """Single change to a membership in a batch."""
+
+    op = serializers.ChoiceField(choices=MembershipBatchOperation.choices)
+    id = serializers.IntegerField(
+        required=False, help_text="Membership to update or delete."
+    )
+    user_id = serializers.IntegerField(
+        required=False, help_text="User to create membership for."
+    )
+    points = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        op = attrs["op"]
+
+        if op == MembershipBatchOperation.CREATE and "user_id" not in attrs:
+            raise serializers.ValidationError(
+                {"user_id": "Required to create a membership."}
+            )
+        elif op != MembershipBatchOperation.CREATE and "id" not in attrs:
+            raise serializers.ValidationError({"id": f"Required to {op} a membership."})
+        elif op == MembershipBatchOperation.UPDATE and "points" not in attrs:
+            raise serializers.ValidationError({"points": "Required to update."})
+
+        return attrs
+
+
+class ClubMembershipBatchSerializer(serializers.Serializer):
+    """Define REST API fields for changing many memberships at once."""
+
+    operations = ClubMembershipOperationSerializer(
+        many=True, allow_empty=False, max_length=5000
+    )
+
+    def validate_operations(self, operations):
+        """Each membership and user can only be changed once per batch."""
+
+        seen = set()
+
+        for op in operations:
+            if op["op"] == MembershipBatchOperation.CREATE:
+                key = ("user_id", op["user_id"])
+            else:
+                key = ("id", op["id"])
+
+            if key in seen:
+                raise serializers.ValidationError(
+                    f"Membership with {key[0]} {key[1]} is changed more than once."
+                )
+
+            seen.add(key)
+
+        return operations
+
+
+class ClubMembershipBatchResultSerializer(serializers.Serializer):
+    """Outcome of a single operation in a membership batch."""
+
+    op = serializers.ChoiceField(choices=MembershipBatchOperation.choices)
+    id = serializers.IntegerField(allow_null=True)
+    user_id = serializers.IntegerField(allow_null=True)
+    status = serializers.ChoiceField(choices=MembershipBatchStatus.choices)
+
+
 class ClubMembershipCsvSerializer(CsvModelSerializer, ClubMembershipSerializer):
     """Serialize club memberships for a csv."""
 
@@ -94,7 +171,7 @@ class ClubMembershipCsvSerializer(CsvModelSerializer, ClubMembershipSerializer):
         super(ClubMembershipCsvSerializer, self).__init__(instance, data, **kwargs)
         self.club = None
 
-        if instance is not None:
+        if isinstance(instance, ClubMembership):
             self.club = instance.club
 
         elif data is not empty:
@@ -147,3 +224,140 @@ class InviteClubMemberSerializer(serializers.Serializer):
     """Define REST API fields for sending invites to new club members."""
 
     emails = serializers.ListField(child=serializers.EmailField())
+
+
+class EventSerializer(ModelSerializerBase):
+    """Represents club events in the events api."""
+
+    class Meta:
+        model = Event
+        fields = [
+            *ModelSerializerBase.default_fields,
+            "name",
+            "description",
+            "location",
+            "club",
+            "other_clubs",
+            "start_at",
+            "end_at",
+            "recurring_event",
+            "tags",
+        ]
+
+
+class EventOccurrenceSerializer(serializers.ModelSerializer):
+    """
+    Represents events and recurring event occurrences for a club.
+
+    Occurrences that are not stored yet do not have an id, they are
+    stored when members check in with their attendance url, or with
+    ``EventOccurrenceStoreSerializer``.
+    """
+
+    attendance_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Event
+        fields = [
+            "id",
+            "name",
+            "description",
+            "location",
+            "club",
+            "start_at",
+            "end_at",
+            "recurring_event",
+            "occurrence_date",
+            "attendance_url",
+        ]
+
+    def get_attendance_url(self, obj: Event) -> str:
+        club = self.context.get("club", None) or obj.club
+
+        return ClubService(club).get_attendance_url(obj)
+
+
+class EventOccurrenceStoreSerializer(serializers.Serializer):
+    """Occurrence of a recurring event to store as an event."""
+
+    recurring_event = serializers.IntegerField()
+    occurrence_date = serializers.DateField()
+
+
+class EventOccurrenceFilterSerializer(serializers.Serializer):
+    """Query params for listing club event occurrences."""
+
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        start = attrs.setdefault("start", timezone.now())
+        end = attrs.setdefault("end", start + timedelta(days=30))
+
+        if end < start:
+            raise serializers.ValidationError("End must be after start.")
+        if end - start > timedelta(days=366):
+            raise serializers.ValidationError("Range cannot be longer than a year.")
+
+        return attrs
+
+
+class EventConflictFilterSerializer(EventOccurrenceFilterSerializer):
+    """Query params for finding event conflicts."""
+
+    club = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class EventConflictSerializer(serializers.Serializer):
+    """Two events scheduled at the same time."""
+
+    event_id = serializers.IntegerField()
+    conflicting_event_id = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=ConflictType.choices)
+
+
+class EventFilterSerializer(serializers.Serializer):
+    """Query params for searching events."""
+
+    club = serializers.ListField(child=serializers.IntegerField(), required=False)
+    tag = serializers.ListField(child=serializers.IntegerField(), required=False)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    include_other_clubs = serializers.BooleanField(default=True)
+
+
+class EventAttendanceBatchSerializer(serializers.Serializer):
+    """Define REST API fields for recording attendance of many users."""
+
+    event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all())
+    users = serializers.ListField(
+        child=serializers.CharField(max_length=64),
+        allow_empty=False,
+        max_length=5000,
+        help_text="User ids or emails.",
+    )
+
+
+class EventAttendanceResultSerializer(serializers.Serializer):
+    """Outcome of recording attendance for a single user."""
+
+    user = serializers.CharField()
+    user_id = serializers.IntegerField(allow_null=True)
+    status = serializers.ChoiceField(choices=AttendanceRecordStatus.choices)
+
+
+class ClubLeaderboardEntrySerializer(serializers.Serializer):
+    """Member's position in club leaderboard."""
+
+    rank = serializers.IntegerField()
+    member_id = serializers.IntegerField()
+    username = serializers.CharField(allow_null=True)
+    points = serializers.IntegerField()
+
+
+class ClubLeaderboardSerializer(serializers.Serializer):
+    """Highest ranked club members, and rank of current user."""
+
+    entries = ClubLeaderboardEntrySerializer(many=True)
+    user = ClubLeaderboardEntrySerializer(allow_null=True)
@@ -1,16 +1,17 @@
 import io
-from datetime import datetime, time, timedelta, timezone
-from typing import Optional
+from datetime import date, datetime, time, timedelta, timezone
+from typing import TYPE_CHECKING, Optional, TypedDict
 from zoneinfo import ZoneInfo
 
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
-import icalendar
 from django.core import exceptions, mail
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.urls import reverse
 
 from app.settings import DEFAULT_FROM_EMAIL
+from clubs.leaderboard import ClubLeaderboard
 from clubs.models import (
     Club,
     ClubMembership,
@@ -18,17 +19,67 @@ from clubs.models import (
     DayChoice,
     Event,
     EventAttendance,
+    PointsTransaction,
     RecurringEvent,
+    Team,
+    TeamMembership,
 )
 from core.abstracts.services import ServiceBase
 from users.models import User
-from utils.helpers import get_full_url
+from utils.dates import get_weekday_dates, to_dates
+from utils.helpers import get_full_url, lazy_import
+
+if TYPE_CHECKING:
+    import icalendar
+else:
+    icalendar = lazy_import("icalendar")
+
+
+class AttendanceRecordStatus(models.TextChoices):
+    """Outcome of recording attendance for a single user."""
+
+    RECORDED = "recorded"
+    ALREADY_RECORDED = "already_recorded"
+    NOT_FOUND = "not_found"
+
+
+class AttendanceRecordResult(TypedDict):
+    user: str
+    user_id: Optional[int]
+    status: AttendanceRecordStatus
+
+
+class MembershipBatchOperation(models.TextChoices):
+    """Change made to a single membership in a batch."""
+
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class MembershipBatchStatus(models.TextChoices):
+    """Outcome of a single operation in a membership batch."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ALREADY_MEMBER = "already_member"
+    IS_OWNER = "is_owner"
+    NOT_FOUND = "not_found"
+
+
+class MembershipBatchResult(TypedDict):
+    op: MembershipBatchOperation
+    id: Optional[int]
+    user_id: Optional[int]
+    status: MembershipBatchStatus
 
 
 class ClubService(ServiceBase[Club]):
     """Manage club objects, business logic."""
 
     model = Club
+    calendar_domain = "csu-portal"
 
     def _get_user_membership(self, user: User):
         try:
@@ -53,19 +104,18 @@ class ClubService(ServiceBase[Club]):
     ):
         """Create membership for pre-existing user."""
 
-        # If membership exists, just sync roles and continue
-        member_query = ClubMembership.objects.filter(club=self.obj, user=user)
-        if fail_silently and member_query.exists():
-            if not roles:
-                return
+        if not fail_silently:
+            return ClubMembership.objects.create(club=self.obj, user=user, roles=roles)
 
-            member = member_query.first()
-            member.add_roles(*roles)
-
-            return
+        for role in roles or []:
+            if role.club_id != self.obj.id:
+                raise exceptions.ValidationError(
+                    f"Club role {role} is not a part of club {self.obj}."
+                )
 
-        # Create new membership
-        return ClubMembership.objects.create(club=self.obj, user=user, roles=roles)
+        # If membership exists, just sync roles and continue
+        role_ids = [role.id for role in roles] if roles else None
+        return ClubMembership.objects.upsert(self.obj.id, user.id, role_ids=role_ids)
 
     def set_member_role(self, user: User, role: ClubRole | str):
         """Replace a member's roles with given role."""
@@ -86,37 +136,435 @@ class ClubService(ServiceBase[Club]):
         member = self._get_user_membership(user)
         member.add_roles(role)
 
-    def increase_member_points(self, user: User, amount: int = 1):
+    def _change_member_points(self, user: User, amount: int, reason=None):
+        """Atomically update member's balance and record it in the ledger."""
+
+        member_query = ClubMembership.objects.filter(club=self.obj, user=user)
+        balance_query = member_query
+
+        if amount < 0:
+            # Only update if the member has enough points
+            balance_query = member_query.filter(points__gte=-amount)
+
+        with transaction.atomic():
+            updated = balance_query.update(
+                points=models.F("points") + amount,
+                updated_at=datetime.now(timezone.utc),
+            )
+
+            if updated == 0 and member_query.exists():
+                raise exceptions.BadRequest("Not enough coins to decrease.")
+            elif updated == 0:
+                raise exceptions.BadRequest(f"User is not a member of {self.obj}.")
+
+            member_id, balance = member_query.values_list("id", "points").get()
+            entry = PointsTransaction.objects.create(
+                club=self.obj,
+                member_id=member_id,
+                amount=amount,
+                balance=balance,
+                reason=reason,
+            )
+            Team.objects.filter(club=self.obj, memberships__user=user).update(
+                points=models.F("points") + amount
+            )
+
+            leaderboard = ClubLeaderboard(self.obj.id)
+            transaction.on_commit(lambda: leaderboard.update(member_id))
+
+        return entry
+
+    def increase_member_points(self, user: User, amount: int = 1, reason=None):
         """Give the user more coins."""
-        member = self._get_user_membership(user)
-        member.points += amount
-        member.save()
 
-    def decrease_member_points(self, user: User, amount: int = 1):
+        return self._change_member_points(user, amount, reason=reason)
+
+    def decrease_member_points(self, user: User, amount: int = 1, reason=None):
         """Remove coins from the user."""
-        member = self._get_user_membership(user)
-        if member.points < amount:
-            raise exceptions.BadRequest("Not enough coins to decrease.")
-        else:
-            member.points -= amount
 
-        member.save()
+        return self._change_member_points(user, -amount, reason=reason)
+
+    def get_leaderboard(self, count=10, user: Optional[User] = None):
+        """
+        Get highest ranked members, and the rank of the given user.
+
+        Parameters
+        ----------
+            - count (int): Number of members to list.
+            - user (User): If given and a member, includes their rank.
+        """
+
+        leaderboard = ClubLeaderboard(self.obj.id)
+        entries = leaderboard.get_top(count)
+        user_entry = None
+
+        if user is not None:
+            member_id = (
+                ClubMembership.objects.filter(club=self.obj, user__id=user.id)
+                .values_list("id", flat=True)
+                .first()
+            )
+            user_entry = leaderboard.get_rank(member_id) if member_id else None
+
+        member_ids = [entry["member_id"] for entry in entries]
+        if user_entry is not None:
+            member_ids.append(user_entry["member_id"])
+
+        usernames = dict(
+            ClubMembership.objects.filter(id__in=member_ids).values_list(
+                "id", "user__username"
+            )
+        )
+        for entry in [*entries, user_entry]:
+            if entry is not None:
+                entry["username"] = usernames.get(entry["member_id"], None)
+
+        return {"entries": entries, "user": user_entry}
+
+    def _add_team_points(self, amounts: dict[int, int]):
+        """Add points to the club teams of each user, in a single update."""
+
+        team_amounts: dict[int, int] = {}
+        team_users = TeamMembership.objects.filter(
+            team__club=self.obj, user__id__in=amounts.keys()
+        ).values_list("team_id", "user_id")
+
+        for team_id, user_id in team_users:
+            team_amounts[team_id] = team_amounts.get(team_id, 0) + amounts[user_id]
+
+        if len(team_amounts) == 0:
+            return
+
+        Team.objects.filter(id__in=team_amounts.keys()).update(
+            points=models.F("points")
+            + models.Case(
+                *[
+                    models.When(id=team_id, then=models.Value(amount))
+                    for team_id, amount in team_amounts.items()
+                ],
+                default=models.Value(0),
+                output_field=models.IntegerField(),
+            )
+        )
+
+    @staticmethod
+    def sync_team_points(team: Team):
+        """Recalculate team's points from its members' points transactions."""
+
+        total = PointsTransaction.objects.filter(
+            club__id=team.club_id, member__user__team_memberships__team=team
+        ).aggregate(total=models.Sum("amount"))["total"]
+
+        Team.objects.filter(id=team.id).update(points=total or 0)
 
     def record_event_attendance(self, user: User, event: Event):
         """Record user's attendance for event."""
 
-        # member = self._get_user_membership(user)
-        member, _ = ClubMembership.objects.get_or_create(user=user, club=event.club)
+        attendance = EventAttendance.objects.upsert(event.id, self.obj.id, user.id)
 
-        if event.club.id != self.obj.id:
+        if attendance is None:
             raise exceptions.BadRequest(
                 f'Event "{event}" does not belong to club {self.obj}.'
             )
 
-        attendence, _ = EventAttendance.objects.get_or_create(
-            member=member, event=event
+        return attendance
+
+    def record_event_attendance_batch(
+        self, event: Event, users: list[str | int]
+    ) -> list[AttendanceRecordResult]:
+        """
+        Record attendance for many users at once, given their ids or emails.
+
+        Users that are not members of the club are added with the default role.
+        Runs the same number of queries regardless of how many users are given.
+
+        Parameters
+        ----------
+            - event (Event): Event belonging to this club.
+            - users (list[str | int]): User ids or emails, results are in same order.
+        """
+
+        if event.club_id != self.obj.id:
+            raise exceptions.BadRequest(
+                f'Event "{event}" does not belong to club {self.obj}.'
+            )
+
+        entries = [str(entry).strip() for entry in users]
+        ids = {int(entry) for entry in entries if entry.isdigit()}
+        emails = {entry.lower() for entry in entries if "@" in entry}
+
+        user_rows = (
+            User.objects.annotate(email_lower=Lower("email"))
+            .filter(models.Q(id__in=ids) | models.Q(email_lower__in=emails))
+            .values_list("id", "email_lower")
         )
-        return attendence
+        user_ids_by_entry: dict[str, int] = {}
+        for user_id, email in user_rows:
+            user_ids_by_entry[str(user_id)] = user_id
+            user_ids_by_entry[email] = user_id
+
+        user_ids = set(user_ids_by_entry.values())
+
+        with transaction.atomic():
+            existing_user_ids = set(
+                ClubMembership.objects.filter(
+                    club=self.obj, user__id__in=user_ids
+                ).values_list("user_id", flat=True)
+            )
+            new_user_ids = user_ids - existing_user_ids
+
+            if len(new_user_ids) > 0:
+                ClubMembership.objects.bulk_create(
+                    [
+                        ClubMembership(club=self.obj, user_id=user_id)
+                        for user_id in new_user_ids
+                    ],
+                    ignore_conflicts=True,
+                )
+
+            member_ids_by_user = dict(
+                ClubMembership.objects.filter(
+                    club=self.obj, user__id__in=user_ids
+                ).values_list("user_id", "id")
+            )
+
+            default_role_ids = ClubRole.objects.get_default_ids(self.obj.id)
+            if len(new_user_ids) > 0:
+                ClubMembership.roles.through.objects.bulk_create(
+                    [
+                        ClubMembership.roles.through(
+                            clubmembership_id=member_ids_by_user[user_id],
+                            clubrole_id=role_id,
+                        )
+                        for user_id in new_user_ids
+                        for role_id in default_role_ids
+                    ],
+                    ignore_conflicts=True,
+                )
+
+                # New members are not in the cached ranking
+                leaderboard = ClubLeaderboard(self.obj.id)
+                transaction.on_commit(leaderboard.clear)
+
+            attended_member_ids = set(
+                EventAttendance.objects.filter(
+                    event=event, member__id__in=member_ids_by_user.values()
+                ).values_list("member_id", flat=True)
+            )
+            EventAttendance.objects.bulk_create(
+                [
+                    EventAttendance(event=event, member_id=member_id)
+                    for member_id in member_ids_by_user.values()
+                    if member_id not in attended_member_ids
+                ],
+                ignore_conflicts=True,
+            )
+
+        results: list[AttendanceRecordResult] = []
+        for entry in entries:
+            user_id = user_ids_by_entry.get(entry.lower(), None)
+
+            if user_id is None:
+                status = AttendanceRecordStatus.NOT_FOUND
+            elif member_ids_by_user[user_id] in attended_member_ids:
+                status = AttendanceRecordStatus.ALREADY_RECORDED
+            else:
+                status = AttendanceRecordStatus.RECORDED
+
+            results.append({"user": entry, "user_id": user_id, "status": status})
+
+        return results
+
+    def apply_membership_batch(
+        self, operations: list[dict]
+    ) -> list[MembershipBatchResult]:
+        """
+        Create, update, and delete many memberships at once.
+
+        New members are given the club's default roles, and owners cannot be
+        deleted. Changes to points are recorded in the points ledger with the
+        reason "batch", and applied to the members' teams. Runs the same
+        number of queries regardless of how many operations are given.
+
+        Parameters
+        ----------
+            - operations (list[dict]): Each has an ``op``, and ``user_id`` to
+                create or membership ``id`` to update or delete. Creates and
+                updates can set ``points``. Results are in same order.
+        """
+
+        Op = MembershipBatchOperation
+        creates = [op for op in operations if op["op"] == Op.CREATE]
+        updates = [op for op in operations if op["op"] == Op.UPDATE]
+        deletes = [op for op in operations if op["op"] == Op.DELETE]
+
+        create_user_ids = {op["user_id"] for op in creates}
+        member_ids = {op["id"] for op in updates + deletes}
+
+        found_user_ids = set(
+            User.objects.filter(id__in=create_user_ids).values_list("id", flat=True)
+        )
+
+        with transaction.atomic():
+            # Locked, so balances don't change before the ledger is written
+            members = (
+                ClubMembership.objects.select_for_update()
+                .filter(club=self.obj)
+                .filter(
+                    models.Q(user__id__in=found_user_ids) | models.Q(id__in=member_ids)
+                )
+            )
+            user_ids_by_member = {}
+            owners_by_id = {}
+            balances = {}
+
+            for member_id, user_id, owner, points in members.values_list(
+                "id", "user_id", "owner", "points"
+            ):
+                user_ids_by_member[member_id] = user_id
+                owners_by_id[member_id] = owner
+                balances[member_id] = points
+
+            member_ids_by_user = {
+                user_id: member_id for member_id, user_id in user_ids_by_member.items()
+            }
+            existing_user_ids = set(member_ids_by_user.keys())
+            new_user_ids = found_user_ids - existing_user_ids
+            new_points = {
+                op["user_id"]: op.get("points", 0)
+                for op in creates
+                if op["user_id"] in new_user_ids
+            }
+
+            if len(new_user_ids) > 0:
+                ClubMembership.objects.bulk_create(
+                    [
+                        ClubMembership(club=self.obj, user_id=user_id, points=points)
+                        for user_id, points in new_points.items()
+                    ],
+                    ignore_conflicts=True,
+                )
+
+                member_ids_by_user.update(
+                    ClubMembership.objects.filter(
+                        club=self.obj, user__id__in=new_user_ids
+                    ).values_list("user_id", "id")
+                )
+
+                default_role_ids = ClubRole.objects.get_default_ids(self.obj.id)
+                ClubMembership.roles.through.objects.bulk_create(
+                    [
+                        ClubMembership.roles.through(
+                            clubmembership_id=member_ids_by_user[user_id],
+                            clubrole_id=role_id,
+                        )
+                        for user_id in new_user_ids
+                        for role_id in default_role_ids
+                    ],
+                    ignore_conflicts=True,
+                )
+
+            # Ledger entries for new members' points, then each update in order
+            entries = [
+                PointsTransaction(
+                    club=self.obj,
+                    member_id=member_ids_by_user[user_id],
+                    amount=points,
+                    balance=points,
+                    reason="batch",
+                )
+                for user_id, points in new_points.items()
+                if points != 0
+            ]
+
+            for op in updates:
+                if op["id"] not in owners_by_id or "points" not in op:
+                    continue
+
+                amount = op["points"] - balances[op["id"]]
+                balances[op["id"]] = op["points"]
+
+                if amount != 0:
+                    entries.append(
+                        PointsTransaction(
+                            club=self.obj,
+                            member_id=op["id"],
+                            amount=amount,
+                            balance=op["points"],
+                            reason="batch",
+                        )
+                    )
+
+            now = datetime.now(timezone.utc)
+            updated = [
+                ClubMembership(id=op["id"], points=op["points"], updated_at=now)
+                for op in updates
+                if op["id"] in owners_by_id and "points" in op
+            ]
+            if len(updated) > 0:
+                ClubMembership.objects.bulk_update(updated, ["points", "updated_at"])
+
+            if len(entries) > 0:
+                PointsTransaction.objects.bulk_create(entries)
+
+                user_ids = {
+                    **user_ids_by_member,
+                    **{
+                        member_id: user_id
+                        for user_id, member_id in member_ids_by_user.items()
+                    },
+                }
+                amounts = {}
+                for entry in entries:
+                    user_id = user_ids[entry.member_id]
+                    amounts[user_id] = amounts.get(user_id, 0) + entry.amount
+
+                self._add_team_points(amounts)
+
+            deleted_ids = [
+                op["id"]
+                for op in deletes
+                if op["id"] in owners_by_id and not owners_by_id[op["id"]]
+            ]
+            if len(deleted_ids) > 0:
+                ClubMembership.objects.filter(id__in=deleted_ids).delete()
+
+            # Bulk queries do not send signals, rebuild ranking once
+            if len(new_user_ids) > 0 or len(updated) > 0:
+                leaderboard = ClubLeaderboard(self.obj.id)
+                transaction.on_commit(leaderboard.clear)
+
+        results: list[MembershipBatchResult] = []
+        for op in operations:
+            member_id = op.get("id", None)
+            user_id = op.get("user_id", None)
+
+            if op["op"] == Op.CREATE:
+                member_id = member_ids_by_user.get(user_id, None)
+
+                if user_id not in found_user_ids:
+                    status = MembershipBatchStatus.NOT_FOUND
+                elif user_id in existing_user_ids:
+                    status = MembershipBatchStatus.ALREADY_MEMBER
+                else:
+                    status = MembershipBatchStatus.CREATED
+            else:
+                user_id = user_ids_by_member.get(member_id, None)
+
+                if member_id not in owners_by_id:
+                    status = MembershipBatchStatus.NOT_FOUND
+                elif op["op"] == Op.UPDATE:
+                    status = MembershipBatchStatus.UPDATED
+                elif owners_by_id[member_id]:
+                    status = MembershipBatchStatus.IS_OWNER
+                else:
+                    status = MembershipBatchStatus.DELETED
+
+            results.append(
+                {"op": op["op"], "id": member_id, "user_id": user_id, "status": status}
+            )
+
+        return results
 
     def get_member_attendance(self, user: User):
         """Get event attendance for user, if they are member."""
@@ -156,8 +604,14 @@ class ClubService(ServiceBase[Club]):
         event_end_time: time,
         location: Optional[str] = None,
         description: Optional[str] = None,
+        skip_dates: Optional[list[date]] = None,
     ):
-        """Create new recurring club event, trigger signal for syncing event."""
+        """
+        Create new recurring club event.
+
+        Occurrences are not stored as events until needed,
+        see ``RecurringEventService``.
+        """
 
         return RecurringEvent.objects.create(
             name=name,
@@ -169,8 +623,47 @@ class ClubService(ServiceBase[Club]):
             event_end_time=event_end_time,
             location=location,
             description=description,
+            skip_dates=skip_dates or [],
+        )
+
+    def get_occurrences(self, start: datetime, end: datetime) -> list[Event]:
+        """
+        Get club's events during time range, including recurring event occurrences.
+
+        Occurrences that are not stored yet are returned as unsaved events.
+        """
+
+        events = list(
+            Event.objects.filter_in_range(
+                start, end, club_ids=[self.obj.id], include_other_clubs=False
+            ).filter(recurring_event__isnull=True)
         )
 
+        series = list(
+            self.obj.recurring_events.filter(
+                models.Q(end_date__isnull=True) | models.Q(end_date__gte=start.date()),
+                start_date__lte=end.date(),
+            )
+        )
+        stored = Event.objects.filter(
+            recurring_event__in=series,
+            occurrence_date__range=(start.date(), end.date()),
+        )
+        stored_by_series: dict[int, dict[date, Event]] = {}
+        for event in stored:
+            stored_by_series.setdefault(event.recurring_event_id, {})[
+                event.occurrence_date
+            ] = event
+
+        for rec_ev in series:
+            events.extend(
+                RecurringEventService(rec_ev).get_occurrences(
+                    start, end, stored=stored_by_series.get(rec_ev.id, {})
+                )
+            )
+
+        return sorted(events, key=lambda event: event.start_at)
+
     def create_calendar(self, name: str):
         cal = icalendar.Calendar()
         cal.add("PRODID", "-//CSU Portal//UF CSU//EN")
@@ -194,6 +687,29 @@ class ClubService(ServiceBase[Club]):
             e.add("LOCATION", event.location)
         return e
 
+    def add_calendar_recurrence(
+        self, e: "icalendar.Event", rec_ev: RecurringEvent, tz: ZoneInfo
+    ):
+        """Repeat calendar event weekly, leaving out skipped dates."""
+
+        days = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+        options = {
+            "FREQ": "WEEKLY",
+            "INTERVAL": 1,
+            "BYDAY": days[rec_ev.day],
+        }
+        if rec_ev.end_date is not None:
+            until = datetime.combine(rec_ev.end_date, datetime.min.time())
+            aware_until = until.replace(tzinfo=tz)
+            options["UNTIL"] = aware_until
+
+        e.add("RRULE", options)
+        e.add("UID", f"recurring-event-{rec_ev.id}@{self.calendar_domain}")
+
+        rec_svc = RecurringEventService(rec_ev)
+        for skip_date in rec_ev.skip_dates:
+            e.add("EXDATE", rec_svc.get_occurrence_start(skip_date).replace(tzinfo=tz))
+
     def get_event_calendar(self, event: Event):
         """Generates an ICS file for an event."""
         if event.club.id != self.obj.id:
@@ -213,20 +729,7 @@ class ClubService(ServiceBase[Club]):
 
         # Add recurring event
         if event.recurring_event is not None:
-            days = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
-            options = {
-                "FREQ": "WEEKLY",
-                "INTERVAL": 1,
-                "BYDAY": days[event.recurring_event.day],
-            }
-            if event.recurring_event.end_date is not None:
-                until = datetime.combine(
-                    event.recurring_event.end_date, datetime.min.time()
-                )
-                aware_until = until.replace(tzinfo=local_tz)
-                options["UNTIL"] = aware_until
-
-            e.add("RRULE", options)
+            self.add_calendar_recurrence(e, event.recurring_event, local_tz)
 
         cal.add_component(e)
 
@@ -245,12 +748,37 @@ class ClubService(ServiceBase[Club]):
         # Configure timezone
         local_tz = ZoneInfo("America/New_York")
 
-        # Get all events that start later than today
+        # Get club's events that have not ended yet
         now = datetime.now().replace(tzinfo=local_tz)
-        query = Event.objects.filter(start_at__gt=now)
+        query = Event.objects.filter_in_range(start=now, club_ids=[self.obj.id])
 
-        for event in query:
+        for event in query.select_related("club", "recurring_event"):
             e = self.create_calendar_event(event, local_tz)
+
+            # Changed occurrence of a recurring event
+            if event.recurring_event is not None and event.occurrence_date:
+                rec_ev = event.recurring_event
+                e.add("UID", f"recurring-event-{rec_ev.id}@{self.calendar_domain}")
+                e.add(
+                    "RECURRENCE-ID",
+                    RecurringEventService(rec_ev)
+                    .get_occurrence_start(event.occurrence_date)
+                    .replace(tzinfo=local_tz),
+                )
+
+            cal.add_component(e)
+
+        # Add each recurring event once, calendar apps expand occurrences
+        series = self.obj.recurring_events.filter(
+            models.Q(end_date__isnull=True) | models.Q(end_date__gte=now.date())
+        )
+        for rec_ev in series:
+            occurrence = RecurringEventService(rec_ev).get_first_occurrence()
+            if occurrence is None:
+                continue
+
+            e = self.create_calendar_event(occurrence, local_tz)
+            self.add_calendar_recurrence(e, rec_ev, local_tz)
             cal.add_component(e)
 
         cal.add_missing_timezones()
@@ -260,9 +788,47 @@ class ClubService(ServiceBase[Club]):
         return buffer
 
     def get_attendance_url(self, event: Event):
-        """Visiting this link will register a user for an event."""
+        """
+        Visiting this link will register a user for an event.
+
+        Occurrences of recurring events that are not stored yet link to the
+        occurrence instead, which is stored when the first member checks in.
+        """
+
+        if event.id is None and event.recurring_event_id is not None:
+            path = reverse(
+                "clubs:join-occurrence",
+                kwargs={
+                    "club_id": self.obj.id,
+                    "recurring_event_id": event.recurring_event_id,
+                    "occurrence_date": event.occurrence_date.isoformat(),
+                },
+            )
+        else:
+            path = reverse(
+                "clubs:join-event",
+                kwargs={"club_id": self.obj.id, "event_id": event.id},
+            )
+
+        return get_full_url(path)
+
+    def get_occurrence_event(
+        self, recurring_event_id: int, occurrence_date: date
+    ) -> Event:
+        """
+        Get event for an occurrence of a club's recurring event, storing it if needed.
+
+        Stored events get an attendance link and QR code, so members can check in.
+        """
+
+        rec_ev = self.obj.recurring_events.filter(id=recurring_event_id).first()
 
-        return reverse("clubs:join-event", event_id=event.id)
+        if rec_ev is None:
+            raise exceptions.BadRequest(
+                f"Recurring event {recurring_event_id} is not part of club {self.obj}."
+            )
+
+        return RecurringEventService(rec_ev).materialize(occurrence_date)
 
     def send_email_invite(self, emails: list[str]):
         """Send email invite to list of emails."""
@@ -286,65 +852,223 @@ class ClubService(ServiceBase[Club]):
     @classmethod
     def sync_recurring_event(cls, rec_ev: RecurringEvent):
         """
-        Sync all events for recurring event template.
+        Sync stored events for recurring event template.
+
+        Occurrences are only stored as events when something is attached
+        to them, see ``RecurringEventService.sync_events``.
+        """
+
+        return RecurringEventService(rec_ev).sync_events()
+
+
+class RecurringEventService(ServiceBase[RecurringEvent]):
+    """
+    Expand recurring events into occurrences.
+
+    Occurrences are calculated for the requested time range, and only
+    stored as an ``Event`` when something needs to reference them, like
+    attendance, a link, or a changed description. Stored events override
+    the calculated occurrence for their ``occurrence_date``.
+    """
+
+    model = RecurringEvent
+
+    def get_occurrence_dates(
+        self, start: Optional[date] = None, end: Optional[date] = None
+    ) -> list[date]:
+        """
+        Get dates of occurrences in range, limited to the series start and end.
+
+        Open ended series require an end date.
+        """
+
+        start = max(start, self.obj.start_date) if start else self.obj.start_date
+        end = min(end, self.obj.end_date) if end and self.obj.end_date else end
+
+        if end is None:
+            end = self.obj.end_date
+
+        if end is None:
+            raise exceptions.BadRequest(
+                "Recurring event has no end date, a range end is required."
+            )
+
+        return to_dates(
+            get_weekday_dates(start, end, self.obj.day, self.obj.skip_dates)
+        )
 
-        Will remove all excess events outside of start/end dates,
-        and will create events if missing on a certain day.
+    def get_occurrence_start(self, occurrence_date: date) -> datetime:
+        return datetime.combine(
+            occurrence_date, self.obj.event_start_time or time.min, tzinfo=timezone.utc
+        )
+
+    def get_occurrence_end(self, occurrence_date: date) -> Optional[datetime]:
+        if self.obj.event_end_time is None:
+            return None
+
+        return datetime.combine(
+            occurrence_date, self.obj.event_end_time, tzinfo=timezone.utc
+        )
 
-        Date filter docs:
-        https://docs.djangoproject.com/en/dev/ref/models/querysets/#week-day
+    def build_occurrence(self, occurrence_date: date) -> Event:
+        """Create unsaved event for occurrence."""
+
+        return Event(
+            club=self.obj.club,
+            name=self.obj.name,
+            description=self.obj.description,
+            location=self.obj.location,
+            start_at=self.get_occurrence_start(occurrence_date),
+            end_at=self.get_occurrence_end(occurrence_date),
+            recurring_event=self.obj,
+            occurrence_date=occurrence_date,
+        )
+
+    def get_occurrences(
+        self,
+        start: datetime,
+        end: datetime,
+        stored: Optional[dict[date, Event]] = None,
+    ) -> list[Event]:
+        """
+        Get occurrences during time range, stored events replace calculated ones.
+
+        Parameters
+        ----------
+            - start (datetime): Start of range.
+            - end (datetime): End of range.
+            - stored (dict[date, Event]): Stored events by occurrence date,
+                queried if not given.
         """
-        event_count = rec_ev.expected_event_count + 2  # Buffer before/after
 
-        # Remove extra events
-        # Get all dates assigned to recurring,
-        # delete if they don't overlap with the start/end dates
-        range_start = datetime.combine(rec_ev.start_date, rec_ev.event_start_time)
-        range_end = datetime.combine(rec_ev.end_date, rec_ev.event_start_time)
+        dates = self.get_occurrence_dates(start.date(), end.date())
+
+        if stored is None:
+            stored = {
+                event.occurrence_date: event
+                for event in self.obj.events.filter(occurrence_date__in=dates)
+            }
+
+        occurrences = [stored.get(d, None) or self.build_occurrence(d) for d in dates]
+
+        return [
+            event
+            for event in occurrences
+            if event.start_at <= end and (event.end_at or event.start_at) >= start
+        ]
+
+    def get_first_occurrence(self) -> Optional[Event]:
+        """Get first occurrence of series, or None if there are none."""
+
+        first_week_end = self.obj.start_date + timedelta(days=6)
+        if self.obj.end_date is not None:
+            first_week_end = min(first_week_end, self.obj.end_date)
+
+        dates = to_dates(
+            get_weekday_dates(self.obj.start_date, first_week_end, self.obj.day)
+        )
+        if len(dates) == 0:
+            return None
+
+        return self.build_occurrence(dates[0])
 
-        # Django filter starts at Sun=1, python starts Mon=0
-        query_day = rec_ev.day + 2 if rec_ev.day > 0 else 6
+    def is_occurrence(self, occurrence_date: date) -> bool:
+        """Check if the series happens on date."""
 
-        query = rec_ev.events.filter(
-            ~models.Q(start_at__date__range=(range_start, range_end))
-            | ~models.Q(start_at__week_day=query_day)
+        return occurrence_date in self.get_occurrence_dates(
+            occurrence_date, occurrence_date
         )
-        query.delete()
-
-        # Create missing events
-        for i in range(event_count):
-            # Equalize date to monday (0), set to target day, set to target week (i)
-            event_date = (
-                (rec_ev.start_date - timedelta(days=rec_ev.start_date.weekday()))
-                + timedelta(days=rec_ev.day)
-                + timedelta(weeks=i)
+
+    def materialize(self, occurrence_date: date, **overrides) -> Event:
+        """
+        Store occurrence as an event, so other objects can reference it.
+
+        Parameters
+        ----------
+            - occurrence_date (date): Date of occurrence.
+            - overrides (dict): Fields to change for this occurrence only.
+        """
+
+        if not self.is_occurrence(occurrence_date):
+            raise exceptions.BadRequest(
+                f"Recurring event {self.obj} does not happen on {occurrence_date}."
             )
 
-            if event_date < rec_ev.start_date or event_date > rec_ev.end_date:
-                continue
+        occurrence = self.build_occurrence(occurrence_date)
+        defaults = {
+            field: getattr(occurrence, field)
+            for field in ("club", "name", "description", "location", "start_at")
+        }
+        defaults["end_at"] = occurrence.end_at
+
+        event, created = Event.objects.get_or_create(
+            recurring_event=self.obj,
+            occurrence_date=occurrence_date,
+            defaults={**defaults, **overrides},
+        )
+
+        if not created and overrides:
+            for field, value in overrides.items():
+                setattr(event, field, value)
+
+            event.save()
+
+        return event
 
-            event_start = datetime.combine(
-                event_date, rec_ev.event_start_time, tzinfo=timezone.utc
+    def sync_events(self):
+        """
+        Update stored events after the recurring event changes.
+
+        Events that are no longer part of the series are removed, unless
+        attendance was recorded for them. Shared fields are copied to the
+        rest, descriptions are only set if missing.
+        """
+
+        events = list(self.obj.events.all())
+        if len(events) == 0:
+            return
+
+        stored_dates = [
+            event.occurrence_date or event.start_at.date() for event in events
+        ]
+        valid_dates = set(
+            to_dates(
+                get_weekday_dates(
+                    min(stored_dates),
+                    max(stored_dates),
+                    self.obj.day,
+                    self.obj.skip_dates,
+                )
             )
-            event_end = datetime.combine(
-                event_date, rec_ev.event_end_time, tzinfo=timezone.utc
+        )
+
+        attended_ids = set(
+            EventAttendance.objects.filter(event__in=events).values_list(
+                "event_id", flat=True
             )
+        )
 
-            # These fields must all be unique together
-            event, _ = Event.objects.update_or_create(
-                name=rec_ev.name,
-                club=rec_ev.club,
-                start_at=event_start,
-                end_at=event_end,
-                recurring_event=rec_ev,
+        for event, occurrence_date in zip(events, stored_dates):
+            in_series = occurrence_date in valid_dates and (
+                occurrence_date >= self.obj.start_date
+                and (self.obj.end_date is None or occurrence_date <= self.obj.end_date)
             )
 
-            # Set other fields
-            event.location = rec_ev.location
+            if not in_series:
+                if event.id not in attended_ids:
+                    event.delete()
+
+                continue
+
+            event.occurrence_date = occurrence_date
+            event.start_at = self.get_occurrence_start(occurrence_date)
+            event.end_at = self.get_occurrence_end(occurrence_date)
+            event.name = self.obj.name
+            event.location = self.obj.location
 
             # Only add description if not exists
             # Doesn't override custom description for existing events
             if event.description is None:
-                event.description = rec_ev.description
+                event.description = self.obj.description
 
             event.save()
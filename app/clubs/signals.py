@@ -1,22 +1,23 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from clubs.catalog import bump_catalog_version
 from clubs.consts import INITIAL_CLUB_ROLES
-from clubs.models import Club, ClubRole, Event, EventAttendanceLink, RecurringEvent
+from clubs.leaderboard import ClubLeaderboard
+from clubs.models import (
+    Club,
+    ClubMembership,
+    ClubRole,
+    ClubSocialProfile,
+    ClubTag,
+    Event,
+    EventAttendanceLink,
+    TeamMembership,
+)
 from clubs.services import ClubService
 
 
-@receiver(post_save, sender=RecurringEvent)
-def on_save_recurring_event(sender, instance: RecurringEvent, created=False, **kwargs):
-    """Automations to run when a recurring event is saved."""
-
-    if not created:
-        # Only proceed if model is being saved for first time
-        return
-
-    ClubService.sync_recurring_event(instance)
-
-
 @receiver(post_save, sender=Event)
 def on_save_event(sender, instance: Event, created=False, **kwargs):
     """Automations to run when event is saved."""
@@ -45,3 +46,54 @@ def on_save_club(sender, instance: Club, created=False, **kwargs):
             default=role["default"],
             perm_labels=role["permissions"],
         )
+
+
+@receiver(post_save, sender=Club)
+@receiver(post_delete, sender=Club)
+@receiver(post_save, sender=ClubTag)
+@receiver(post_delete, sender=ClubTag)
+@receiver(post_save, sender=ClubSocialProfile)
+@receiver(post_delete, sender=ClubSocialProfile)
+def on_change_club_catalog(sender, **kwargs):
+    """Public pages listing clubs may have changed, stop using cached pages."""
+
+    bump_catalog_version()
+
+
+@receiver(m2m_changed, sender=Club.tags.through)
+def on_change_club_tags(sender, action: str, **kwargs):
+    """Tags shown on public pages may have changed."""
+
+    if action.startswith("post_"):
+        bump_catalog_version()
+
+
+@receiver(post_save, sender=ClubRole)
+@receiver(post_delete, sender=ClubRole)
+def on_change_club_role(sender, instance: ClubRole, **kwargs):
+    """Default role for club may have changed, clear cached value."""
+
+    ClubRole.objects.clear_default_ids_cache(instance.club_id)
+
+
+@receiver(post_save, sender=ClubMembership)
+@receiver(post_delete, sender=ClubMembership)
+def on_change_club_membership(
+    sender, instance: ClubMembership, created=False, **kwargs
+):
+    """Points may have been changed outside of ledger, rebuild leaderboard."""
+
+    leaderboard = ClubLeaderboard(instance.club_id)
+
+    if created:
+        transaction.on_commit(lambda: leaderboard.update(instance.id))
+    else:
+        leaderboard.clear()
+
+
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+def on_change_team_membership(sender, instance: TeamMembership, **kwargs):
+    """Team points are the sum of its members' points transactions."""
+
+    ClubService.sync_team_points(instance.team)
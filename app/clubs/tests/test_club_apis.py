@@ -2,16 +2,35 @@
 Unit tests focused around REST APIs for the Clubs Service.
 """
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from clubs.tests.utils import create_test_club
+from clubs.models import (
+    ClubMembership,
+    ClubRole,
+    EventAttendance,
+    PointsTransaction,
+    TeamMembership,
+)
+from clubs.services import ClubService
+from clubs.tests.utils import create_test_club, create_test_event, create_test_team
 from core.abstracts.tests import ApiTestsBase, AuthApiTestsBase, EmailTestsBase
 from lib.faker import fake
+from users.tests.utils import create_test_user
 
 
 def get_club_invite_url(club_id: int):
     return reverse("api-clubs:invite", args=[club_id])
 
 
+def get_club_attendance_url(club_id: int):
+    return reverse("api-clubs:attendance", args=[club_id])
+
+
+def get_club_members_batch_url(club_id: int):
+    return reverse("api-clubs:club-members-batch", args=[club_id])
+
+
 class ClubsApiPublicTests(ApiTestsBase):
     """Tests for public routes on clubs api."""
 
@@ -43,3 +62,458 @@ class ClubsApiPrivateTests(AuthApiTestsBase, EmailTestsBase):
         res = self.client.post(url, payload)
         self.assertResAccepted(res)
         self.assertEmailsSent(email_count)
+
+    def test_record_attendance_batch_api(self):
+        """Should record attendance for many users, creating memberships."""
+
+        club = create_test_club()
+        event = create_test_event(club)
+        url = get_club_attendance_url(club.id)
+
+        member = create_test_user(email="member@example.com")
+        club.memberships.create(user=member)
+        attended = create_test_user(email="attended@example.com")
+        EventAttendance.objects.create(
+            event=event, member=ClubMembership.objects.create(club=club, user=attended)
+        )
+        guest = create_test_user(email="guest@example.com")
+
+        payload = {
+            "event": event.id,
+            "users": [
+                str(member.id),
+                "ATTENDED@example.com",
+                "guest@example.com",
+                "unknown@example.com",
+            ],
+        }
+        res = self.client.post(url, payload, format="json")
+        self.assertResOk(res)
+
+        statuses = [result["status"] for result in res.json()]
+        self.assertEqual(
+            statuses, ["recorded", "already_recorded", "recorded", "not_found"]
+        )
+
+        self.assertEqual(EventAttendance.objects.filter(event=event).count(), 3)
+        guest_member = ClubMembership.objects.get(club=club, user=guest)
+        self.assertEqual(
+            list(guest_member.roles.values_list("name", flat=True)), ["Member"]
+        )
+
+    def test_record_attendance_batch_query_count(self):
+        """Number of queries should not depend on number of users."""
+
+        club = create_test_club()
+        event = create_test_event(club)
+        url = get_club_attendance_url(club.id)
+
+        users = [create_test_user(email=f"user{i}@example.com") for i in range(40)]
+        ClubRole.objects.get_default_ids(club.id)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            payload = {"event": event.id, "users": [u.email for u in users[:4]]}
+            self.client.post(url, payload, format="json")
+
+        with CaptureQueriesContext(connection) as large_queries:
+            payload = {"event": event.id, "users": [u.email for u in users[4:]]}
+            self.client.post(url, payload, format="json")
+
+        self.assertEqual(EventAttendance.objects.filter(event=event).count(), 40)
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_club_members_batch_api(self):
+        """Should create, update, and delete many memberships at once."""
+
+        club = create_test_club()
+        service = ClubService(club)
+        url = get_club_members_batch_url(club.id)
+
+        owner = ClubMembership.objects.create(
+            club=club, user=create_test_user(), owner=True
+        )
+        existing = service.add_member(create_test_user())
+        removed = service.add_member(create_test_user())
+        new_user = create_test_user()
+
+        payload = {
+            "operations": [
+                {"op": "create", "user_id": new_user.id, "points": 5},
+                {"op": "create", "user_id": existing.user.id},
+                {"op": "create", "user_id": 0},
+                {"op": "update", "id": existing.id, "points": 3},
+                {"op": "delete", "id": removed.id},
+                {"op": "delete", "id": owner.id},
+                {"op": "delete", "id": 0},
+            ]
+        }
+        res = self.client.post(url, payload, format="json")
+        self.assertResOk(res)
+
+        statuses = [result["status"] for result in res.json()]
+        self.assertEqual(
+            statuses,
+            [
+                "created",
+                "already_member",
+                "not_found",
+                "updated",
+                "deleted",
+                "is_owner",
+                "not_found",
+            ],
+        )
+
+        new_member = ClubMembership.objects.get(club=club, user=new_user)
+        self.assertEqual(res.json()[0]["id"], new_member.id)
+        self.assertEqual(new_member.points, 5)
+        self.assertEqual(
+            list(new_member.roles.values_list("name", flat=True)), ["Member"]
+        )
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.points, 3)
+        self.assertFalse(ClubMembership.objects.filter(id=removed.id).exists())
+        self.assertTrue(ClubMembership.objects.filter(id=owner.id).exists())
+
+    def test_club_members_batch_points_ledger(self):
+        """Should record batch changes to points in the ledger and teams."""
+
+        club = create_test_club()
+        service = ClubService(club)
+        team = create_test_team(club)
+        url = get_club_members_batch_url(club.id)
+
+        member = service.add_member(create_test_user())
+        service.increase_member_points(member.user, 10)
+        new_user = create_test_user()
+
+        TeamMembership.objects.create(team=team, user=member.user)
+        service.sync_team_points(team)
+
+        payload = {
+            "operations": [
+                {"op": "create", "user_id": new_user.id, "points": 5},
+                {"op": "update", "id": member.id, "points": 4},
+            ]
+        }
+        self.assertResOk(self.client.post(url, payload, format="json"))
+
+        new_member = ClubMembership.objects.get(club=club, user=new_user)
+        entries = PointsTransaction.objects.filter(reason="batch").order_by("id")
+        self.assertEqual(
+            list(entries.values_list("member_id", "amount", "balance")),
+            [(new_member.id, 5, 5), (member.id, -6, 4)],
+        )
+
+        team.refresh_from_db()
+        self.assertEqual(team.points, 4)
+
+        # Ledger and team totals match member balances
+        service.sync_team_points(team)
+        team.refresh_from_db()
+        self.assertEqual(team.points, 4)
+
+    def test_club_members_batch_invalid(self):
+        """Should not apply any operations if one is invalid."""
+
+        club = create_test_club()
+        member = ClubService(club).add_member(create_test_user())
+        url = get_club_members_batch_url(club.id)
+
+        payloads = [
+            {"operations": []},
+            {"operations": [{"op": "update", "id": member.id}]},
+            {
+                "operations": [
+                    {"op": "create", "user_id": create_test_user().id},
+                    {"op": "update", "id": member.id, "points": 1},
+                    {"op": "delete", "id": member.id},
+                ]
+            },
+        ]
+
+        for payload in payloads:
+            res = self.client.post(url, payload, format="json")
+            self.assertEqual(res.status_code, 400)
+
+        self.assertEqual(ClubMembership.objects.filter(club=club).count(), 1)
+
+    def test_club_members_batch_query_count(self):
+        """Number of queries should not depend on number of operations."""
+
+        club = create_test_club()
+        service = ClubService(club)
+        url = get_club_members_batch_url(club.id)
+
+        payload = {}
+
+        def create_operations(count):
+            new_users = [create_test_user() for _ in range(count)]
+            members = [service.add_member(create_test_user()) for _ in range(count)]
+            half = len(members) // 2
+
+            payload["operations"] = [
+                *[{"op": "create", "user_id": user.id} for user in new_users],
+                *[
+                    {"op": "update", "id": member.id, "points": 1}
+                    for member in members[:half]
+                ],
+                *[{"op": "delete", "id": member.id} for member in members[half:]],
+            ]
+
+        ClubRole.objects.get_default_ids(club.id)
+
+        self.assertQueriesConstant(
+            lambda: self.assertResOk(self.client.post(url, payload, format="json")),
+            create_operations,
+        )
+        self.assertEqual(ClubMembership.objects.filter(club=club).count(), 15)
+
+    def test_record_attendance_batch_other_club(self):
+        """Should not record attendance for events of another club."""
+
+        club = create_test_club()
+        event = create_test_event(create_test_club())
+        user = create_test_user()
+
+        payload = {"event": event.id, "users": [user.email]}
+        res = self.client.post(get_club_attendance_url(club.id), payload, format="json")
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(EventAttendance.objects.count(), 0)
+
+    def test_club_leaderboard_api(self):
+        """Should list members ranked by points."""
+
+        club = create_test_club()
+        service = ClubService(club)
+        service.add_member(self.user)
+        other_user = create_test_user()
+        service.add_member(other_user)
+        service.increase_member_points(other_user, 3)
+
+        url = reverse("api-clubs:club-leaderboard", args=[club.id])
+        res = self.client.get(url, {"count": 1})
+        self.assertResOk(res)
+
+        data = res.json()
+        self.assertEqual(len(data["entries"]), 1)
+        self.assertEqual(data["entries"][0]["points"], 3)
+        self.assertEqual(data["user"]["rank"], 2)
+
+    def test_club_list_query_count(self):
+        """Listing clubs should not query members of each club separately."""
+
+        url = reverse("api-clubs:club-list")
+
+        def create_clubs(count: int):
+            for _ in range(count):
+                ClubService(create_test_club()).add_member(create_test_user())
+
+        self.assertQueriesConstant(
+            lambda: self.assertResOk(self.client.get(url)), create_clubs
+        )
+
+    def test_club_members_list_query_count(self):
+        """Listing members should not query users separately."""
+
+        club = create_test_club()
+        service = ClubService(club)
+        url = reverse("api-clubs:club-members-list", args=[club.id])
+
+        self.assertQueriesConstant(
+            lambda: self.assertResOk(self.client.get(url)),
+            lambda count: [
+                service.add_member(create_test_user()) for _ in range(count)
+            ],
+        )
+
+    def test_club_detail_conditional(self):
+        """Should not send club again if it has not changed."""
+
+        club = create_test_club()
+        url = reverse("api-clubs:club-detail", args=[club.id])
+
+        res = self.client.get(url)
+        self.assertResOk(res)
+        etag = res.headers["ETag"]
+        self.assertIn("Last-Modified", res.headers)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers["ETag"], etag)
+
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=res.headers["Last-Modified"])
+        self.assertEqual(res.status_code, 304)
+
+        club.name = "Updated Club"
+        club.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertResOk(res)
+        self.assertNotEqual(res.headers["ETag"], etag)
+
+    def test_club_detail_conditional_members(self):
+        """Should send club again when its members change."""
+
+        club = create_test_club()
+        service = ClubService(club)
+        url = reverse("api-clubs:club-detail", args=[club.id]) + "?expand=members"
+
+        etag = self.client.get(url).headers["ETag"]
+        service.add_member(self.user)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertResOk(res)
+        self.assertEqual(len(res.json()["members"]), 1)
+        etag = res.headers["ETag"]
+
+        service.increase_member_points(self.user, 5)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertResOk(res)
+        self.assertEqual(res.json()["members"][0]["points"], 5)
+        etag = res.headers["ETag"]
+
+        ClubMembership.objects.filter(club=club).delete()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertResOk(res)
+        self.assertEqual(res.json()["members"], [])
+
+        list_url = reverse("api-clubs:club-list")
+        etag = self.client.get(list_url).headers["ETag"]
+        service.add_member(self.user)
+
+        res = self.client.get(list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertResOk(res)
+
+    def test_club_list_conditional(self):
+        """Should send list again when clubs are added or changed."""
+
+        create_test_club()
+        url = reverse("api-clubs:club-list")
+
+        etag = self.client.get(url).headers["ETag"]
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        create_test_club()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertResOk(res)
+        self.assertNotEqual(res.headers["ETag"], etag)
+
+    def test_club_update_if_match(self):
+        """Should not update club if it changed since the client fetched it."""
+
+        club = create_test_club()
+        url = reverse("api-clubs:club-detail", args=[club.id])
+        etag = self.client.get(url).headers["ETag"]
+
+        res = self.client.patch(url, {"name": "First"}, HTTP_IF_MATCH=etag)
+        self.assertResOk(res)
+        self.assertNotEqual(res.headers["ETag"], etag)
+
+        # Second client still has the old version
+        res = self.client.patch(url, {"name": "Second"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, 412)
+
+        res = self.client.delete(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, 412)
+
+        club.refresh_from_db()
+        self.assertEqual(club.name, "First")
+
+    def test_club_update_if_match_locks(self):
+        """Should lock club while checking If-Match, so concurrent writes fail."""
+
+        club = create_test_club()
+        url = reverse("api-clubs:club-detail", args=[club.id])
+        etag = self.client.get(url).headers["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(url, {"name": "First"}, HTTP_IF_MATCH=etag)
+
+        self.assertResOk(res)
+        self.assertTrue(any("FOR UPDATE" in query["sql"] for query in queries))
+
+    def test_club_list_paginated(self):
+        """Should list clubs in pages, following the next link."""
+
+        clubs = [create_test_club() for _ in range(3)]
+        url = reverse("api-clubs:club-list")
+
+        res = self.client.get(url, {"page_size": 2})
+        self.assertResOk(res)
+        data = res.json()
+        self.assertLength(data["results"], 2)
+        self.assertIsNotNone(data["next"])
+
+        data = self.client.get(data["next"]).json()
+        self.assertLength(data["results"], 1)
+        self.assertIsNone(data["next"])
+        self.assertEqual(data["results"][0]["id"], clubs[-1].id)
+
+    def test_club_list_sparse_fields(self):
+        """Should only show and query the requested fields."""
+
+        create_test_club()
+        url = reverse("api-clubs:club-list")
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {"fields": "id,name"})
+
+        self.assertResOk(res)
+        self.assertEqual(set(res.json()["results"][0].keys()), {"id", "name"})
+
+        select = next(q["sql"] for q in queries if "LIMIT" in q["sql"])
+        self.assertNotIn('"logo"', select)
+
+    def test_club_list_expand_members(self):
+        """Members should only be shown, and prefetched, when expanded."""
+
+        club = create_test_club()
+        service = ClubService(club)
+        service.add_member(self.user)
+        service.increase_member_points(self.user, 2)
+        url = reverse("api-clubs:club-list")
+
+        res = self.client.get(url)
+        self.assertNotIn("members", res.json()["results"][0])
+
+        res = self.client.get(url, {"expand": "members"})
+        members = res.json()["results"][0]["members"]
+        self.assertEqual(members[0]["username"], self.user.username)
+        self.assertEqual(members[0]["points"], 2)
+
+        res = self.client.get(url, {"fields": "id,members.username"})
+        self.assertEqual(
+            res.json()["results"][0],
+            {"id": club.id, "members": [{"username": self.user.username}]},
+        )
+
+        self.assertQueriesConstant(
+            lambda: self.assertResOk(self.client.get(url, {"expand": "members"})),
+            lambda count: [
+                ClubService(create_test_club()).add_member(create_test_user())
+                for _ in range(count)
+            ],
+        )
+
+    def test_club_members_sparse_fields(self):
+        """Should not join users if no user fields are requested."""
+
+        club = create_test_club()
+        ClubService(club).add_member(self.user)
+        url = reverse("api-clubs:club-members-list", args=[club.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {"fields": "id,points"})
+
+        self.assertResOk(res)
+        self.assertEqual(set(res.json()["results"][0].keys()), {"id", "points"})
+        select = next(q["sql"] for q in queries if "LIMIT" in q["sql"])
+        self.assertNotIn("JOIN", select)
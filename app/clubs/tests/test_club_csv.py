@@ -4,6 +4,7 @@ from clubs.tests.utils import create_test_club
 from lib.faker import fake
 from querycsv.tests.utils import UploadCsvTestsBase
 from users.models import User
+from users.tests.utils import create_test_user
 
 
 class ClubMembershipCsvUploadTests(UploadCsvTestsBase):
@@ -56,3 +57,83 @@ class ClubMembershipCsvUploadTests(UploadCsvTestsBase):
                     club=expected["club"], user__email=expected["user_email"]
                 ).exists()
             )
+
+    def test_upload_club_memberships_rejected_rows(self):
+        """Should reject invalid points and repeated users before saving."""
+
+        email = fake.safe_email()
+        payload = [
+            {"club": self.club.id, "user_email": email, "points": "10"},
+            {"club": self.club.id, "user_email": fake.safe_email(), "points": "ten"},
+            {"club": self.club.id, "user_email": email, "points": "5"},
+            {"club": self.club2.id, "user_email": email, "points": "5"},
+        ]
+        self.data_to_csv(payload)
+
+        success, failed = self.service.upload_csv(path=self.filepath)
+
+        self.assertEqual(len(success), 2)
+        self.assertEqual(len(failed), 2)
+        self.assertIn("points", failed[0]["errors"])
+        self.assertIn("non_field_errors", failed[1]["errors"])
+        self.assertEqual(self.repo.filter(user__email=email).count(), 2)
+
+    def test_upload_club_memberships_conditional_unique(self):
+        """Should only check conditional constraints for rows they apply to."""
+
+        payload = [
+            {"club": self.club.id, "user_email": fake.safe_email(), "owner": "false"}
+            for _ in range(3)
+        ]
+        self.data_to_csv(payload)
+
+        valid, rejected = self.service.upload_csv(path=self.filepath, dry_run=True)
+
+        self.assertEqual(len(valid), 3)
+        self.assertEqual(rejected, [])
+
+        success, failed = self.service.upload_csv(path=self.filepath)
+
+        self.assertEqual(len(success), 3, failed)
+        self.assertEqual(self.repo.filter(club=self.club, owner=False).count(), 3)
+
+    def test_job_row_ranges(self):
+        """Should group ranges of rows for the same user, club or new role."""
+
+        emails = [fake.safe_email() for _ in range(4)]
+        records = [
+            {"club": self.club.id, "user_email": emails[0]},
+            {"club": self.club2.id, "user_email": f" {emails[0]} "},
+            {"club": self.club.id, "user_email": emails[1], "roles": ["New Role"]},
+            {"club": self.club.id, "user_email": emails[2], "roles": ["New Role"]},
+            {"club": self.club2.id, "user_email": emails[3], "roles": ["New Role"]},
+        ]
+
+        # Roles with the same name in other clubs are different objects
+        groups = self.service.get_job_row_ranges(records, task_rows=1, chunk_size=1)
+        self.assertEqual(groups, [[(0, 1), (1, 2)], [(2, 3), (3, 4)], [(4, 5)]])
+
+    def test_job_row_ranges_existing_roles(self):
+        """Should not group ranges of rows that only share existing users or roles."""
+
+        user = create_test_user()
+        records = [
+            {"club": club.id, "user_email": email, "roles": ["Member"]}
+            for club in [self.club, self.club2]
+            for email in [user.email, fake.safe_email()]
+        ]
+
+        groups = self.service.get_job_row_ranges(records, task_rows=1, chunk_size=1)
+        self.assertEqual(groups, [[(0, 1)], [(1, 2)], [(2, 3)], [(3, 4)]])
+
+    def test_download_club_memberships(self):
+        """Should export memberships of a club to a csv."""
+
+        for _ in range(self.dataset_size):
+            self.repo.create(club=self.club, user=create_test_user())
+
+        path = self.service.download_csv(self.repo.filter(club=self.club))
+        df = self.csv_to_df(path)
+
+        self.assertEqual(len(df), self.dataset_size)
+        self.assertIn("user_email", df.columns)
@@ -2,16 +2,29 @@
 Unit tests for generic model functions, validation, etc.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core import exceptions
+from django.db import connection
+from django.test import TransactionTestCase
 from django.urls import reverse
 
 from analytics.models import Link
-from clubs.models import Club, ClubMembership, Event, Team, TeamMembership
+from clubs.models import (
+    Club,
+    ClubMembership,
+    ClubRole,
+    Event,
+    EventAttendance,
+    Team,
+    TeamMembership,
+)
 from clubs.tests.utils import (
     CLUB_CREATE_PARAMS,
     CLUB_UPDATE_PARAMS,
     create_test_club,
     create_test_clubs,
+    create_test_event,
 )
 from core.abstracts.tests import TestsBase
 from lib.faker import fake
@@ -168,3 +181,103 @@ class ClubTeamTests(TestsBase):
 
         with self.assertRaises(exceptions.ValidationError):
             TeamMembership.objects.create(team=team, user=user)
+
+
+class ClubMembershipUpsertTests(TestsBase):
+    """Tests for single query membership and attendance writes."""
+
+    def setUp(self):
+        self.club = create_test_club()
+        self.event = create_test_event(self.club)
+        self.user = create_test_user()
+
+    def test_upsert_membership(self):
+        """Should create membership with default role once."""
+
+        membership = ClubMembership.objects.upsert(self.club.id, self.user.id)
+        self.assertTrue(membership.created)
+        self.assertEqual(
+            list(membership.roles.values_list("name", flat=True)), ["Member"]
+        )
+
+        with self.assertNumQueries(1):
+            membership = ClubMembership.objects.upsert(self.club.id, self.user.id)
+
+        self.assertFalse(membership.created)
+        self.assertEqual(ClubMembership.objects.count(), 1)
+        self.assertEqual(membership.roles.count(), 1)
+
+    def test_upsert_membership_missing_club(self):
+        """Should not create membership if club does not exist."""
+
+        membership = ClubMembership.objects.upsert(self.club.id + 100, self.user.id)
+
+        self.assertIsNone(membership)
+        self.assertEqual(ClubMembership.objects.count(), 0)
+
+    def test_default_role_cache_cleared(self):
+        """Should use new default role after it changes."""
+
+        ClubRole.objects.get_default_ids(self.club.id)
+        officer = self.club.roles.get(name="Officer")
+        officer.default = True
+        officer.save()
+
+        membership = ClubMembership.objects.upsert(self.club.id, self.user.id)
+        self.assertEqual(list(membership.roles.all()), [officer])
+
+    def test_upsert_attendance(self):
+        """Should record attendance and membership in one query."""
+
+        ClubRole.objects.get_default_ids(self.club.id)
+
+        with self.assertNumQueries(1):
+            attendance = EventAttendance.objects.upsert(
+                self.event.id, self.club.id, self.user.id
+            )
+
+        self.assertTrue(attendance.created)
+        self.assertEqual(attendance.member.user, self.user)
+        self.assertEqual(attendance.member.roles.count(), 1)
+
+        attendance = EventAttendance.objects.upsert(
+            self.event.id, self.club.id, self.user.id
+        )
+        self.assertFalse(attendance.created)
+        self.assertEqual(EventAttendance.objects.count(), 1)
+
+    def test_upsert_attendance_other_club(self):
+        """Should not record attendance if event is not part of club."""
+
+        other_club = create_test_club()
+        attendance = EventAttendance.objects.upsert(
+            self.event.id, other_club.id, self.user.id
+        )
+
+        self.assertIsNone(attendance)
+        self.assertEqual(ClubMembership.objects.count(), 0)
+
+
+class ClubMembershipConcurrencyTests(TransactionTestCase):
+    """Concurrent check-ins should not create duplicates or fail."""
+
+    def test_concurrent_attendance(self):
+        """Should record one attendance when user checks in many times at once."""
+
+        club = create_test_club()
+        event = create_test_event(club)
+        user = create_test_user()
+
+        def check_in():
+            try:
+                attendance = EventAttendance.objects.upsert(event.id, club.id, user.id)
+                return attendance.created
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            created = list(executor.map(lambda _: check_in(), range(16)))
+
+        self.assertEqual(created.count(True), 1)
+        self.assertEqual(ClubMembership.objects.filter(club=club).count(), 1)
+        self.assertEqual(EventAttendance.objects.filter(event=event).count(), 1)
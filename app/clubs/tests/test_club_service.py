@@ -3,13 +3,20 @@ Unit tests for Club business logic.
 """
 
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
 
+import redis
 from django.core import exceptions
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
 from django.utils import timezone
 
-from clubs.models import Club, DayChoice, Event
-from clubs.services import ClubService
-from clubs.tests.utils import create_test_club, join_club_url
+from clubs.leaderboard import ClubLeaderboard
+from clubs.models import Club, ClubMembership, DayChoice, Event, TeamMembership
+from clubs.services import ClubService, RecurringEventService
+from clubs.tests.utils import create_test_club, create_test_team, join_club_url
 from core.abstracts.tests import EmailTestsBase, TestsBase
 from lib.faker import fake
 from users.tests.utils import create_test_user
@@ -60,6 +67,170 @@ class ClubServiceLogicTests(TestsBase):
         mem.refresh_from_db()
         self.assertEqual(mem.points, 5)
 
+    def test_points_ledger(self):
+        """Should record every points change in the ledger."""
+
+        user = create_test_user()
+        mem = self.service.add_member(user)
+
+        self.service.increase_member_points(user, 5, reason="Attended meeting")
+        self.service.decrease_member_points(user, 2)
+
+        with self.assertRaises(exceptions.BadRequest):
+            self.service.decrease_member_points(user, 4)
+
+        entries = list(mem.points_transactions.order_by("id"))
+        self.assertEqual([entry.amount for entry in entries], [5, -2])
+        self.assertEqual([entry.balance for entry in entries], [5, 3])
+        self.assertEqual(entries[0].reason, "Attended meeting")
+
+    def test_team_points_from_ledger(self):
+        """Team points should be the sum of its members' transactions."""
+
+        team = create_test_team(self.club)
+        users = [create_test_user() for _ in range(3)]
+
+        for user in users:
+            self.service.add_member(user)
+
+        TeamMembership.objects.create(team=team, user=users[0])
+        self.service.increase_member_points(users[0], 4)
+        self.service.increase_member_points(users[1], 3)
+
+        team.refresh_from_db()
+        self.assertEqual(team.points, 4)
+
+        # Joining team brings member's past points
+        TeamMembership.objects.create(team=team, user=users[1])
+        team.refresh_from_db()
+        self.assertEqual(team.points, 7)
+
+    def test_leaderboard(self):
+        """Should rank members by points, updating on each transaction."""
+
+        users = [create_test_user() for _ in range(4)]
+        members = [self.service.add_member(user) for user in users]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.increase_member_points(users[0], 5)
+            self.service.increase_member_points(users[1], 10)
+            self.service.increase_member_points(users[2], 5)
+
+        leaderboard = self.service.get_leaderboard(count=3, user=users[3])
+        self.assertEqual(
+            [(entry["rank"], entry["member_id"]) for entry in leaderboard["entries"]],
+            [(1, members[1].id), (2, members[0].id), (2, members[2].id)],
+        )
+        self.assertEqual(leaderboard["user"]["rank"], 4)
+        self.assertEqual(leaderboard["entries"][0]["username"], users[1].username)
+
+        # Cached leaderboard is updated in place
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.increase_member_points(users[3], 20)
+
+        with self.assertNumQueries(0):
+            rank = ClubLeaderboard(self.club.id).get_rank(members[3].id)
+
+        self.assertEqual(rank["rank"], 1)
+        self.assertEqual(rank["points"], 20)
+
+    def test_leaderboard_new_members(self):
+        """Should rank members that joined after the leaderboard was cached."""
+
+        self.service.add_member(create_test_user())
+        self.service.get_leaderboard()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            member = self.service.add_member(create_test_user())
+
+        rank = ClubLeaderboard(self.club.id).get_rank(member.id)
+        self.assertEqual(rank["points"], 0)
+
+    def test_leaderboard_stale_build(self):
+        """Should not cache a ranking built before a concurrent update."""
+
+        users = [create_test_user() for _ in range(2)]
+        members = [self.service.add_member(user) for user in users]
+        leaderboard = ClubLeaderboard(self.club.id)
+        leaderboard.clear()
+
+        get_balances = leaderboard._get_balances
+
+        def get_balances_then_update():
+            balances = get_balances()
+            ClubMembership.objects.filter(id=members[1].id).update(points=50)
+            ClubLeaderboard(self.club.id).update(members[1].id)
+            return balances
+
+        with patch.object(leaderboard, "_get_balances", get_balances_then_update):
+            leaderboard.get_top()
+
+        self.assertIsNone(cache.get(leaderboard.cache_key))
+        self.assertEqual(leaderboard.get_rank(members[1].id)["points"], 50)
+
+    def test_leaderboard_updates_out_of_order(self):
+        """Should rank members by their latest balance, whatever order updates run."""
+
+        user = create_test_user()
+        member = self.service.add_member(user)
+        self.service.get_leaderboard()
+
+        with self.captureOnCommitCallbacks() as first:
+            self.service.increase_member_points(user, 5)
+        with self.captureOnCommitCallbacks() as second:
+            self.service.increase_member_points(user, 10)
+
+        for callback in [*second, *first]:
+            callback()
+
+        rank = ClubLeaderboard(self.club.id).get_rank(member.id)
+        self.assertEqual(rank["points"], 15)
+
+    def test_leaderboard_redis_backend(self):
+        """Should use the redis connection of the cache, without private apis."""
+
+        caches = {
+            "default": {
+                "BACKEND": "django_redis.cache.RedisCache",
+                "LOCATION": "redis://localhost:6379/0",
+            }
+        }
+
+        with self.settings(CACHES=caches):
+            leaderboard = ClubLeaderboard(self.club.id)
+            self.assertTrue(leaderboard.uses_redis)
+            self.assertIsInstance(leaderboard._get_client(), redis.Redis)
+
+        self.assertFalse(ClubLeaderboard(self.club.id).uses_redis)
+
+
+class ClubPointsConcurrencyTests(TransactionTestCase):
+    """Points should not be lost when changed at the same time."""
+
+    def test_concurrent_points(self):
+        """Should apply every concurrent points change."""
+
+        club = create_test_club()
+        user = create_test_user()
+        ClubService(club).add_member(user)
+
+        def add_point():
+            try:
+                ClubService(club).increase_member_points(user, 1)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: add_point(), range(20)))
+
+        member = ClubMembership.objects.get(club=club, user=user)
+        self.assertEqual(member.points, 20)
+        self.assertEqual(member.points_transactions.count(), 20)
+        self.assertEqual(
+            sorted(member.points_transactions.values_list("balance", flat=True)),
+            list(range(1, 21)),
+        )
+
 
 class ClubEmailTests(EmailTestsBase):
     """Test emails that are sent in connection to clubs."""
@@ -110,7 +281,7 @@ class ClubEventTests(TestsBase):
 
     def test_create_recurring_event(self):
         """
-        Recurring event should create multiple events.
+        Recurring event should expand to multiple occurrences.
 
         Between 9/1/24 and 12/1/24 there are 13 tuesdays.
         """
@@ -143,10 +314,19 @@ class ClubEventTests(TestsBase):
         self.assertEqual(Event.objects.count(), 0)
 
         rec = self.service.create_recurring_event(**payload)
-        self.assertEqual(Event.objects.count(), EXPECTED_EV_COUNT)
         self.assertEqual(rec.expected_event_count, EXPECTED_EV_COUNT)
 
-        for i, event in enumerate(list(Event.objects.all().order_by("start_at"))):
+        # Occurrences are not stored until needed
+        self.assertEqual(Event.objects.count(), 0)
+
+        occurrences = self.service.get_occurrences(
+            start=timezone.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+            end=timezone.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual(len(occurrences), EXPECTED_EV_COUNT)
+
+        for i, event in enumerate(occurrences):
+            self.assertIsNone(event.id)
             self.assertEqual(event.name, rec.name)
             self.assertIsNone(event.description)
 
@@ -162,8 +342,87 @@ class ClubEventTests(TestsBase):
             self.assertEqual(event.start_at.month, expected_month)
             self.assertEqual(event.start_at.day, expected_day)
 
-        Event.objects.all().delete()
+        self.service.sync_recurring_event(rec)
         self.assertEqual(Event.objects.count(), 0)
 
+    def test_recurring_event_skip_dates(self):
+        """Recurring event should not happen on skipped dates."""
+
+        rec = self.service.create_recurring_event(
+            name=fake.title(),
+            start_date=datetime.date(2024, 9, 1),
+            end_date=datetime.date(2024, 12, 1),
+            day=DayChoice.TUESDAY,
+            event_start_time=datetime.time(17, 0, 0),
+            event_end_time=datetime.time(19, 0, 0),
+            skip_dates=[datetime.date(2024, 11, 5), datetime.date(2024, 11, 26)],
+        )
+        self.assertEqual(rec.expected_event_count, 11)
+
+        dates = RecurringEventService(rec).get_occurrence_dates()
+        self.assertEqual(len(dates), 11)
+        self.assertNotIn(datetime.date(2024, 11, 5), dates)
+        self.assertNotIn(datetime.date(2024, 11, 26), dates)
+
+        with self.assertRaises(exceptions.BadRequest):
+            RecurringEventService(rec).materialize(datetime.date(2024, 11, 5))
+
+    def test_materialize_recurring_event_occurrence(self):
+        """Should store a single occurrence, and use it in place of the calculated one."""
+
+        rec = self.service.create_recurring_event(
+            name=fake.title(),
+            start_date=datetime.date(2024, 9, 1),
+            end_date=datetime.date(2024, 12, 1),
+            day=DayChoice.TUESDAY,
+            event_start_time=datetime.time(17, 0, 0),
+            event_end_time=datetime.time(19, 0, 0),
+        )
+        rec_svc = RecurringEventService(rec)
+
+        event = rec_svc.materialize(datetime.date(2024, 10, 8), location="Room 101")
+        self.assertEqual(Event.objects.count(), 1)
+        self.assertEqual(event.occurrence_date, datetime.date(2024, 10, 8))
+        self.assertEqual(event.start_at.hour, 17)
+        self.assertEqual(event.location, "Room 101")
+
+        # Materializing again returns the same event
+        self.assertEqual(rec_svc.materialize(datetime.date(2024, 10, 8)).id, event.id)
+        self.assertEqual(Event.objects.count(), 1)
+
+        occurrences = rec_svc.get_occurrences(
+            start=timezone.datetime(2024, 10, 1, tzinfo=datetime.timezone.utc),
+            end=timezone.datetime(2024, 10, 31, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual(len(occurrences), 5)
+        self.assertEqual(occurrences[1].id, event.id)
+
+        # Skipping the date removes the stored event
+        rec.skip_dates = [datetime.date(2024, 10, 8)]
+        rec.save()
         self.service.sync_recurring_event(rec)
-        self.assertEqual(Event.objects.count(), 13)
+        self.assertEqual(Event.objects.count(), 0)
+
+    def test_open_ended_recurring_event(self):
+        """Recurring event without end date should expand for any range."""
+
+        rec = self.service.create_recurring_event(
+            name=fake.title(),
+            start_date=datetime.date(2024, 9, 1),
+            end_date=None,
+            day=DayChoice.TUESDAY,
+            event_start_time=datetime.time(17, 0, 0),
+            event_end_time=datetime.time(19, 0, 0),
+        )
+        rec_svc = RecurringEventService(rec)
+
+        with self.assertRaises(exceptions.BadRequest):
+            rec_svc.get_occurrence_dates()
+
+        occurrences = rec_svc.get_occurrences(
+            start=timezone.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc),
+            end=timezone.datetime(2030, 1, 31, tzinfo=datetime.timezone.utc),
+        )
+        # January 1st, 2030 is a tuesday
+        self.assertEqual(len(occurrences), 5)
+        self.assertEqual(occurrences[0].start_at.date(), datetime.date(2030, 1, 1))
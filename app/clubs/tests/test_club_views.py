@@ -1,8 +1,12 @@
+from datetime import date, time
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.test import APIClient
 
-from clubs.models import ClubMembership, Event, EventAttendance
+from clubs.models import ClubMembership, DayChoice, Event, EventAttendance
 from clubs.services import ClubService
 from clubs.tests.utils import club_home_url, create_test_club, join_club_url
 from core.abstracts.tests import ViewTestsBase
@@ -105,6 +109,20 @@ class ClubViewTests(ViewTestsBase):
         )
         self.assertEqual(ClubMembership.objects.all().count(), 1)
 
+    def test_club_home_view_cached(self):
+        """Should cache club page for guests, until the club changes."""
+
+        cache.clear()
+        url = club_home_url(self.club.id)
+
+        self.assertResOk(self.client.get(url))
+
+        with self.assertNumQueries(0):
+            self.assertResOk(self.client.get(url))
+
+        self.club.delete()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
     def test_join_event_view(self):
         """Should record attendance when joining event."""
 
@@ -134,3 +152,52 @@ class ClubViewTests(ViewTestsBase):
         ea = EventAttendance.objects.first()
         self.assertEqual(ea.event.id, event.id)
         self.assertEqual(ea.member.user.id, user.id)
+
+    def test_join_occurrence_view(self):
+        """Should store occurrence of a recurring event when checking in."""
+
+        user = create_test_user()
+        self.client.force_login(user)
+
+        self.service.create_recurring_event(
+            name="Weekly meeting",
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 1, 31),
+            day=DayChoice.MONDAY,
+            event_start_time=time(12, 0),
+            event_end_time=time(13, 0),
+        )
+
+        # Occurrences listed by the api link to the occurrence
+        api_client = APIClient()
+        api_client.force_authenticate(user)
+        res = api_client.get(
+            reverse("api-clubs:club-occurrences", args=[self.club.id]),
+            {"start": "2024-01-08T00:00:00Z", "end": "2024-01-09T00:00:00Z"},
+        )
+        occurrence = res.json()[0]
+        self.assertIsNone(occurrence["id"])
+
+        res = self.client.get(occurrence["attendance_url"])
+
+        event = Event.objects.get(occurrence_date=date(2024, 1, 8))
+        self.assertRedirects(
+            res,
+            expected_url=event_attendance_done_url(self.club.id, event.id),
+            status_code=status.HTTP_302_FOUND,
+        )
+        self.assertTrue(
+            EventAttendance.objects.filter(event=event, member__user=user).exists()
+        )
+        self.assertEqual(event.attendance_links.count(), 1)
+
+        # Dates outside of the series are not found
+        url = reverse(
+            "clubs:join-occurrence",
+            kwargs={
+                "club_id": self.club.id,
+                "recurring_event_id": event.recurring_event_id,
+                "occurrence_date": "2024-01-09",
+            },
+        )
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
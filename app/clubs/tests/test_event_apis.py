@@ -0,0 +1,179 @@
+"""
+Unit tests for searching events via the REST API.
+"""
+
+from datetime import date, time, timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+from clubs.models import DayChoice, Event, EventTag
+from clubs.services import ClubService
+from clubs.tests.utils import create_test_club, create_test_event
+from core.abstracts.tests import AuthApiTestsBase
+
+EVENTS_URL = reverse("api-clubs:event-list")
+
+
+class EventApiTests(AuthApiTestsBase):
+    """Tests for event search api."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.club = create_test_club()
+        self.now = timezone.now().replace(microsecond=0)
+
+    def create_event(self, start_hours: int, end_hours: int, club=None, **kwargs):
+        return create_test_event(
+            club or self.club,
+            name=kwargs.pop("name", f"Event {start_hours}"),
+            start_datetime=self.now + timedelta(hours=start_hours),
+            end_datetime=self.now + timedelta(hours=end_hours),
+            **kwargs,
+        )
+
+    def get_ids(self, res):
+        self.assertResOk(res)
+        return [event["id"] for event in res.json()["results"]]
+
+    def test_filter_time_range(self):
+        """Should list events that overlap the time range, in order."""
+
+        self.create_event(-5, -4)
+        ongoing = self.create_event(-1, 1)
+        upcoming = self.create_event(2, 3)
+        self.create_event(10, 11)
+
+        res = self.client.get(
+            EVENTS_URL,
+            {
+                "start": self.now.isoformat(),
+                "end": (self.now + timedelta(hours=5)).isoformat(),
+            },
+        )
+
+        self.assertEqual(self.get_ids(res), [ongoing.id, upcoming.id])
+
+    def test_filter_clubs(self):
+        """Should list events hosted or co-hosted by clubs."""
+
+        other_club = create_test_club()
+        hosted = self.create_event(1, 2)
+        cohosted = self.create_event(3, 4, club=other_club)
+        cohosted.other_clubs.add(self.club)
+        self.create_event(5, 6, club=other_club)
+
+        res = self.client.get(EVENTS_URL, {"club": [self.club.id]})
+        self.assertEqual(self.get_ids(res), [hosted.id, cohosted.id])
+
+        res = self.client.get(
+            EVENTS_URL, {"club": [self.club.id], "include_other_clubs": False}
+        )
+        self.assertEqual(self.get_ids(res), [hosted.id])
+
+    def test_filter_tags(self):
+        """Should list events with any of the tags."""
+
+        tag = EventTag.objects.create(name="Workshop")
+        tagged = self.create_event(1, 2)
+        tagged.tags.add(tag)
+        self.create_event(3, 4)
+
+        res = self.client.get(EVENTS_URL, {"tag": [tag.id]})
+        self.assertEqual(self.get_ids(res), [tagged.id])
+
+    def test_keyset_pagination(self):
+        """Should page through events sharing the same start time."""
+
+        events = [self.create_event(1, 2, name=f"Event {i}") for i in range(5)]
+        events += [self.create_event(3, 4, name=f"Event {i}") for i in range(3)]
+
+        ids = []
+        url = f"{EVENTS_URL}?page_size=3"
+
+        while url is not None:
+            res = self.client.get(url)
+            ids.extend(self.get_ids(res))
+            url = res.json()["next"]
+
+        self.assertEqual(ids, [event.id for event in events])
+
+    def test_invalid_cursor(self):
+        """Should reject cursors not created by the api."""
+
+        res = self.client.get(EVENTS_URL, {"cursor": "invalid"})
+        self.assertEqual(res.status_code, 404)
+
+    def test_club_occurrences(self):
+        """Should list club events with recurring events expanded."""
+
+        event = self.create_event(24, 25)
+        ClubService(self.club).create_recurring_event(
+            name="Weekly meeting",
+            start_date=date(2024, 1, 1),
+            end_date=None,
+            day=DayChoice((self.now + timedelta(days=1)).weekday()),
+            event_start_time=time(0, 0),
+            event_end_time=time(1, 0),
+        )
+
+        url = reverse("api-clubs:club-occurrences", args=[self.club.id])
+        res = self.client.get(
+            url,
+            {
+                "start": self.now.isoformat(),
+                "end": (self.now + timedelta(days=14)).isoformat(),
+            },
+        )
+        self.assertResOk(res)
+
+        data = res.json()
+        self.assertEqual(len(data), 3)
+        self.assertIn(event.id, [item["id"] for item in data])
+        self.assertEqual(len([item for item in data if item["id"] is None]), 2)
+
+    def test_store_occurrence(self):
+        """Should store occurrence with an attendance link, once."""
+
+        series = ClubService(self.club).create_recurring_event(
+            name="Weekly meeting",
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 1, 31),
+            day=DayChoice.MONDAY,
+            event_start_time=time(12, 0),
+            event_end_time=time(13, 0),
+        )
+        url = reverse("api-clubs:club-occurrences", args=[self.club.id])
+        payload = {"recurring_event": series.id, "occurrence_date": "2024-01-08"}
+
+        res = self.client.post(url, payload)
+        self.assertEqual(res.status_code, 201)
+
+        event = Event.objects.get(id=res.json()["id"])
+        self.assertEqual(event.occurrence_date, date(2024, 1, 8))
+        self.assertEqual(event.attendance_links.count(), 1)
+        self.assertIn(f"/event/{event.id}/join/", res.json()["attendance_url"])
+
+        res = self.client.post(url, payload)
+        self.assertEqual(res.json()["id"], event.id)
+
+        # Not an occurrence of the series
+        res = self.client.post(url, {**payload, "occurrence_date": "2024-01-09"})
+        self.assertEqual(res.status_code, 400)
+
+    def test_event_list_query_count(self):
+        """Listing events should not query tags or hosts of each event."""
+
+        tag = EventTag.objects.create(name="Workshop")
+        other_club = create_test_club()
+
+        def create_events(count: int):
+            for i in range(Event.objects.count(), Event.objects.count() + count):
+                event = self.create_event(i, i + 1)
+                event.tags.add(tag)
+                event.other_clubs.add(other_club)
+
+        self.assertQueriesConstant(
+            lambda: self.assertResOk(self.client.get(EVENTS_URL)), create_events
+        )
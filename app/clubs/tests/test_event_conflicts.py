@@ -0,0 +1,135 @@
+"""
+Unit tests for detecting event conflicts.
+"""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from clubs.conflicts import ConflictType, find_conflicts, get_event_conflicts
+from clubs.tests.utils import create_test_club, create_test_event
+from core.abstracts.tests import AuthApiTestsBase
+
+
+class EventConflictTests(AuthApiTestsBase):
+    """Tests for finding events at the same time."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.club = create_test_club()
+        self.other_club = create_test_club()
+        self.now = timezone.now().replace(microsecond=0)
+
+    def create_event(self, start_hours: int, end_hours: int, club=None, **kwargs):
+        return create_test_event(
+            club or self.club,
+            name=kwargs.pop("name", f"Event {start_hours}"),
+            start_datetime=self.now + timedelta(hours=start_hours),
+            end_datetime=self.now + timedelta(hours=end_hours),
+            **kwargs,
+        )
+
+    def get_pairs(self, conflicts):
+        return {
+            (c["event_id"], c["conflicting_event_id"], c["type"]) for c in conflicts
+        }
+
+    def test_venue_conflicts(self):
+        """Should find events at the same location and time, for any club."""
+
+        event = self.create_event(1, 3, location="Room 101")
+        overlapping = self.create_event(2, 4, club=self.other_club, location="room 101")
+        self.create_event(3, 4, club=self.other_club, location="Room 101")
+        self.create_event(1, 3, club=self.other_club, location="Room 102")
+
+        self.assertEqual(
+            self.get_pairs(get_event_conflicts(event)),
+            {(event.id, overlapping.id, ConflictType.VENUE)},
+        )
+
+    def test_club_conflicts(self):
+        """Should find events hosted or co-hosted by the same club at the same time."""
+
+        event = self.create_event(1, 3, location="Room 1")
+        hosted = self.create_event(2, 4, name="Hosted", location="Room 2")
+        cohosted = self.create_event(0, 2, club=self.other_club, location="Room 3")
+        cohosted.other_clubs.add(self.club)
+        self.create_event(1, 3, club=self.other_club, location="Room 4")
+
+        self.assertEqual(
+            self.get_pairs(get_event_conflicts(event)),
+            {
+                (event.id, hosted.id, ConflictType.CLUB),
+                (event.id, cohosted.id, ConflictType.CLUB),
+            },
+        )
+
+    def test_event_without_end(self):
+        """Events without an end time should not conflict."""
+
+        event = self.create_event(0, 0)
+        event.end_at = None
+        event.save()
+        self.create_event(-1, 1)
+
+        self.assertEqual(get_event_conflicts(event), [])
+
+    def test_find_conflicts(self):
+        """Should find all conflicting pairs in range, matching single event checks."""
+
+        events = [
+            self.create_event(i, i + 2, club=club, location=f"Room {i % 3}")
+            for i in range(12)
+            for club in [self.club, self.other_club]
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            conflicts = find_conflicts(
+                self.now - timedelta(hours=1), self.now + timedelta(hours=20)
+            )
+
+        self.assertEqual(len(queries), 2)
+
+        expected = set()
+        for event in events:
+            for conflict in get_event_conflicts(event):
+                if conflict["event_id"] < conflict["conflicting_event_id"]:
+                    expected.add(
+                        (
+                            conflict["event_id"],
+                            conflict["conflicting_event_id"],
+                            conflict["type"],
+                        )
+                    )
+
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(self.get_pairs(conflicts), expected)
+
+    def test_conflicts_api(self):
+        """Should list conflicts for an event, and for a time range."""
+
+        event = self.create_event(1, 3, location="Room 101")
+        other = self.create_event(2, 4, club=self.other_club, location="Room 101")
+
+        url = reverse("api-clubs:event-conflicts", args=[event.id])
+        res = self.client.get(url)
+        self.assertResOk(res)
+        self.assertEqual(
+            res.json(),
+            [
+                {
+                    "event_id": event.id,
+                    "conflicting_event_id": other.id,
+                    "type": "venue",
+                }
+            ],
+        )
+
+        url = reverse("api-clubs:event-find-conflicts")
+        res = self.client.get(url, {"club": [self.other_club.id]})
+        self.assertResOk(res)
+        self.assertEqual(len(res.json()), 1)
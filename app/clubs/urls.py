@@ -15,6 +15,11 @@ urlpatterns = [
         views.record_attendance_view,
         name="join-event",
     ),
+    path(
+        "club/<int:club_id>/recurring/<int:recurring_event_id>/<str:occurrence_date>/join/",
+        views.record_occurrence_attendance_view,
+        name="join-occurrence",
+    ),
     path(
         "club/<int:club_id>/event/<int:event_id>/done/",
         TemplateView.as_view(
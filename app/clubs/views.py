@@ -3,28 +3,32 @@ Club views for API and rendering html pages.
 """
 
 import re
+from datetime import date
 
 from django.contrib.auth.decorators import login_required
-from django.http import FileResponse, HttpRequest
+from django.core.exceptions import BadRequest
+from django.http import FileResponse, Http404, HttpRequest
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 
-from clubs.models import Club, Event
+from clubs.catalog import cache_catalog_page
+from clubs.models import Club, ClubMembership, Event, EventAttendance
 from clubs.services import ClubService
 
 
 @login_required()
 def join_club_view(request: HttpRequest, club_id: int):
     """Registers a new or existing user to a club."""
-    club = get_object_or_404(Club, id=club_id)
+    membership = ClubMembership.objects.upsert(club_id, request.user.id)
 
-    club_svc = ClubService(club)
-    club_svc.add_member(request.user)
+    if membership is None:
+        raise Http404("Club not found.")
 
-    url = reverse("clubs:home", kwargs={"club_id": club.id})
+    url = reverse("clubs:home", kwargs={"club_id": club_id})
     return redirect(url)
 
 
+@cache_catalog_page
 def club_home_view(request: HttpRequest, club_id: int):
     """Base page for a club."""
     club = get_object_or_404(Club, id=club_id)
@@ -35,12 +39,31 @@ def club_home_view(request: HttpRequest, club_id: int):
 @login_required()
 def record_attendance_view(request: HttpRequest, club_id: int, event_id: int):
     """Records a club member attended an event."""
-    event = get_object_or_404(Event, id=event_id)
-    ClubService(event.club).record_event_attendance(request.user, event)
+    attendance = EventAttendance.objects.upsert(event_id, club_id, request.user.id)
+
+    if attendance is None:
+        raise Http404("Event not found.")
 
     return redirect("clubs:join-event-done", club_id=club_id, event_id=event_id)
 
 
+@login_required()
+def record_occurrence_attendance_view(
+    request: HttpRequest, club_id: int, recurring_event_id: int, occurrence_date: str
+):
+    """Records a club member attended an occurrence of a recurring event."""
+    club = get_object_or_404(Club, id=club_id)
+
+    try:
+        event = ClubService(club).get_occurrence_event(
+            recurring_event_id, date.fromisoformat(occurrence_date)
+        )
+    except (ValueError, BadRequest):
+        raise Http404("Event not found.")
+
+    return record_attendance_view(request, club_id=club_id, event_id=event.id)
+
+
 def download_event_calendar(request: HttpRequest, club_id: int, event_id: int):
     club = get_object_or_404(Club, id=club_id)
     event = get_object_or_404(Event, id=event_id)
@@ -1,16 +1,31 @@
 from django.shortcuts import get_object_or_404
-from rest_framework import status
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from rest_framework import mixins, status
+from rest_framework.decorators import action
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
-from clubs.models import Club, ClubMembership
+from clubs.conflicts import find_conflicts, get_event_conflicts
+from clubs.models import Club, ClubMembership, Event
 from clubs.serializers import (
+    ClubLeaderboardSerializer,
+    ClubMembershipBatchResultSerializer,
+    ClubMembershipBatchSerializer,
     ClubMembershipSerializer,
     ClubSerializer,
+    EventAttendanceBatchSerializer,
+    EventAttendanceResultSerializer,
+    EventConflictFilterSerializer,
+    EventConflictSerializer,
+    EventFilterSerializer,
+    EventOccurrenceFilterSerializer,
+    EventOccurrenceSerializer,
+    EventOccurrenceStoreSerializer,
+    EventSerializer,
     InviteClubMemberSerializer,
 )
 from clubs.services import ClubService
+from core.abstracts.pagination import KeysetPagination
 from core.abstracts.viewsets import ModelViewSetBase, ViewSetBase
-from drf_spectacular.utils import extend_schema
 
 
 class ClubViewSet(ModelViewSetBase):
@@ -18,6 +33,67 @@ class ClubViewSet(ModelViewSetBase):
 
     serializer_class = ClubSerializer
     queryset = Club.objects.all()
+    related_validators = ["memberships", "memberships__user"]
+
+    @extend_schema(
+        parameters=[OpenApiParameter("count", int, description="Max 100.")],
+        responses=ClubLeaderboardSerializer,
+    )
+    @action(detail=True, methods=["get"])
+    def leaderboard(self, request, pk=None):
+        """Rank club members by points."""
+
+        club = self.get_object()
+
+        try:
+            count = min(int(request.query_params.get("count", 10)), 100)
+        except ValueError:
+            count = 10
+
+        data = ClubService(club).get_leaderboard(count=count, user=request.user)
+        return Response(ClubLeaderboardSerializer(data).data)
+
+    @extend_schema(
+        parameters=[EventOccurrenceFilterSerializer],
+        responses=EventOccurrenceSerializer(many=True),
+    )
+    @action(detail=True, methods=["get"])
+    def occurrences(self, request, pk=None):
+        """List club events in a time range, with recurring events expanded."""
+
+        club = self.get_object()
+
+        filters = EventOccurrenceFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+
+        events = ClubService(club).get_occurrences(**filters.validated_data)
+        serializer = EventOccurrenceSerializer(
+            events, many=True, context={"club": club}
+        )
+        return Response(serializer.data)
+
+    @extend_schema(
+        request=EventOccurrenceStoreSerializer,
+        responses=EventOccurrenceSerializer,
+    )
+    @occurrences.mapping.post
+    def store_occurrence(self, request, pk=None):
+        """Store occurrence of a recurring event, so it can have attendance."""
+
+        club = self.get_object()
+
+        serializer = EventOccurrenceStoreSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        event = ClubService(club).get_occurrence_event(
+            serializer.validated_data["recurring_event"],
+            serializer.validated_data["occurrence_date"],
+        )
+
+        return Response(
+            EventOccurrenceSerializer(event, context={"club": club}).data,
+            status=status.HTTP_201_CREATED,
+        )
 
 
 class ClubMembershipViewSet(ModelViewSetBase):
@@ -28,7 +104,9 @@ class ClubMembershipViewSet(ModelViewSetBase):
 
     def get_queryset(self):
         club_id = self.kwargs.get("club_id", None)
-        self.queryset = ClubMembership.objects.filter(club__id=club_id)
+        self.queryset = ClubMembership.objects.filter(club__id=club_id).select_related(
+            "user", "club"
+        )
 
         return super().get_queryset()
 
@@ -38,6 +116,91 @@ class ClubMembershipViewSet(ModelViewSetBase):
 
         serializer.save(club=club)
 
+    @extend_schema(
+        request=ClubMembershipBatchSerializer,
+        responses=ClubMembershipBatchResultSerializer(many=True),
+    )
+    @action(detail=False, methods=["post"], pagination_class=None)
+    def batch(self, request, club_id=None):
+        """Create, update, and delete many memberships at once."""
+
+        club = get_object_or_404(Club, id=club_id)
+        serializer = ClubMembershipBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = ClubService(club).apply_membership_batch(
+            serializer.validated_data["operations"]
+        )
+
+        return Response(ClubMembershipBatchResultSerializer(results, many=True).data)
+
+
+class EventPagination(KeysetPagination):
+    ordering = ("start_at", "id")
+
+
+@extend_schema_view(list=extend_schema(parameters=[EventFilterSerializer]))
+class EventViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, ViewSetBase):
+    """
+    Search events by time range, club, and tags.
+
+    With a time range, includes all events that overlap the range.
+    """
+
+    serializer_class = EventSerializer
+    queryset = Event.objects.all()
+    pagination_class = EventPagination
+
+    def get_queryset(self):
+        if self.action != "list":
+            return super().get_queryset()
+
+        filters = EventFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        return Event.objects.filter_in_range(
+            start=params.get("start", None),
+            end=params.get("end", None),
+            club_ids=params.get("club", None),
+            tag_ids=params.get("tag", None),
+            include_other_clubs=params["include_other_clubs"],
+        ).prefetch_related("other_clubs", "tags")
+
+    @extend_schema(responses=EventConflictSerializer(many=True))
+    @action(detail=True, methods=["get"])
+    def conflicts(self, request, pk=None):
+        """List events at the same time and location, or hosted by the same club."""
+
+        event = self.get_object()
+        conflicts = get_event_conflicts(event)
+
+        return Response(EventConflictSerializer(conflicts, many=True).data)
+
+    @extend_schema(
+        parameters=[EventConflictFilterSerializer],
+        responses=EventConflictSerializer(many=True),
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="conflicts",
+        url_name="find-conflicts",
+        pagination_class=None,
+    )
+    def find_conflicts(self, request):
+        """Find all conflicting events in a time range."""
+
+        filters = EventConflictFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        conflicts = find_conflicts(
+            start=params["start"], end=params["end"], club_ids=params.get("club", None)
+        )
+
+        return Response(EventConflictSerializer(conflicts, many=True).data)
+
 
 class InviteClubMemberView(GenericAPIView):
     """Creates a POST route for inviting club members."""
@@ -57,3 +220,24 @@ class InviteClubMemberView(GenericAPIView):
         ClubService(club).send_email_invite(emails)
 
         return Response(status=status.HTTP_202_ACCEPTED)
+
+
+class EventAttendanceBatchView(GenericAPIView):
+    """Creates a POST route for officers to check in many users to an event."""
+
+    serializer_class = EventAttendanceBatchSerializer
+    authentication_classes = ViewSetBase.authentication_classes
+    permission_classes = ViewSetBase.permission_classes
+
+    @extend_schema(responses=EventAttendanceResultSerializer(many=True))
+    def post(self, request, id: int, *args, **kwargs):
+        club = get_object_or_404(Club, id=id)
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = ClubService(club).record_event_attendance_batch(
+            event=serializer.validated_data["event"],
+            users=serializer.validated_data["users"],
+        )
+
+        return Response(EventAttendanceResultSerializer(results, many=True).data)
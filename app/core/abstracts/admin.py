@@ -11,6 +11,7 @@ from django.urls import reverse
 from django.urls.resolvers import URLPattern
 from django.utils.safestring import mark_safe
 
+from core.db.routers import use_replica
 from querycsv.serializers import CsvModelSerializer
 from querycsv.services import QueryCsvService
 from querycsv.views import QueryCsvViewSet
@@ -115,6 +116,17 @@ class ModelAdminBase(AdminBase, admin.ModelAdmin):
             "object_tools": self.object_tools,
         }
 
+        # Posting the changelist runs actions, which can write
+        if request.method == "GET":
+            with use_replica():
+                response = super().changelist_view(request, extra_context=context)
+
+                # Columns are computed while rendering
+                if isinstance(response, TemplateResponse):
+                    response.render()
+
+                return response
+
         return super().changelist_view(request, extra_context=context)
 
     def get_urls(self) -> list[URLPattern]:
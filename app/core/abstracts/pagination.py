@@ -0,0 +1,146 @@
+"""
+Paginate large querysets for REST APIs.
+"""
+
+import base64
+import json
+from typing import Optional
+
+from django.db import models
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination using the values of the last item on the page.
+
+    Each page is filtered to items after the previous page's last item,
+    so with an index on the ordering fields the cost of a page does not
+    grow with how deep into the results it is. The last ordering field
+    must be unique, like the id.
+
+    Fields can be prefixed with "-" for descending order.
+    """
+
+    ordering: tuple[str, ...] = ("created_at", "id")
+    page_size = 50
+    max_page_size = 500
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, request: Request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, obj: models.Model) -> str:
+        values = []
+
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip("-"))
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, queryset: models.QuerySet, cursor: str) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            assert isinstance(values, list) and len(values) == len(self.ordering)
+
+            return [
+                queryset.model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound("Invalid cursor.")
+
+    def get_cursor_filter(self, values: list) -> models.Q:
+        """
+        Filter for items after the cursor.
+
+        Equivalent to a row comparison ``(a, b) > (x, y)``, with an extra
+        bound on the first field so the index range scan starts at the cursor.
+        """
+
+        fields = [field.lstrip("-") for field in self.ordering]
+        lookups = ["lt" if field.startswith("-") else "gt" for field in self.ordering]
+
+        after = models.Q()
+        for i, (field, lookup) in enumerate(zip(fields, lookups)):
+            condition = models.Q(**{f"{field}__{lookup}": values[i]})
+
+            for prev_field, prev_value in zip(fields[:i], values[:i]):
+                condition &= models.Q(**{prev_field: prev_value})
+
+            after |= condition
+
+        first_bound = models.Q(**{f"{fields[0]}__{lookups[0]}e": values[0]})
+        return first_bound & after
+
+    def paginate_queryset(
+        self, queryset: models.QuerySet, request: Request, view=None
+    ) -> Optional[list]:
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param, None)
+
+        if cursor:
+            values = self.decode_cursor(queryset, cursor)
+            queryset = queryset.filter(self.get_cursor_filter(values))
+
+        # Get extra item to check if there is a next page
+        items = list(queryset[: page_size + 1])
+        self.has_next = len(items) > page_size
+        self.page = items[:page_size]
+
+        return self.page
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.page[-1])
+
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor from the previous page's next link.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Number of results per page, max {self.max_page_size}.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -0,0 +1,46 @@
+"""
+Render REST API responses.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Render JSON with orjson, or the json module if orjson is not installed.
+
+    Output is the same as ``JSONRenderer``. Dates and times, and values orjson
+    does not support like decimals and lazy strings, use the same encoder.
+    Indented json, like in the browsable api, uses the json module.
+    Unlike the json module, NaN and Infinity are rendered as null.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Like dicts with int keys, or ints too large for orjson
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape the same characters as JSONRenderer, see its comments
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
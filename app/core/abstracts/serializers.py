@@ -1,8 +1,10 @@
 from enum import Enum
-from typing import Type
+from typing import Iterable, Optional, Type
 
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
-from rest_framework import serializers
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import permissions, serializers
 
 
 class FieldType(Enum):
@@ -76,6 +78,27 @@ class SerializerBase(serializers.Serializer):
         return field_types
 
 
+def parse_field_paths(value: Optional[str]) -> set[tuple[str, ...]]:
+    """Parse comma separated field names, using dots for nested fields."""
+
+    if not value:
+        return set()
+
+    return {tuple(name.strip().split(".")) for name in value.split(",") if name.strip()}
+
+
+def get_select_related_paths(select_related: dict, prefix="") -> list[str]:
+    """Convert ``query.select_related`` tree to lookups like "a__b"."""
+
+    paths = []
+
+    for name, children in select_related.items():
+        path = f"{prefix}{name}"
+        paths.extend(get_select_related_paths(children, path + LOOKUP_SEP) or [path])
+
+    return paths
+
+
 class ModelSerializerBase(serializers.ModelSerializer):
     """Default functionality for model serializer."""
 
@@ -91,13 +114,252 @@ class ModelSerializerBase(serializers.ModelSerializer):
 
     default_fields = ["id", "created_at", "updated_at"]
 
+    fields_query_param = "fields"
+    """Comma separated fields to show, like ``?fields=id,name,members.id``."""
+
+    expand_query_param = "expand"
+    """Comma separated fields in ``Meta.expandable_fields`` to show."""
+
     class Meta:
         model = None
+        expandable_fields = []
+        """Nested fields only shown if they are in the expand or fields params."""
 
     @property
     def model_class(self) -> Type[models.Model]:
         return self.Meta.model
 
+    @property
+    def field_path(self) -> tuple[str, ...]:
+        """Names of fields leading from the root serializer to this one."""
+
+        path = []
+        node = self
+
+        while node.parent is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+
+        return tuple(reversed(path))
+
+    @property
+    def selects_fields(self) -> bool:
+        """
+        Whether fields are chosen by the request's query params.
+
+        Only applies when reading, so writes always validate every field,
+        and not when generating the api schema.
+        """
+
+        # Fields can be listed before the serializer is initialized
+        if not hasattr(self, "parent"):
+            return False
+
+        request = self.context.get("request", None)
+        view = self.context.get("view", None)
+
+        return (
+            getattr(request, "query_params", None) is not None
+            and request.method in permissions.SAFE_METHODS
+            and not getattr(view, "swagger_fake_view", False)
+        )
+
+    def get_query_fields(self, param: str) -> Optional[set[str]]:
+        """
+        Get names of fields for this serializer in a query param.
+
+        Returns None if the param does not name fields of this serializer.
+        """
+
+        paths = parse_field_paths(self.context["request"].query_params.get(param))
+        prefix = self.field_path
+        depth = len(prefix)
+
+        names = {
+            path[depth]
+            for path in paths
+            if len(path) > depth and path[:depth] == prefix
+        }
+
+        return names or None
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        if not self.selects_fields:
+            return fields
+
+        requested = self.get_query_fields(self.fields_query_param)
+        expanded = self.get_query_fields(self.expand_query_param) or set()
+
+        if requested is not None:
+            expanded |= requested
+            fields = {key: value for key, value in fields.items() if key in requested}
+
+        for name in getattr(self.Meta, "expandable_fields", []):
+            if name not in expanded:
+                fields.pop(name, None)
+
+        return fields
+
+    def optimize_queryset(
+        self, queryset: models.QuerySet, required: Iterable[str] = ()
+    ) -> models.QuerySet:
+        """
+        Only query the columns and relations of fields that are shown.
+
+        Relations of fields left out by the fields or expand params are no
+        longer joined or prefetched, and nested lists that are shown are
+        prefetched. If fields are chosen, other columns are deferred.
+
+        Parameters
+        ----------
+            - queryset (QuerySet): Query for objects this serializer shows.
+            - required (list[str]): Extra columns to load, like foreign keys.
+        """
+
+        if not self.selects_fields:
+            return queryset
+
+        model = queryset.model
+        fields = self.fields
+
+        # Root attribute each field reads from the object
+        sources = {
+            name: field.source_attrs[0] if field.source_attrs else None
+            for name, field in fields.items()
+        }
+        fields_by_root = {root: fields[name] for name, root in sources.items()}
+        roots = set(sources.values()) | set(required)
+
+        # Only keep prefetches for relations that are shown
+        lookups = []
+        prefetched = set()
+
+        for lookup in queryset._prefetch_related_lookups:
+            path = lookup.prefetch_to if isinstance(lookup, models.Prefetch) else lookup
+            root = path.split(LOOKUP_SEP)[0]
+
+            if root not in roots:
+                continue
+
+            if isinstance(lookup, models.Prefetch) and path == root:
+                child = self._get_nested_model_serializer(fields_by_root.get(root))
+
+                if child is not None and lookup.queryset is not None:
+                    lookup = models.Prefetch(
+                        lookup.prefetch_through,
+                        queryset=child.optimize_queryset(
+                            lookup.queryset,
+                            required=self._get_remote_fields(model, root),
+                        ),
+                        to_attr=lookup.to_attr,
+                    )
+
+            lookups.append(lookup)
+            prefetched.add(root)
+
+        # Prefetch nested lists that are shown, but not prefetched yet
+        for name, field in fields.items():
+            root = sources[name]
+
+            if root in prefetched or not isinstance(
+                field, (serializers.ListSerializer, serializers.ManyRelatedField)
+            ):
+                continue
+
+            child = self._get_nested_model_serializer(field)
+
+            if child is not None:
+                lookups.append(
+                    models.Prefetch(
+                        root,
+                        queryset=child.optimize_queryset(
+                            child.Meta.model.objects.all(),
+                            required=self._get_remote_fields(model, root),
+                        ),
+                    )
+                )
+            else:
+                lookups.append(root)
+
+        queryset = queryset.prefetch_related(None).prefetch_related(*lookups)
+
+        # Join forward relations that are shown, and no others
+        select_related = queryset.query.select_related
+        if select_related is not True:
+            select_related = {
+                key: value
+                for key, value in (select_related or {}).items()
+                if key in roots
+            }
+
+            for name, field in fields.items():
+                if sources[name] is None or sources[name] in select_related:
+                    continue
+
+                if len(field.source_attrs) > 1 or isinstance(
+                    field, serializers.BaseSerializer
+                ):
+                    relation = self._get_model_field(model, sources[name])
+
+                    if relation is not None and (
+                        relation.many_to_one or relation.one_to_one
+                    ):
+                        select_related[sources[name]] = {}
+
+            queryset = queryset.select_related(None)
+            if select_related:
+                queryset = queryset.select_related(
+                    *get_select_related_paths(select_related)
+                )
+
+        if self.get_query_fields(self.fields_query_param) is None:
+            return queryset
+
+        # Defer columns of fields that are left out
+        columns = {model._meta.pk.name, *required}
+        for name in ["created_at", "updated_at"]:
+            if self._get_model_field(model, name) is not None:
+                columns.add(name)
+
+        for root in roots:
+            if root is None or root in required:
+                continue
+
+            model_field = self._get_model_field(model, root)
+
+            # Properties might read any column
+            if model_field is None:
+                return queryset
+
+            if model_field.concrete:
+                columns.add(root)
+
+        return queryset.only(*columns)
+
+    def _get_model_field(self, model: Type[models.Model], name: str):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def _get_nested_model_serializer(self, field) -> Optional["ModelSerializerBase"]:
+        child = getattr(field, "child", field)
+
+        return child if isinstance(child, ModelSerializerBase) else None
+
+    def _get_remote_fields(self, model: Type[models.Model], name: str) -> list[str]:
+        """Foreign keys needed to match prefetched objects to their parents."""
+
+        relation = self._get_model_field(model, name)
+
+        if relation is not None and relation.one_to_many:
+            return [relation.field.name]
+
+        return []
+
     @property
     def unique_fields(self) -> list[str]:
         """Get list of all fields that can be used to unique identify models."""
@@ -1,17 +1,141 @@
 import os
-from typing import Optional, Type
+from typing import Any, Callable, Optional, Type
 
 from django import forms
 from django.core import mail
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections, reset_queries
 from django.http import HttpResponse
 from django.test import TestCase
-from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, reverse
 from rest_framework import serializers, status
 from rest_framework.status import HTTP_200_OK
 from rest_framework.test import APIClient
 
 from users.tests.utils import create_test_adminuser
 
+DEFAULT_QUERY_BUDGET = 10
+"""Most queries a list or detail api route can run, unless set in ``QUERY_BUDGETS``."""
+
+QUERY_BUDGETS: dict[str, int] = {
+    "api-clubs:club-list": 3,
+    "api-clubs:club-members-list": 3,
+    "api-clubs:club-leaderboard": 5,
+    "api-clubs:club-occurrences": 5,
+    "api-clubs:event-list": 4,
+    "api-clubs:event-conflicts": 5,
+    "api-clubs:event-find-conflicts": 4,
+    "api-clubpolls:polls-list": 4,
+    "api-users:me": 4,
+}
+"""Most queries each api route can run for a GET request, by url name."""
+
+
+def format_queries(queries: CaptureQueriesContext):
+    return "\n".join(
+        f"{i}. {query['sql']}" for i, query in enumerate(queries.captured_queries, 1)
+    )
+
+
+class AssertMaxQueriesContext(CaptureQueriesContext):
+    """Fail if more than the given number of queries run in the block."""
+
+    def __init__(self, test_case: TestCase, num: int, connection):
+        self.test_case = test_case
+        self.num = num
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+
+        executed = len(self)
+        self.test_case.assertLessEqual(
+            executed,
+            self.num,
+            f"{executed} queries executed, at most {self.num} expected\n"
+            f"Captured queries were:\n{format_queries(self)}",
+        )
+
+
+class CaptureAllQueriesContext:
+    """
+    Capture queries run on every database alias, like the read replica.
+
+    Unlike ``CaptureQueriesContext``, connections are not opened when
+    entering the block, so aliases a test cannot use are skipped.
+    """
+
+    def __enter__(self):
+        self.initial = {}
+
+        for conn in connections.all():
+            self.initial[conn.alias] = (conn.force_debug_cursor, len(conn.queries_log))
+            conn.force_debug_cursor = True
+
+        # Requests would otherwise clear the query log
+        request_started.disconnect(reset_queries)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        request_started.connect(reset_queries)
+        self.captured_queries = []
+
+        for conn in connections.all():
+            force_debug_cursor, initial = self.initial[conn.alias]
+            conn.force_debug_cursor = force_debug_cursor
+            self.captured_queries.extend(
+                {**query, "sql": f"[{conn.alias}] {query['sql']}"}
+                for query in list(conn.queries_log)[initial:]
+            )
+
+    def __len__(self):
+        return len(self.captured_queries)
+
+
+class QueryBudgetAPIClient(APIClient):
+    """
+    Api client that fails GET requests running more queries than their budget.
+
+    Every list and detail route has a budget of ``DEFAULT_QUERY_BUDGET``,
+    other routes are only checked if they are listed in ``QUERY_BUDGETS``.
+    Queries on every database alias count towards the budget.
+    """
+
+    budgets = QUERY_BUDGETS
+
+    def get_query_budget(self, view_name: str) -> Optional[int]:
+        if view_name in self.budgets:
+            return self.budgets[view_name]
+        elif view_name.endswith("-list") or view_name.endswith("-detail"):
+            return DEFAULT_QUERY_BUDGET
+
+        return None
+
+    def request(self, **kwargs):
+        if kwargs.get("REQUEST_METHOD") != "GET":
+            return super().request(**kwargs)
+
+        with CaptureAllQueriesContext() as queries:
+            response = super().request(**kwargs)
+
+        try:
+            view_name = response.resolver_match.view_name
+        except Resolver404:
+            return response
+
+        budget = self.get_query_budget(view_name)
+
+        if budget is not None and len(queries) > budget:
+            raise AssertionError(
+                f"{view_name} ran {len(queries)} queries, its budget is {budget}\n"
+                f"Captured queries were:\n{format_queries(queries)}"
+            )
+
+        return response
+
 
 class TestsBase(TestCase):
     """Abstract testing utilities."""
@@ -61,12 +185,71 @@ class TestsBase(TestCase):
 
         self.assertTrue(serializer.is_valid(), serializer.errors)
 
+    def assertMaxQueries(
+        self, num: int, func=None, *args, using=DEFAULT_DB_ALIAS, **kwargs
+    ):
+        """
+        Should run at most num queries.
+
+        Use as a context manager, or pass a function to call with args and kwargs.
+        """
+
+        context = AssertMaxQueriesContext(self, num, connections[using])
+        if func is None:
+            return context
+
+        with context:
+            func(*args, **kwargs)
+
+    def assertQueriesConstant(
+        self,
+        func: Callable[[], Any],
+        create_objects: Callable[[int], Any],
+        sizes=(2, 10),
+        using=DEFAULT_DB_ALIAS,
+    ):
+        """
+        Query count of func should not grow with the size of the dataset.
+
+        Calls ``create_objects(count)`` to add objects until the dataset has
+        each size, then counts the queries of ``func()``. Query counts growing
+        with the dataset are usually caused by N+1 queries.
+        """
+
+        results = []
+        created = 0
+
+        for size in sizes:
+            create_objects(size - created)
+            created = size
+
+            with CaptureQueriesContext(connections[using]) as queries:
+                func()
+
+            results.append((size, queries))
+
+        (first_size, first), (last_size, last) = results[0], results[-1]
+        self.assertEqual(
+            len(first),
+            len(last),
+            f"Queries grew from {len(first)} to {len(last)} when dataset grew "
+            f"from {first_size} to {last_size}\n"
+            f"Captured queries were:\n{format_queries(last)}",
+        )
+
 
 class ApiTestsBase(TestsBase):
-    """Abstract testing utilities for api testing."""
+    """
+    Abstract testing utilities for api testing.
+
+    GET requests made with the test client are checked against the
+    route's query budget, see ``QueryBudgetAPIClient``.
+    """
+
+    client_class = QueryBudgetAPIClient
 
     def setUp(self):
-        self.client = APIClient()
+        self.client = self.client_class()
 
     def assertOk(self, reverse_url: str, reverse_kwargs=None):
         """The response for a reversed url should be 200 ok."""
@@ -112,7 +295,7 @@ class AuthApiTestsBase(ApiTestsBase):
         super().setUp()
         self.user = create_test_adminuser()
 
-        self.client = APIClient()
+        self.client = self.client_class()
         self.client.force_authenticate(user=self.user)
 
 
@@ -168,7 +351,7 @@ class AuthViewsTestsBase(ViewTestsBase):
         super().setUp()
         self.user = create_test_adminuser()
 
-        self.client = APIClient()
+        self.client = self.client_class()
         self.client.force_authenticate(user=self.user)
 
 
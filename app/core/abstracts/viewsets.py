@@ -1,16 +1,285 @@
-from rest_framework import authentication, permissions
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import exceptions, permissions, status
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
+from core.abstracts.serializers import ModelSerializerBase
+from core.authentication import CachedTokenAuthentication
+from core.db.routers import use_replica
+
+
+class PreconditionFailed(exceptions.APIException):
+    """Object changed since the client fetched it, see `If-Match`."""
+
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The object was changed since it was last fetched."
+    default_code = "precondition_failed"
+
+
+FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        ModelSerializerBase.fields_query_param,
+        str,
+        description="Comma separated fields to show, use dots for nested fields.",
+    ),
+    OpenApiParameter(
+        ModelSerializerBase.expand_query_param,
+        str,
+        description="Comma separated nested fields to show, hidden by default.",
+    ),
+]
+
 
 class ViewSetBase(GenericViewSet):
     """Provide core functionality for most viewsets."""
 
     authentication_classes = [
-        authentication.TokenAuthentication,
+        CachedTokenAuthentication,
         # authentication.SessionAuthentication,
     ]
     permission_classes = [permissions.IsAuthenticated]
 
 
 class ModelViewSetBase(ModelViewSet, ViewSetBase):
-    """Base viewset for model CRUD operations."""
+    """
+    Base viewset for model CRUD operations.
+
+    Responses include an ETag and Last-Modified header, computed from the
+    ``updated_at`` field of objects instead of the response body. Requests
+    with `If-None-Match` or `If-Modified-Since` get a 304 response before
+    objects are serialized, and writes with an outdated `If-Match` header
+    get a 412 response.
+
+    Nested relations in responses are listed in ``related_validators``, so
+    the ETag changes when related objects are added, removed or updated.
+    """
+
+    replica_reads = True
+    """Run GET requests against the read replica, if one is configured."""
+
+    conditional_requests = True
+    """Answer conditional requests, only if the model has an updated_at field."""
+
+    related_validators: list[str] = []
+    """Nested relations in responses, their count and last update change the ETag."""
+
+    response_validators: Optional[tuple[str, Optional[datetime]]] = None
+    """ETag and last modified date of the response, set by the action."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.replica_reads and request.method in permissions.SAFE_METHODS:
+            with use_replica():
+                return super().dispatch(request, *args, **kwargs)
+
+        return super().dispatch(request, *args, **kwargs)
+
+    @property
+    def supports_conditional_requests(self):
+        if not self.conditional_requests:
+            return False
+
+        try:
+            self.get_queryset().model._meta.get_field("updated_at")
+        except FieldDoesNotExist:
+            return False
+
+        return True
+
+    def get_etag(self, *values) -> str:
+        """
+        Get ETag from values that change when the response changes.
+
+        Tags are not weak, even though they are not computed from the body,
+        since `If-Match` only compares strong tags.
+        """
+
+        label = self.get_queryset().model._meta.label
+        value = ":".join(str(v) for v in (label, *values))
+        digest = hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()
+
+        return f'"{digest}"'
+
+    def get_related_aggregates(self) -> dict[str, models.Aggregate]:
+        """Get count and last update of each relation in ``related_validators``."""
+
+        aggregates = {}
+
+        for relation in self.related_validators:
+            name = relation.replace("__", "_")
+            aggregates[f"validator_{name}_count"] = models.Count(
+                relation, distinct=True
+            )
+            aggregates[f"validator_{name}_modified"] = models.Max(
+                f"{relation}__updated_at"
+            )
+
+        return aggregates
+
+    def get_last_modified(self, *dates: Optional[datetime]) -> Optional[datetime]:
+        dates = [date for date in dates if date is not None]
+        return max(dates) if len(dates) > 0 else None
+
+    def get_list_validators(self, queryset: models.QuerySet):
+        """Get ETag and last modified date for a list of objects, in one query."""
+
+        related = self.get_related_aggregates()
+        result = queryset.aggregate(
+            count=models.Count("pk", distinct=len(related) > 0),
+            last_modified=models.Max("updated_at"),
+            **related,
+        )
+        values = list(result.values())
+        last_modified = self.get_last_modified(
+            result["last_modified"],
+            *(result[name] for name in related if name.endswith("_modified")),
+        )
+
+        return self.get_etag(*values), last_modified
+
+    def get_object_validators(self, instance: models.Model):
+        """
+        Get ETag and last modified date for an object.
+
+        Related aggregates are annotated by ``filter_queryset``, objects
+        loaded elsewhere are aggregated in a separate query.
+        """
+
+        related = self.get_related_aggregates()
+        values = {name: getattr(instance, name, None) for name in related}
+
+        if any(not hasattr(instance, name) for name in related):
+            values = (
+                type(instance)
+                ._default_manager.filter(pk=instance.pk)
+                .aggregate(**related)
+            )
+
+        etag = self.get_etag(instance.pk, instance.updated_at, *values.values())
+        last_modified = self.get_last_modified(
+            instance.updated_at,
+            *(values[name] for name in related if name.endswith("_modified")),
+        )
+
+        return etag, last_modified
+
+    def evaluate_preconditions(
+        self, etag: str, last_modified: Optional[datetime]
+    ) -> Optional[HttpResponse]:
+        """Get 304 or 412 response if conditional headers fail, otherwise None."""
+
+        return get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+
+    def check_object_preconditions(self, instance: models.Model):
+        """
+        Stop writes to an object that changed since the client fetched it.
+
+        The object is locked until the transaction ends, so concurrent writes
+        with the same `If-Match` header cannot both pass. Must be called in
+        the transaction that writes the object.
+        """
+
+        if not self.supports_conditional_requests:
+            return
+
+        headers = self.request.headers
+        if "If-Match" not in headers and "If-Unmodified-Since" not in headers:
+            return
+
+        instance.updated_at = (
+            type(instance)
+            ._default_manager.select_for_update()
+            .filter(pk=instance.pk)
+            .values_list("updated_at", flat=True)
+            .get()
+        )
+
+        etag, last_modified = self.get_object_validators(instance)
+
+        if self.evaluate_preconditions(etag, last_modified) is not None:
+            raise PreconditionFailed()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        detail_actions = ("retrieve", "update", "partial_update", "destroy")
+        if self.action in detail_actions and self.supports_conditional_requests:
+            queryset = queryset.annotate(**self.get_related_aggregates())
+
+        if self.action not in ("list", "retrieve"):
+            return queryset
+
+        serializer = self.get_serializer()
+        if isinstance(serializer, ModelSerializerBase):
+            queryset = serializer.optimize_queryset(queryset)
+
+        return queryset
+
+    @extend_schema(parameters=FIELDS_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        if not self.supports_conditional_requests:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        self.response_validators = self.get_list_validators(queryset)
+
+        response = self.evaluate_preconditions(*self.response_validators)
+        if response is not None:
+            return response
+
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(parameters=FIELDS_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        if not self.supports_conditional_requests:
+            return super().retrieve(request, *args, **kwargs)
+
+        instance = self.get_object()
+        self.response_validators = self.get_object_validators(instance)
+
+        response = self.evaluate_preconditions(*self.response_validators)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            self.check_object_preconditions(serializer.instance)
+            super().perform_update(serializer)
+
+        if self.supports_conditional_requests:
+            self.response_validators = self.get_object_validators(serializer.instance)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            self.check_object_preconditions(instance)
+            super().perform_destroy(instance)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if self.response_validators is not None and (
+            status.is_success(response.status_code)
+            or response.status_code == status.HTTP_304_NOT_MODIFIED
+        ):
+            etag, last_modified = self.response_validators
+            response.headers["ETag"] = etag
+
+            if last_modified is not None:
+                response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+
+        return response
@@ -0,0 +1,146 @@
+"""
+Authenticate API requests.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+
+TOKEN_USER_FIELDS = ("id", "username", "email", "is_active", "is_staff", "is_superuser")
+"""User fields stored with a token, other fields are loaded when accessed."""
+
+
+def get_token_cache_key(key: str):
+    """Tokens are hashed, so cached keys cannot be used as credentials."""
+
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"auth:token:{digest}"
+
+
+class LocalTokenCache:
+    """
+    In-process LRU cache of token users, in front of the shared cache.
+
+    Entries expire after a few seconds, since other processes cannot
+    invalidate them.
+    """
+
+    def __init__(self, size: int, timeout: float):
+        self.size = size
+        self.timeout = timeout
+        self._items: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get(cache_key, None)
+            if item is None:
+                return None
+
+            expires_at, data = item
+            if expires_at < time.monotonic():
+                del self._items[cache_key]
+                return None
+
+            self._items.move_to_end(cache_key)
+            return data
+
+    def set(self, cache_key: str, data: dict):
+        if self.size <= 0:
+            return
+
+        with self._lock:
+            self._items[cache_key] = (time.monotonic() + self.timeout, data)
+            self._items.move_to_end(cache_key)
+
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def delete(self, cache_key: str):
+        with self._lock:
+            self._items.pop(cache_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+local_token_cache = LocalTokenCache(
+    size=settings.TOKEN_AUTH_LOCAL_CACHE_SIZE,
+    timeout=settings.TOKEN_AUTH_LOCAL_CACHE_TIMEOUT,
+)
+
+
+def clear_token_cache(*keys: str):
+    """Remove tokens from cache, next request will query the database."""
+
+    cache_keys = [get_token_cache_key(key) for key in keys]
+    cache.delete_many(cache_keys)
+
+    for cache_key in cache_keys:
+        local_token_cache.delete(cache_key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token's user.
+
+    Stores the user id and a few fields for each token, so authenticated
+    requests do not query the database before the view runs. Other user
+    fields are deferred, and loaded when accessed.
+
+    Cached tokens are removed when the token is deleted, or the user is
+    changed, see ``core.signals``.
+    """
+
+    model = Token
+
+    def get_user(self, data: dict) -> User:
+        """Create user from cached fields, other fields are deferred."""
+
+        # Values need to be in the same order as the model's fields
+        values = [
+            data[field.attname]
+            for field in User._meta.concrete_fields
+            if field.attname in data
+        ]
+        return User.from_db(router.db_for_read(User), list(data.keys()), values)
+
+    def get_token_data(self, key: str) -> dict:
+        try:
+            token = self.get_model().objects.select_related("user").get(key=key)
+        except self.get_model().DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+        return {field: getattr(token.user, field) for field in TOKEN_USER_FIELDS}
+
+    def authenticate_credentials(self, key: str):
+        cache_key = get_token_cache_key(key)
+        data = local_token_cache.get(cache_key)
+
+        if data is None:
+            data = cache.get(cache_key)
+
+            if data is None:
+                data = self.get_token_data(key)
+                cache.set(cache_key, data, timeout=settings.TOKEN_AUTH_CACHE_TIMEOUT)
+
+            local_token_cache.set(cache_key, data)
+
+        if not data["is_active"]:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        user = self.get_user(data)
+        return (user, self.get_model()(key=key, user=user))
@@ -1,26 +1,69 @@
-import re
+from typing import Optional
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import Permission
-from django.shortcuts import get_object_or_404
+from django.core.exceptions import PermissionDenied
+from django.db import models
 
 from core.abstracts.models import Scope
+from core.metrics import get_histogram
 from utils.permissions import get_permission
 
 User = get_user_model()
 
+login_duration = get_histogram(
+    "login_duration_seconds", "Time to verify login credentials."
+)
+
 
 class CustomBackend(ModelBackend):
     """Custom backend for managing permissions, etc."""
 
-    def authenticate(self, request, username=None, **kwargs):
-        # Email Regex from: https://www.geeksforgeeks.org/check-if-email-address-valid-or-not-in-python/
+    def get_login_user(self, username: str) -> Optional[User]:
+        """Find user by username or email ignoring case, in a single query."""
+
+        users = list(
+            User.objects.filter(
+                models.Q(username__iexact=username) | models.Q(email__iexact=username)
+            )
+        )
+
+        # Usernames take priority if another user has it as their email
+        users.sort(
+            key=lambda user: (
+                user.username.lower() != username.lower(),
+                user.username != username,
+            )
+        )
+
+        return users[0] if len(users) > 0 else None
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """
+        Verify username or email, and password.
+
+        Passwords hashed with outdated hasher settings are rehashed. If the
+        password is wrong, other backends are not checked. Unknown users
+        are left to other backends.
+        """
+
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD, None)
+
+        if username is None or password is None:
+            return None
+
+        with login_duration.time():
+            user = self.get_login_user(username)
+
+            if user is None:
+                return None
 
-        if re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", username):
-            username = get_object_or_404(User, email=username)
+            if not (user.check_password(password) and self.user_can_authenticate(user)):
+                raise PermissionDenied
 
-        return super().authenticate(request, username, **kwargs)
+        return user
 
     def get_club_permissions(self, user_obj, club, obj=None):
         """Get list of permissions user has with a club."""
@@ -0,0 +1,3 @@
+"""
+Measure request and service performance against a generated dataset.
+"""
@@ -0,0 +1,337 @@
+"""
+Generate a large dataset for benchmarks.
+"""
+
+import ipaddress
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+
+from analytics.models import Link, LinkVisit
+from clubs.consts import INITIAL_CLUB_ROLES
+from clubs.models import Club, ClubMembership, ClubRole, Event
+from clubs.polls.models import Poll, PollField, PollInputType, PollQuestion
+from users.models import Profile, User
+from utils.permissions import get_permission
+
+T = TypeVar("T")
+
+BENCH_EMAIL_DOMAIN = "bench.test"
+BENCH_PASSWORD = "benchpass123"
+
+VISITOR_NETWORK = int(ipaddress.ip_address("10.0.0.0"))
+"""Link visitors are given consecutive addresses starting here."""
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Split items into lists of at most size, without loading all of them."""
+
+    chunk = []
+    for item in items:
+        chunk.append(item)
+
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def get_visitor_ip(index: int) -> str:
+    return str(ipaddress.ip_address(VISITOR_NETWORK + index))
+
+
+@dataclass
+class BenchDataset:
+    """Ids of generated objects, used by scenarios."""
+
+    prefix: str
+    club_ids: list[int] = field(default_factory=list)
+    user_ids: list[int] = field(default_factory=list)
+    events: list[tuple[int, int]] = field(default_factory=list)
+    """Pairs of event id and club id."""
+    link_ids: list[int] = field(default_factory=list)
+    visitors_per_link: int = 0
+    poll_id: Optional[int] = None
+
+    @property
+    def club_prefix(self):
+        return f"Bench {self.prefix} "
+
+    def get_email(self, name: str):
+        return f"{self.prefix}{name}@{BENCH_EMAIL_DOMAIN}"
+
+    @property
+    def users(self):
+        return User.objects.filter(
+            email__startswith=self.prefix, email__endswith=f"@{BENCH_EMAIL_DOMAIN}"
+        )
+
+    @property
+    def clubs(self):
+        return Club.objects.filter(name__startswith=self.club_prefix)
+
+    @classmethod
+    def load(cls, prefix: str) -> "BenchDataset":
+        """Find objects generated by a previous run."""
+
+        dataset = cls(prefix=prefix)
+        dataset.club_ids = list(dataset.clubs.values_list("id", flat=True))
+        dataset.user_ids = list(dataset.users.values_list("id", flat=True))
+        dataset.events = list(
+            Event.objects.filter(club_id__in=dataset.club_ids).values_list(
+                "id", "club_id"
+            )
+        )
+        dataset.link_ids = list(
+            Link.objects.filter(club_id__in=dataset.club_ids).values_list(
+                "id", flat=True
+            )
+        )
+        dataset.poll_id = (
+            Poll.objects.filter(name=dataset.club_prefix.strip())
+            .values_list("id", flat=True)
+            .first()
+        )
+
+        if len(dataset.link_ids) > 0:
+            visits = LinkVisit.objects.filter(link_id__in=dataset.link_ids).count()
+            dataset.visitors_per_link = visits // len(dataset.link_ids)
+
+        return dataset
+
+    def clear(self):
+        """Delete generated objects, and any created while benchmarking."""
+
+        Poll.objects.filter(name=self.club_prefix.strip()).delete()
+        self.clubs.delete()
+        self.users.delete()
+
+
+class BenchDataGenerator:
+    """
+    Insert a realistic amount of data with bulk queries.
+
+    Model signals do not run for bulk inserts, so objects normally created
+    by signals (profiles, default club roles) are inserted here as well.
+
+    Parameters
+    ----------
+        - users (int): Number of users, each a member of some clubs.
+        - clubs (int): Number of clubs, each with roles, events, and a link.
+        - visits (int): Number of link visits, spread across club links.
+        - events_per_club (int): Number of events for each club, around today.
+        - memberships_per_user (int): Number of clubs each user is a member of.
+        - batch_size (int): Number of rows inserted per query.
+        - log (Callable): Report progress.
+    """
+
+    def __init__(
+        self,
+        users=100_000,
+        clubs=500,
+        visits=1_000_000,
+        events_per_club=20,
+        memberships_per_user=2,
+        batch_size=5000,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self.user_count = users
+        self.club_count = clubs
+        self.visit_count = visits
+        self.events_per_club = events_per_club
+        self.memberships_per_user = min(memberships_per_user, clubs)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+
+        self.dataset = BenchDataset(prefix=f"b{uuid.uuid4().hex[:6]}")
+
+    def bulk_create(self, model, objs: Iterable, label: str):
+        """Insert objects in batches, return their ids."""
+
+        started = time.perf_counter()
+        ids = []
+
+        for batch in chunked(objs, self.batch_size):
+            created = model.objects.bulk_create(batch, batch_size=self.batch_size)
+            ids.extend(obj.pk for obj in created)
+
+        self.log(
+            f"  {label:<20} {len(ids):>10} in {time.perf_counter() - started:.1f}s"
+        )
+        return ids
+
+    def generate(self) -> BenchDataset:
+        """Insert all objects, return their ids."""
+
+        self.log(f"Generating dataset {self.dataset.prefix}...")
+
+        self.generate_users()
+        self.generate_clubs()
+        self.generate_memberships()
+        self.generate_events()
+        self.generate_links()
+        self.generate_poll()
+
+        with connection.cursor() as cursor:
+            for model in (User, ClubMembership, Event, LinkVisit):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+        return self.dataset
+
+    def generate_users(self):
+        # Hashing is slow on purpose, every user shares the same hash
+        password = make_password(BENCH_PASSWORD)
+
+        users = (
+            User(
+                username=self.dataset.get_email(str(i)).split("@")[0],
+                email=self.dataset.get_email(str(i)),
+                password=password,
+            )
+            for i in range(self.user_count)
+        )
+        self.dataset.user_ids = self.bulk_create(User, users, "users")
+
+        profiles = (
+            Profile(user_id=user_id, first_name="Bench", last_name=str(i))
+            for i, user_id in enumerate(self.dataset.user_ids)
+        )
+        self.bulk_create(Profile, profiles, "profiles")
+
+    def generate_clubs(self):
+        clubs = (
+            Club(
+                name=f"{self.dataset.club_prefix}{i}",
+                alias=f"B{uuid.uuid4().hex[:6]}",
+                about="Generated for benchmarks.",
+            )
+            for i in range(self.club_count)
+        )
+        self.dataset.club_ids = self.bulk_create(Club, clubs, "clubs")
+
+        roles = [
+            ClubRole(club_id=club_id, name=role["name"], default=role["default"])
+            for club_id in self.dataset.club_ids
+            for role in INITIAL_CLUB_ROLES
+        ]
+        self.bulk_create(ClubRole, roles, "club roles")
+
+        role_permissions = {
+            role["name"]: [get_permission(label).id for label in role["permissions"]]
+            for role in INITIAL_CLUB_ROLES
+        }
+        through = ClubRole.permissions.through
+        self.bulk_create(
+            through,
+            (
+                through(clubrole_id=role.id, permission_id=permission_id)
+                for role in roles
+                for permission_id in role_permissions[role.name]
+            ),
+            "role permissions",
+        )
+
+        self.default_role_ids = {
+            role.club_id: role.id for role in roles if role.default
+        }
+
+    def generate_memberships(self):
+        club_ids = self.dataset.club_ids
+
+        memberships = (
+            ClubMembership(
+                club_id=club_ids[(i * 7 + offset) % len(club_ids)],
+                user_id=user_id,
+                points=i % 100,
+            )
+            for i, user_id in enumerate(self.dataset.user_ids)
+            for offset in range(self.memberships_per_user)
+        )
+        membership_ids = []
+        membership_clubs = []
+
+        for batch in chunked(memberships, self.batch_size):
+            ClubMembership.objects.bulk_create(batch)
+            membership_ids.extend(membership.id for membership in batch)
+            membership_clubs.extend(membership.club_id for membership in batch)
+
+        self.log(f"  {'memberships':<20} {len(membership_ids):>10}")
+
+        through = ClubMembership.roles.through
+        self.bulk_create(
+            through,
+            (
+                through(
+                    clubmembership_id=membership_id,
+                    clubrole_id=self.default_role_ids[club_id],
+                )
+                for membership_id, club_id in zip(membership_ids, membership_clubs)
+            ),
+            "membership roles",
+        )
+
+    def generate_events(self):
+        now = timezone.now()
+        first_start = now - timedelta(days=self.events_per_club // 2)
+
+        events = (
+            Event(
+                name=f"Event {i}",
+                club_id=club_id,
+                location=f"Room {i % 50}",
+                start_at=first_start + timedelta(days=i),
+                end_at=first_start + timedelta(days=i, hours=2),
+            )
+            for club_id in self.dataset.club_ids
+            for i in range(self.events_per_club)
+        )
+
+        self.dataset.events = []
+        for batch in chunked(events, self.batch_size):
+            Event.objects.bulk_create(batch)
+            self.dataset.events.extend((event.id, event.club_id) for event in batch)
+
+        self.log(f"  {'events':<20} {len(self.dataset.events):>10}")
+
+    def generate_links(self):
+        links = (
+            Link(club_id=club_id, target_url="https://example.com", display_name="Home")
+            for club_id in self.dataset.club_ids
+        )
+        self.dataset.link_ids = self.bulk_create(Link, links, "links")
+
+        link_ids = self.dataset.link_ids
+        self.dataset.visitors_per_link = self.visit_count // len(link_ids)
+
+        # Visitor addresses are unique per link
+        visits = (
+            LinkVisit(
+                link_id=link_ids[i % len(link_ids)],
+                ipaddress=get_visitor_ip(i // len(link_ids)),
+                amount=1 + i % 5,
+            )
+            for i in range(self.dataset.visitors_per_link * len(link_ids))
+        )
+        self.bulk_create(LinkVisit, visits, "link visits")
+
+    def generate_poll(self, question_count=10):
+        poll = Poll.objects.create(name=self.dataset.club_prefix.strip())
+
+        for order in range(question_count):
+            field = PollField.objects.create(poll=poll, order=order)
+            PollQuestion.objects.create(
+                field=field,
+                label=f"Question {order}?",
+                input_type=PollInputType.TEXT,
+                create_input=True,
+            )
+
+        self.dataset.poll_id = poll.id
@@ -0,0 +1,561 @@
+"""
+Send concurrent traffic to a server, like the start of a club meeting.
+"""
+
+import http.client
+import random
+import secrets
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from importlib import import_module
+from typing import Optional, Type, TypedDict
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from clubs.polls.models import PollQuestion
+from core.benchmarks.data import BenchDataset, get_visitor_ip
+from core.benchmarks.scenarios import get_percentiles
+from users.models import User
+
+
+@dataclass
+class LoadUser:
+    """User logged in before the load test starts."""
+
+    id: int
+    session_key: str
+    token: str
+    csrf_token: str = field(default_factory=lambda: secrets.token_hex(16))
+
+    @property
+    def cookies(self):
+        return (
+            f"{settings.SESSION_COOKIE_NAME}={self.session_key}; "
+            f"{settings.CSRF_COOKIE_NAME}={self.csrf_token}"
+        )
+
+
+@dataclass
+class LoadRequest:
+    method: str
+    path: str
+    headers: dict[str, str] = field(default_factory=dict)
+    body: Optional[bytes] = None
+
+
+class LoadScenarioResult(TypedDict):
+    name: str
+    requests: int
+    errors: int
+    error_rate: float
+    throughput: float
+    """Requests per second."""
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    statuses: dict[str, int]
+    """Number of responses for each status, or the error for failed requests."""
+
+
+class LockWaitResult(TypedDict):
+    samples: int
+    max_waiting: int
+    """Most queries waiting on a lock at the same time."""
+    mean_waiting: float
+    max_wait_ms: float
+    """Longest time a query was seen waiting on a lock."""
+    deadlocks: int
+
+
+class LoadTestReport(TypedDict):
+    duration: float
+    concurrency: int
+    scenarios: list[LoadScenarioResult]
+    total: LoadScenarioResult
+    lock_waits: LockWaitResult
+
+
+class LoadScenario:
+    """
+    Build requests for one kind of traffic.
+
+    Parameters
+    ----------
+        - dataset (BenchDataset): Generated objects to use in requests.
+        - users (list[LoadUser]): Logged in users to send requests as.
+        - hot_events (int): Number of events users check in to, most traffic
+            at the start of a meeting is for a single event.
+    """
+
+    name: str
+    description = ""
+    expected_status = 200
+
+    def __init__(self, dataset: BenchDataset, users: list[LoadUser], hot_events=1):
+        self.dataset = dataset
+        self.users = users
+        self.hot_events = dataset.events[: max(hot_events, 1)]
+
+    def get_request(self, rng: random.Random) -> LoadRequest:
+        raise NotImplementedError
+
+
+class LinkRedirectLoad(LoadScenario):
+    name = "link_redirect"
+    description = "New visitors following the same club link."
+    expected_status = 302
+
+    def get_request(self, rng):
+        link_id = self.dataset.link_ids[0]
+        visitor = self.dataset.visitors_per_link + rng.randrange(1_000_000)
+
+        return LoadRequest(
+            "GET",
+            reverse("redirect-link", kwargs={"link_id": link_id}),
+            headers={"X-Forwarded-For": get_visitor_ip(visitor)},
+        )
+
+
+class CheckinLoad(LoadScenario):
+    name = "checkin"
+    description = "Logged in users recording attendance for the same event."
+    expected_status = 302
+
+    def get_request(self, rng):
+        event_id, club_id = rng.choice(self.hot_events)
+
+        return LoadRequest(
+            "GET",
+            reverse(
+                "clubs:join-event", kwargs={"club_id": club_id, "event_id": event_id}
+            ),
+            headers={"Cookie": rng.choice(self.users).cookies},
+        )
+
+
+class PollRenderLoad(LoadScenario):
+    name = "poll_render"
+    description = "Anonymous users opening a poll."
+
+    def get_request(self, rng):
+        return LoadRequest(
+            "GET", reverse("clubs:polls:poll", kwargs={"poll_id": self.dataset.poll_id})
+        )
+
+
+class PollSubmitLoad(LoadScenario):
+    name = "poll_submit"
+    description = "Logged in users submitting a poll."
+    expected_status = 302
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.field_names = [
+            question.html_name
+            for question in PollQuestion.objects.filter(
+                field__poll_id=self.dataset.poll_id
+            ).select_related("field")
+        ]
+
+    def get_request(self, rng):
+        user = rng.choice(self.users)
+        body = urlencode(
+            {
+                "csrfmiddlewaretoken": user.csrf_token,
+                **{name: "Answer" for name in self.field_names},
+            }
+        )
+
+        return LoadRequest(
+            "POST",
+            reverse("clubs:polls:poll", kwargs={"poll_id": self.dataset.poll_id}),
+            headers={
+                "Cookie": user.cookies,
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
+            body=body.encode(),
+        )
+
+
+class ClubListLoad(LoadScenario):
+    name = "club_list"
+    description = "Users loading clubs via REST api with their token."
+
+    def get_request(self, rng):
+        return LoadRequest(
+            "GET",
+            reverse("api-clubs:club-list"),
+            headers={"Authorization": f"Token {rng.choice(self.users).token}"},
+        )
+
+
+LOAD_SCENARIOS: dict[str, Type[LoadScenario]] = {
+    scenario.name: scenario
+    for scenario in (
+        LinkRedirectLoad,
+        CheckinLoad,
+        PollRenderLoad,
+        PollSubmitLoad,
+        ClubListLoad,
+    )
+}
+
+DEFAULT_MIX = "link_redirect=4,checkin=4,poll_render=1,poll_submit=1"
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """
+    Get weight of each scenario from string like ``checkin=4,poll_render=1``.
+
+    Raises ValueError if a scenario is unknown, or weight is not a number.
+    """
+
+    mix = {}
+
+    for item in value.split(","):
+        name, _, weight = item.strip().partition("=")
+
+        if name not in LOAD_SCENARIOS:
+            raise ValueError(f"Unknown scenario {name}.")
+
+        mix[name] = int(weight or 1)
+
+    return mix
+
+
+def create_load_users(user_ids: list[int]) -> list[LoadUser]:
+    """Log in users ahead of time, with a session and token each."""
+
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+    backend = settings.AUTHENTICATION_BACKENDS[0]
+    load_users = []
+
+    Token.objects.bulk_create(
+        [Token(user_id=user_id, key=Token.generate_key()) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    token_keys = dict(
+        Token.objects.filter(user_id__in=user_ids).values_list("user_id", "key")
+    )
+
+    for user in User.objects.filter(id__in=user_ids):
+        session = SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = backend
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+
+        load_users.append(LoadUser(user.id, session.session_key, token_keys[user.id]))
+
+    return load_users
+
+
+def delete_load_users(load_users: list[LoadUser]):
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+
+    for load_user in load_users:
+        SessionStore().delete(load_user.session_key)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Do not log every request made during the load test."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LoadTestServer(ThreadedWSGIServer):
+    """
+    Local server, accepting many connections at once.
+
+    Requests are handled by a fixed number of threads, like worker processes
+    in production, so each thread can keep its database connection open
+    between requests when ``CONN_MAX_AGE`` is set.
+    """
+
+    request_queue_size = 1024
+
+    def __init__(self, *args, threads=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = threads
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="load-server"
+        )
+
+    @classmethod
+    def start(cls, host="127.0.0.1", port=0, threads=8) -> "LoadTestServer":
+        """Serve the project in a background thread, on a free port by default."""
+
+        server = cls(
+            (host, port),
+            QuietRequestHandler,
+            allow_reuse_address=False,
+            threads=threads,
+        )
+        server.set_app(get_wsgi_application())
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_port}"
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def _close_connections(self):
+        # Database connections are closed after each request, or kept open
+        # depending on CONN_MAX_AGE, instead of after each client connection
+        pass
+
+    def stop(self):
+        self.shutdown()
+
+        # Each thread closes the database connections it kept open
+        barrier = threading.Barrier(self.threads)
+
+        def close_connections():
+            barrier.wait(timeout=10)
+            connections.close_all()
+
+        for _ in range(self.threads):
+            self.executor.submit(close_connections)
+
+        self.executor.shutdown(wait=True)
+        self.server_close()
+
+
+@contextmanager
+def override_conn_max_age(value: int):
+    """Change how long connections are kept, for connections opened after."""
+
+    previous = {
+        alias: connections.settings[alias]["CONN_MAX_AGE"] for alias in connections
+    }
+
+    for alias in connections:
+        connections.settings[alias]["CONN_MAX_AGE"] = value
+
+    try:
+        yield
+    finally:
+        for alias, max_age in previous.items():
+            connections.settings[alias]["CONN_MAX_AGE"] = max_age
+
+
+class LockMonitor:
+    """Sample queries waiting on database locks, in a background thread."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.samples: list[tuple[int, float]] = []
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def get_deadlocks(self) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT deadlocks FROM pg_stat_database "
+                "WHERE datname = current_database()"
+            )
+            return cursor.fetchone()[0]
+
+    def sample(self) -> tuple[int, float]:
+        """Get number of queries waiting on a lock, and longest wait in ms."""
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT count(*),
+                    COALESCE(EXTRACT(EPOCH FROM max(now() - waitstart)) * 1000, 0)
+                FROM pg_locks
+                WHERE NOT granted AND database = (
+                    SELECT oid FROM pg_database WHERE datname = current_database()
+                )
+                """
+            )
+            count, wait_ms = cursor.fetchone()
+
+        return count, float(wait_ms)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                self.samples.append(self.sample())
+        finally:
+            connection.close()
+
+    def start(self):
+        self.deadlocks = self.get_deadlocks()
+        self._thread.start()
+
+    def stop(self) -> LockWaitResult:
+        self._stop.set()
+        self._thread.join()
+
+        waiting = [count for count, _ in self.samples] or [0]
+
+        return {
+            "samples": len(self.samples),
+            "max_waiting": max(waiting),
+            "mean_waiting": sum(waiting) / len(waiting),
+            "max_wait_ms": max((wait_ms for _, wait_ms in self.samples), default=0),
+            "deadlocks": self.get_deadlocks() - self.deadlocks,
+        }
+
+
+class LoadTest:
+    """
+    Send requests from many workers at once, for a fixed duration.
+
+    Workers start one at a time over the ramp up period, then each picks
+    a scenario by weight and sends its request, waiting for the response
+    before sending the next.
+
+    Parameters
+    ----------
+        - url (str): Base url of the server, ex: http://127.0.0.1:8000.
+        - scenarios (dict[LoadScenario, int]): Weight of each scenario.
+        - concurrency (int): Number of workers sending requests.
+        - duration (float): Seconds to send requests for, including ramp up.
+        - ramp_up (float): Seconds until all workers have started.
+        - timeout (float): Seconds to wait for a response.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        scenarios: dict[LoadScenario, int],
+        concurrency=50,
+        duration=30.0,
+        ramp_up=5.0,
+        timeout=10.0,
+    ):
+        parts = urlsplit(url)
+        self.connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.host = parts.netloc
+        self.path_prefix = parts.path.rstrip("/")
+
+        self.scenarios = list(scenarios.keys())
+        self.weights = list(scenarios.values())
+        self.concurrency = concurrency
+        self.duration = duration
+        self.ramp_up = min(ramp_up, duration)
+        self.timeout = timeout
+
+    def send(self, request: LoadRequest) -> str:
+        """Send request, return response status or name of error."""
+
+        conn = self.connection_class(self.host, timeout=self.timeout)
+
+        try:
+            conn.request(
+                request.method,
+                self.path_prefix + request.path,
+                body=request.body,
+                headers=request.headers,
+            )
+            response = conn.getresponse()
+            response.read()
+
+            return str(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            return type(e).__name__
+        finally:
+            conn.close()
+
+    def work(self, index: int, started: float, samples: list):
+        """Send requests until the test ends."""
+
+        rng = random.Random(index)
+        deadline = started + self.duration
+
+        time.sleep(self.ramp_up * index / self.concurrency)
+
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(self.scenarios, self.weights)[0]
+            request = scenario.get_request(rng)
+
+            request_started = time.perf_counter()
+            status = self.send(request)
+            latency = (time.perf_counter() - request_started) * 1000
+
+            samples.append(
+                (
+                    scenario.name,
+                    latency,
+                    status,
+                    status == str(scenario.expected_status),
+                )
+            )
+
+    def run(self, monitor: Optional[LockMonitor] = None) -> LoadTestReport:
+        samples: list[tuple[str, float, str, bool]] = []
+        started = time.perf_counter()
+
+        if monitor is not None:
+            monitor.start()
+
+        workers = [
+            threading.Thread(target=self.work, args=(index, started, samples))
+            for index in range(self.concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        duration = time.perf_counter() - started
+        lock_waits = monitor.stop() if monitor is not None else None
+
+        by_scenario = defaultdict(list)
+        for sample in samples:
+            by_scenario[sample[0]].append(sample)
+
+        return {
+            "duration": duration,
+            "concurrency": self.concurrency,
+            "scenarios": [
+                self.get_result(name, scenario_samples, duration)
+                for name, scenario_samples in by_scenario.items()
+            ],
+            "total": self.get_result("total", samples, duration),
+            "lock_waits": lock_waits,
+        }
+
+    def get_result(self, name: str, samples: list, duration: float):
+        latencies = [latency for _, latency, _, _ in samples] or [0.0]
+        errors = len([sample for sample in samples if not sample[3]])
+        p50, p95, p99 = get_percentiles(latencies)
+
+        return LoadScenarioResult(
+            name=name,
+            requests=len(samples),
+            errors=errors,
+            error_rate=errors / len(samples) if samples else 0.0,
+            throughput=len(samples) / duration,
+            p50_ms=p50,
+            p95_ms=p95,
+            p99_ms=p99,
+            max_ms=max(latencies),
+            statuses=dict(Counter(status for _, _, status, _ in samples)),
+        )
@@ -0,0 +1,378 @@
+"""
+Workloads to measure against a generated dataset.
+"""
+
+import csv
+import os
+import statistics
+import time
+from typing import Optional, Type, TypedDict
+
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from clubs.models import ClubMembership
+from clubs.polls.models import PollQuestion
+from clubs.serializers import ClubMembershipCsvSerializer
+from core.benchmarks.data import BenchDataset, get_visitor_ip
+from core.middleware import QueryRecorder
+from querycsv.consts import QUERYCSV_MEDIA_SUBDIR
+from querycsv.services import QueryCsvService
+from users.models import User
+from utils.files import get_media_path
+
+
+class ScenarioResult(TypedDict):
+    name: str
+    iterations: int
+    duration: float
+    throughput: float
+    """Iterations per second."""
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    mean_queries: float
+    max_queries: int
+    mean_db_ms: float
+    repeated_query: Optional[str]
+    """Statement run most often in a single iteration, if likely an N+1 query."""
+
+
+def remove_files(paths: list[str]):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class Scenario:
+    """
+    Workload run many times, each iteration is timed.
+
+    Parameters
+    ----------
+        - dataset (BenchDataset): Generated objects to use in requests.
+    """
+
+    name: str
+    description = ""
+
+    def __init__(self, dataset: BenchDataset):
+        self.dataset = dataset
+
+    def setup(self, iterations: int):
+        """Prepare objects before timing, for the given number of iterations."""
+
+    def run(self, iteration: int):
+        """Perform a single timed iteration."""
+
+        raise NotImplementedError
+
+    def teardown(self):
+        """Remove objects created in setup."""
+
+    def get_client(self, user: Optional[User] = None, **defaults):
+        client = Client(**defaults)
+
+        if user is not None:
+            client.force_login(user)
+
+        return client
+
+    def get_users(self, count: int) -> list[User]:
+        return list(User.objects.filter(id__in=self.dataset.user_ids[:count]))
+
+    def assert_status(self, response, status=200):
+        assert (
+            response.status_code == status
+        ), f"{self.name}: expected status {status}, got {response.status_code}"
+
+
+class ClubListScenario(Scenario):
+    name = "club_list"
+    description = "List clubs via REST api, with token authentication."
+
+    def setup(self, iterations):
+        token, _ = Token.objects.get_or_create(user_id=self.dataset.user_ids[0])
+        self.client = self.get_client(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.url = reverse("api-clubs:club-list")
+
+    def run(self, iteration):
+        self.assert_status(self.client.get(self.url))
+
+
+class CsvDownloadScenario(Scenario):
+    name = "csv_download"
+    description = "Export memberships of a club to a csv."
+
+    def setup(self, iterations):
+        self.service = QueryCsvService(ClubMembershipCsvSerializer)
+        self.paths = []
+
+    def run(self, iteration):
+        club_ids = self.dataset.club_ids
+        club_id = club_ids[iteration % len(club_ids)]
+
+        self.paths.append(
+            self.service.download_csv(ClubMembership.objects.filter(club_id=club_id))
+        )
+
+    def teardown(self):
+        remove_files(self.paths)
+
+
+class CsvUploadScenario(Scenario):
+    name = "csv_upload"
+    description = "Import new memberships for a club from a csv."
+
+    rows = 100
+
+    def setup(self, iterations):
+        self.service = QueryCsvService(ClubMembershipCsvSerializer)
+        self.paths = []
+
+        # New users each iteration, so every upload creates the same objects
+        for iteration in range(iterations):
+            path = get_media_path(
+                QUERYCSV_MEDIA_SUBDIR + "benchmarks/",
+                fileprefix=f"{self.dataset.prefix}_{iteration}",
+                fileext="csv",
+            )
+            club_id = self.dataset.club_ids[iteration % len(self.dataset.club_ids)]
+
+            with open(path, "w", newline="") as file:
+                writer = csv.DictWriter(
+                    file, fieldnames=["club", "user_email", "roles"]
+                )
+                writer.writeheader()
+                writer.writerows(
+                    {
+                        "club": club_id,
+                        "user_email": self.dataset.get_email(f"c{iteration}.{row}"),
+                        "roles": "Member",
+                    }
+                    for row in range(self.rows)
+                )
+
+            self.paths.append(path)
+
+    def run(self, iteration):
+        _, errors = self.service.upload_csv(self.paths[iteration])
+        assert len(errors) == 0, f"{self.name}: {errors[0]}"
+
+    def teardown(self):
+        remove_files(self.paths)
+
+
+class LinkRedirectScenario(Scenario):
+    name = "link_redirect"
+    description = "Follow a club link, alternating returning and new visitors."
+
+    def setup(self, iterations):
+        self.client = self.get_client()
+
+    def run(self, iteration):
+        link_ids = self.dataset.link_ids
+        link_id = link_ids[iteration % len(link_ids)]
+
+        if iteration % 2 == 0 and self.dataset.visitors_per_link > 0:
+            visitor = iteration % self.dataset.visitors_per_link
+        else:
+            visitor = self.dataset.visitors_per_link + iteration
+
+        response = self.client.get(
+            reverse("redirect-link", kwargs={"link_id": link_id}),
+            REMOTE_ADDR=get_visitor_ip(visitor),
+        )
+        self.assert_status(response, 302)
+
+
+class CheckinScenario(Scenario):
+    name = "checkin"
+    description = "Record event attendance for logged in users."
+
+    user_count = 20
+
+    def setup(self, iterations):
+        self.clients = [
+            self.get_client(user) for user in self.get_users(self.user_count)
+        ]
+
+    def run(self, iteration):
+        events = self.dataset.events
+        event_id, club_id = events[iteration % len(events)]
+        client = self.clients[iteration % len(self.clients)]
+
+        response = client.get(
+            reverse(
+                "clubs:join-event", kwargs={"club_id": club_id, "event_id": event_id}
+            )
+        )
+        self.assert_status(response, 302)
+
+
+class PollRenderScenario(Scenario):
+    name = "poll_render"
+    description = "Render a poll with text questions."
+
+    def setup(self, iterations):
+        self.client = self.get_client()
+        self.url = reverse("clubs:polls:poll", kwargs={"poll_id": self.dataset.poll_id})
+
+    def run(self, iteration):
+        self.assert_status(self.client.get(self.url))
+
+
+class PollSubmitScenario(Scenario):
+    name = "poll_submit"
+    description = "Submit answers to a poll as a logged in user."
+
+    user_count = 20
+
+    def setup(self, iterations):
+        self.clients = [
+            self.get_client(user) for user in self.get_users(self.user_count)
+        ]
+        self.url = reverse("clubs:polls:poll", kwargs={"poll_id": self.dataset.poll_id})
+
+        questions = PollQuestion.objects.filter(field__poll_id=self.dataset.poll_id)
+        self.payload = {
+            "csrfmiddlewaretoken": "bench",
+            **{question.html_name: "Answer" for question in questions},
+        }
+
+    def run(self, iteration):
+        client = self.clients[iteration % len(self.clients)]
+        self.assert_status(client.post(self.url, self.payload), 302)
+
+
+class CalendarScenario(Scenario):
+    name = "calendar"
+    description = "Download the calendar feed of a club."
+
+    def setup(self, iterations):
+        self.client = self.get_client()
+
+    def run(self, iteration):
+        club_ids = self.dataset.club_ids
+        club_id = club_ids[iteration % len(club_ids)]
+
+        response = self.client.get(
+            reverse("clubs:get-club-calendar", kwargs={"club_id": club_id})
+        )
+        self.assert_status(response)
+
+        # File responses are streamed, read them to include rendering time
+        b"".join(response.streaming_content)
+
+
+SCENARIOS: dict[str, Type[Scenario]] = {
+    scenario.name: scenario
+    for scenario in (
+        ClubListScenario,
+        CsvDownloadScenario,
+        CsvUploadScenario,
+        LinkRedirectScenario,
+        CheckinScenario,
+        PollRenderScenario,
+        PollSubmitScenario,
+        CalendarScenario,
+    )
+}
+
+
+def get_percentiles(timings: list[float]) -> tuple[float, float, float]:
+    """Get p50, p95, and p99 of timings."""
+
+    # Quantiles need at least two values
+    cuts = statistics.quantiles(timings * 2 if len(timings) == 1 else timings, n=100)
+
+    return cuts[49], cuts[94], cuts[98]
+
+
+def run_scenario(scenario: Scenario, iterations: int, warmup=0) -> ScenarioResult:
+    """Time each iteration of scenario, and count its queries."""
+
+    scenario.setup(warmup + iterations)
+
+    try:
+        for iteration in range(warmup):
+            scenario.run(iteration)
+
+        timings = []
+        recorders = []
+        started = time.perf_counter()
+
+        for iteration in range(warmup, warmup + iterations):
+            recorder = QueryRecorder()
+
+            with connection.execute_wrapper(recorder):
+                iteration_started = time.perf_counter()
+                scenario.run(iteration)
+                timings.append((time.perf_counter() - iteration_started) * 1000)
+
+            recorders.append(recorder)
+
+        duration = time.perf_counter() - started
+    finally:
+        scenario.teardown()
+
+    p50, p95, p99 = get_percentiles(timings)
+    duplicates = max(
+        (recorder.get_duplicates()[:1] for recorder in recorders),
+        key=lambda duplicate: duplicate[0][1] if duplicate else 0,
+    )
+
+    return {
+        "name": scenario.name,
+        "iterations": iterations,
+        "duration": duration,
+        "throughput": iterations / duration,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": max(timings),
+        "mean_queries": statistics.mean(recorder.count for recorder in recorders),
+        "max_queries": max(recorder.count for recorder in recorders),
+        "mean_db_ms": statistics.mean(recorder.duration for recorder in recorders)
+        * 1000,
+        "repeated_query": duplicates[0][0] if duplicates else None,
+    }
+
+
+def compare_results(
+    baseline: list[ScenarioResult], results: list[ScenarioResult], threshold: float
+) -> list[str]:
+    """
+    Find scenarios that got slower or run more queries than the baseline.
+
+    Parameters
+    ----------
+        - baseline (list[ScenarioResult]): Results of a previous run.
+        - results (list[ScenarioResult]): Results of this run.
+        - threshold (float): Allowed relative increase in p95 latency, ex: 0.2.
+    """
+
+    baseline_by_name = {result["name"]: result for result in baseline}
+    regressions = []
+
+    for result in results:
+        previous = baseline_by_name.get(result["name"], None)
+        if previous is None:
+            continue
+
+        if result["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{result['name']}: p95 {previous['p95_ms']:.1f}ms "
+                f"-> {result['p95_ms']:.1f}ms"
+            )
+
+        if result["max_queries"] > previous["max_queries"]:
+            regressions.append(
+                f"{result['name']}: queries {previous['max_queries']} "
+                f"-> {result['max_queries']}"
+            )
+
+    return regressions
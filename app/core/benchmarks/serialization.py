@@ -0,0 +1,99 @@
+"""
+Compare time spent rendering and parsing api payloads as json.
+"""
+
+import io
+import time
+from typing import Any, Callable, TypedDict
+
+from django.db.models import Prefetch
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from clubs.models import Club, ClubMembership
+from clubs.polls.models import Poll
+from clubs.polls.serializers import PollSerializer
+from clubs.polls.services import PollService
+from clubs.serializers import ClubMembershipSerializer, ClubSerializer
+from core.abstracts.parsers import FastJSONParser
+from core.abstracts.renderers import FastJSONRenderer
+from core.benchmarks.data import BenchDataset
+
+
+class SerializationResult(TypedDict):
+    name: str
+    size_kb: float
+    serialize_ms: float
+    """Converting objects to data with the serializer, before rendering."""
+    json_render_ms: float
+    fast_render_ms: float
+    json_parse_ms: float
+    fast_parse_ms: float
+    identical: bool
+    """Whether both renderers returned the same bytes."""
+
+
+def time_call(func: Callable[[], Any], iterations: int) -> float:
+    """Get mean milliseconds to call func."""
+
+    started = time.perf_counter()
+
+    for _ in range(iterations):
+        func()
+
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def get_payloads(dataset: BenchDataset) -> dict[str, Callable[[], Any]]:
+    """
+    Get functions that serialize generated objects like the api does.
+
+    Objects are fetched beforehand, so serializing does not query the database.
+    """
+
+    clubs = list(
+        Club.objects.filter(id__in=dataset.club_ids).prefetch_related(
+            "memberships__user"
+        )
+    )
+    memberships = list(
+        ClubMembership.objects.filter(club_id__in=dataset.club_ids).select_related(
+            "user", "club"
+        )
+    )
+    poll = Poll.objects.prefetch_related(
+        Prefetch("fields", queryset=PollService.get_fields_queryset())
+    ).get(id=dataset.poll_id)
+
+    return {
+        "clubs": lambda: ClubSerializer(clubs, many=True).data,
+        "memberships": lambda: ClubMembershipSerializer(memberships, many=True).data,
+        "poll": lambda: PollSerializer(poll).data,
+    }
+
+
+def run_serialization_benchmark(
+    name: str, serialize: Callable[[], Any], iterations: int
+) -> SerializationResult:
+    """Time serializing a payload, then rendering and parsing it with each library."""
+
+    data = serialize()
+    json_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    json_parser, fast_parser = JSONParser(), FastJSONParser()
+
+    body = json_renderer.render(data)
+
+    return {
+        "name": name,
+        "size_kb": len(body) / 1024,
+        "serialize_ms": time_call(serialize, iterations),
+        "json_render_ms": time_call(lambda: json_renderer.render(data), iterations),
+        "fast_render_ms": time_call(lambda: fast_renderer.render(data), iterations),
+        "json_parse_ms": time_call(
+            lambda: json_parser.parse(io.BytesIO(body)), iterations
+        ),
+        "fast_parse_ms": time_call(
+            lambda: fast_parser.parse(io.BytesIO(body)), iterations
+        ),
+        "identical": fast_renderer.render(data) == body,
+    }
@@ -0,0 +1,43 @@
+"""
+Postgres backend that records connection metrics.
+"""
+
+import time
+
+from django.db.backends.postgresql import base
+
+from core.metrics import get_counter, get_histogram
+
+CONNECT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Record how long requests wait for new connections.
+
+    With persistent connections (``CONN_MAX_AGE``), most requests reuse the
+    connection of their worker, so these metrics show how often connections
+    are opened again, and how many were dropped by a failed health check.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+
+        get_histogram(
+            "db_connect_duration_seconds",
+            "Time to open a database connection.",
+            {"alias": self.alias},
+            buckets=CONNECT_BUCKETS,
+        ).observe(time.perf_counter() - started)
+
+    def close_if_health_check_failed(self):
+        was_connected = self.connection is not None
+        super().close_if_health_check_failed()
+
+        if was_connected and self.connection is None:
+            get_counter(
+                "db_health_check_failures_total",
+                "Persistent connections closed because they stopped working.",
+                {"alias": self.alias},
+            ).inc()
@@ -0,0 +1,124 @@
+"""
+Send heavy reads to a read replica.
+
+Reads only go to the replica inside ``use_replica``, and only until
+something is written in the same request, so users always see their
+own changes.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+_primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+
+_has_written: ContextVar[Optional[bool]] = ContextVar("has_written", default=None)
+"""If something was written, or None if writes are not being tracked."""
+
+
+def get_replica_alias() -> Optional[str]:
+    """Get database alias of the replica, or None if it is not configured."""
+
+    return settings.DATABASE_REPLICA_ALIAS
+
+
+def has_written() -> bool:
+    """Whether something was written in the current request or block."""
+
+    return bool(_has_written.get())
+
+
+def is_primary_pinned() -> bool:
+    """Whether reads must use the primary, to see recent writes."""
+
+    return _primary_pinned.get() or has_written()
+
+
+def record_write():
+    """Use the primary for the rest of the request, or `use_replica` block."""
+
+    if _has_written.get() is not None:
+        _has_written.set(True)
+
+
+@contextmanager
+def track_writes(pinned=False):
+    """
+    Keep reads on the primary once anything is written.
+
+    Parameters
+    ----------
+        - pinned (bool): Start on the primary, like when the client wrote recently.
+    """
+
+    pinned_token = _primary_pinned.set(pinned)
+    written_token = _has_written.set(False)
+
+    try:
+        yield
+    finally:
+        _primary_pinned.reset(pinned_token)
+        _has_written.reset(written_token)
+
+
+@contextmanager
+def use_replica():
+    """
+    Run reads in this block on the replica, if one is configured.
+
+    Writes still go to the primary, and following reads use the
+    primary as well, so the block can read its own writes.
+    """
+
+    token = _replica_reads.set(True)
+
+    try:
+        if _has_written.get() is None:
+            with track_writes():
+                yield
+        else:
+            yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Route reads in `use_replica` blocks to the replica, and all writes to primary."""
+
+    def db_for_read(self, model, **hints):
+        replica = get_replica_alias()
+
+        if (
+            replica is None
+            or not _replica_reads.get()
+            or is_primary_pinned()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+
+        return replica
+
+    def db_for_write(self, model, **hints):
+        record_write()
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, get_replica_alias()}
+
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is copied from the primary
+        if db != DEFAULT_DB_ALIAS and db == get_replica_alias():
+            return False
+
+        return None
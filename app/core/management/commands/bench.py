@@ -0,0 +1,174 @@
+import json
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.benchmarks.data import BenchDataGenerator, BenchDataset
+from core.benchmarks.scenarios import (
+    SCENARIOS,
+    ScenarioResult,
+    compare_results,
+    run_scenario,
+)
+
+
+class Command(BaseCommand):
+    """Benchmark common requests against a large generated dataset."""
+
+    help = (
+        "Generate users, clubs, and link visits, then report throughput, "
+        "latency percentiles, and query counts for each scenario."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=list(SCENARIOS.keys()),
+            help="Scenario to run, can be repeated. Runs all by default.",
+        )
+        parser.add_argument("--iterations", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--clubs", type=int, default=500)
+        parser.add_argument("--visits", type=int, default=1_000_000)
+        parser.add_argument("--output", help="Write results to json file.")
+        parser.add_argument(
+            "--compare",
+            help="Json file from a previous run, fail if any scenario regressed.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed relative increase in p95 latency when comparing.",
+        )
+        parser.add_argument(
+            "--reuse", help="Prefix of a dataset kept by a previous run."
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Do not delete generated data."
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="List scenarios and exit."
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+
+        if options["list"]:
+            for name, scenario in SCENARIOS.items():
+                self.stdout.write(f"{name:<16} {scenario.description}")
+            return
+
+        if not (settings.DEBUG or settings.DEV):
+            raise CommandError("Benchmarks can only run in DEBUG or DEV mode.")
+
+        dataset = self.get_dataset(options)
+
+        try:
+            # Requests are made with the test client
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                results = self.run(dataset, options)
+        finally:
+            logging.getLogger("core.middleware").setLevel(logging.NOTSET)
+
+            if options["keep"]:
+                self.stdout.write(f"Kept dataset, reuse with: --reuse {dataset.prefix}")
+            else:
+                self.stdout.write("Removing generated data...")
+                dataset.clear()
+
+        if options["output"]:
+            self.write_results(options["output"], results, options)
+
+        if options["compare"]:
+            self.compare(options["compare"], results, options["threshold"])
+
+    def get_dataset(self, options) -> BenchDataset:
+        if options["reuse"]:
+            dataset = BenchDataset.load(options["reuse"])
+
+            if len(dataset.club_ids) == 0:
+                raise CommandError(f"No dataset found with prefix {options['reuse']}.")
+
+            return dataset
+
+        generator = BenchDataGenerator(
+            users=options["users"],
+            clubs=options["clubs"],
+            visits=options["visits"],
+            log=self.stdout.write,
+        )
+        return generator.generate()
+
+    def run(self, dataset: BenchDataset, options) -> list[ScenarioResult]:
+        names = options["scenario"] or list(SCENARIOS.keys())
+        results = []
+
+        # Repeated queries are reported once per scenario instead of per request
+        logging.getLogger("core.middleware").setLevel(logging.ERROR)
+
+        self.stdout.write(
+            f"\n{'Scenario':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'queries':>10}{'max q':>8}"
+        )
+
+        for name in names:
+            result = run_scenario(
+                SCENARIOS[name](dataset),
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+            )
+            results.append(result)
+
+            self.stdout.write(
+                f"{name:<16}{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}"
+                f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['mean_queries']:>10.1f}{result['max_queries']:>8}"
+            )
+
+            if result["repeated_query"]:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"  repeated query: {result['repeated_query'][:120]}"
+                    )
+                )
+
+        return results
+
+    def write_results(self, path: str, results: list[ScenarioResult], options):
+        data = {
+            "created_at": timezone.now().isoformat(),
+            "options": {
+                key: options[key]
+                for key in ("iterations", "warmup", "users", "clubs", "visits")
+            },
+            "results": results,
+        }
+
+        with open(path, "w") as file:
+            json.dump(data, file, indent=2)
+
+        self.stdout.write(f"Wrote results to {path}")
+
+    def compare(
+        self, path: str, results: list[ScenarioResult], threshold: Optional[float]
+    ):
+        with open(path) as file:
+            baseline = json.load(file)["results"]
+
+        regressions = compare_results(baseline, results, threshold)
+
+        if len(regressions) > 0:
+            raise CommandError(
+                "Benchmarks regressed compared to baseline:\n" + "\n".join(regressions)
+            )
+
+        self.stdout.write(self.style.SUCCESS("No regressions compared to baseline."))
@@ -0,0 +1,83 @@
+import json
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from core.abstracts import renderers
+from core.benchmarks.data import BenchDataGenerator
+from core.benchmarks.serialization import get_payloads, run_serialization_benchmark
+
+
+class Command(BaseCommand):
+    """Compare json libraries for rendering and parsing api payloads."""
+
+    help = (
+        "Generate clubs, members, and a poll, then time their serializers, "
+        "and rendering and parsing the result with json and orjson."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument(
+            "--users", type=int, default=2000, help="Each user joins one club."
+        )
+        parser.add_argument("--clubs", type=int, default=20)
+        parser.add_argument("--questions", type=int, default=50)
+        parser.add_argument("--output", help="Write results to json file.")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+
+        if not (settings.DEBUG or settings.DEV):
+            raise CommandError("Benchmarks can only run in DEBUG or DEV mode.")
+
+        if renderers.orjson is None:
+            self.stdout.write(
+                self.style.WARNING("orjson is not installed, comparing json to json.")
+            )
+
+        generator = BenchDataGenerator(
+            users=options["users"],
+            clubs=options["clubs"],
+            visits=0,
+            memberships_per_user=1,
+            log=self.stdout.write,
+        )
+        dataset = generator.dataset
+
+        try:
+            generator.generate_users()
+            generator.generate_clubs()
+            generator.generate_memberships()
+            generator.generate_poll(question_count=options["questions"])
+
+            results = [
+                run_serialization_benchmark(name, serialize, options["iterations"])
+                for name, serialize in get_payloads(dataset).items()
+            ]
+        finally:
+            self.stdout.write("Removing generated data...")
+            dataset.clear()
+
+        self.stdout.write(
+            f"\n{'Payload':<14}{'KB':>8}{'serialize':>11}{'json':>9}{'orjson':>9}"
+            f"{'parse':>9}{'orjson':>9}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<14}{result['size_kb']:>8.1f}"
+                f"{result['serialize_ms']:>11.2f}{result['json_render_ms']:>9.2f}"
+                f"{result['fast_render_ms']:>9.2f}{result['json_parse_ms']:>9.2f}"
+                f"{result['fast_parse_ms']:>9.2f}"
+            )
+
+            if not result["identical"]:
+                self.stdout.write(
+                    self.style.WARNING(f"  {result['name']} rendered differently")
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+
+            self.stdout.write(f"Wrote results to {options['output']}")
@@ -0,0 +1,130 @@
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import TypedDict
+
+from django.core.management import BaseCommand, CommandError
+
+BOOT_SCRIPT = """
+import os, resource, sys
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+
+import app.wsgi
+from django.urls import get_resolver
+
+get_resolver().url_patterns
+
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+print(",".join(sys.modules.keys()))
+"""
+"""Loads the app the same way a web worker does, including all urls."""
+
+DEFERRED_MODULES = ("pandas", "numpy", "icalendar", "segno")
+"""Large libraries that should only be imported when first used."""
+
+IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+class ImportTime(TypedDict):
+    package: str
+    self_ms: float
+    modules: int
+
+
+def parse_import_times(output: str) -> list[ImportTime]:
+    """
+    Group output of `python -X importtime` by top level package.
+
+    Returns packages sorted by the time spent importing their own modules,
+    not including modules from other packages they import.
+    """
+
+    packages = defaultdict(lambda: {"self_us": 0, "modules": 0})
+
+    for line in output.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if not match:
+            continue
+
+        self_us, _, _, name = match.groups()
+        package = packages[name.split(".")[0]]
+        package["self_us"] += int(self_us)
+        package["modules"] += 1
+
+    times = [
+        {
+            "package": name,
+            "self_ms": package["self_us"] / 1000,
+            "modules": package["modules"],
+        }
+        for name, package in packages.items()
+    ]
+    return sorted(times, key=lambda t: t["self_ms"], reverse=True)
+
+
+class Command(BaseCommand):
+    """Report which packages are slowest to import when a worker boots."""
+
+    help = (
+        "Start the app in a new process with `python -X importtime`, then "
+        "report import time by package, total boot time, and memory used. "
+        "Fails if a deferred library is loaded at boot, or a budget is exceeded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top", type=int, default=20, help="Number of packages to show."
+        )
+        parser.add_argument(
+            "--max-ms", type=float, help="Fail if boot takes longer than this."
+        )
+        parser.add_argument(
+            "--max-rss", type=float, help="Fail if boot uses more MB than this."
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT],
+            capture_output=True,
+            text=True,
+        )
+
+        if result.returncode != 0:
+            raise CommandError(f"App failed to boot:\n{result.stderr[-2000:]}")
+
+        rss, modules = result.stdout.strip().splitlines()[-2:]
+        rss_mb = int(rss) / 1024
+        modules = modules.split(",")
+
+        times = parse_import_times(result.stderr)
+        total_ms = sum(t["self_ms"] for t in times)
+
+        self.stdout.write(f"{'Package':<32}{'ms':>10}{'modules':>10}")
+        for t in times[: options["top"]]:
+            self.stdout.write(
+                f"{t['package']:<32}{t['self_ms']:>10.1f}{t['modules']:>10}"
+            )
+
+        self.stdout.write(
+            f"\nImported {len(modules)} modules in {total_ms:.0f}ms, "
+            f"max RSS {rss_mb:.1f}MB"
+        )
+
+        errors = []
+
+        loaded = [name for name in DEFERRED_MODULES if name in modules]
+        if loaded:
+            errors.append(f"Deferred libraries loaded at boot: {', '.join(loaded)}")
+
+        if options["max_ms"] is not None and total_ms > options["max_ms"]:
+            errors.append(f"Boot took {total_ms:.0f}ms, over {options['max_ms']}ms")
+
+        if options["max_rss"] is not None and rss_mb > options["max_rss"]:
+            errors.append(f"Boot used {rss_mb:.1f}MB, over {options['max_rss']}MB")
+
+        if errors:
+            raise CommandError("\n".join(errors))
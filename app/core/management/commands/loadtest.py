@@ -0,0 +1,238 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core.benchmarks.data import BenchDataGenerator, BenchDataset
+from core.benchmarks.load import (
+    DEFAULT_MIX,
+    LOAD_SCENARIOS,
+    LoadScenarioResult,
+    LoadTest,
+    LoadTestReport,
+    LoadTestServer,
+    LockMonitor,
+    create_load_users,
+    delete_load_users,
+    override_conn_max_age,
+    parse_mix,
+)
+
+
+class Command(BaseCommand):
+    """Send concurrent requests to hot endpoints, like at the start of a meeting."""
+
+    help = (
+        "Log in generated users, then send a weighted mix of requests from many "
+        "workers at once. Reports latency percentiles, error rates, and queries "
+        "waiting on database locks. Starts a local server unless --url is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help=(
+                "Server using the same database, ex: http://127.0.0.1:8000. "
+                "By default a server is started in this process."
+            ),
+        )
+        parser.add_argument(
+            "--mix",
+            default=DEFAULT_MIX,
+            help=(
+                "Weight of each scenario, one of: "
+                + ", ".join(LOAD_SCENARIOS.keys())
+                + f". Default: {DEFAULT_MIX}"
+            ),
+        )
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Seconds, including ramp up."
+        )
+        parser.add_argument(
+            "--ramp-up", type=float, default=5, help="Seconds until all workers start."
+        )
+        parser.add_argument("--timeout", type=float, default=10)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Threads handling requests in the local server.",
+        )
+        parser.add_argument(
+            "--conn-max-age",
+            type=int,
+            help=(
+                "Seconds the local server keeps database connections open, "
+                "0 to open one for each request. Defaults to CONN_MAX_AGE."
+            ),
+        )
+        parser.add_argument(
+            "--users", type=int, default=500, help="Number of logged in users."
+        )
+        parser.add_argument("--clubs", type=int, default=20)
+        parser.add_argument("--visits", type=int, default=100_000)
+        parser.add_argument(
+            "--hot-events",
+            type=int,
+            default=1,
+            help="Number of events users check in to.",
+        )
+        parser.add_argument(
+            "--max-error-rate",
+            type=float,
+            help="Fail if more than this fraction of requests fail, ex: 0.01.",
+        )
+        parser.add_argument("--output", help="Write report to json file.")
+        parser.add_argument(
+            "--reuse", help="Prefix of a dataset kept by a previous bench run."
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Do not delete generated data."
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+
+        if not (settings.DEBUG or settings.DEV):
+            raise CommandError("Load tests can only run in DEBUG or DEV mode.")
+
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as e:
+            raise CommandError(f"Invalid mix: {e}")
+
+        dataset = self.get_dataset(options)
+        load_users = []
+
+        try:
+            self.stdout.write(f"Logging in {len(dataset.user_ids)} users...")
+            load_users = create_load_users(dataset.user_ids)
+
+            scenarios = {
+                LOAD_SCENARIOS[name](
+                    dataset, load_users, hot_events=options["hot_events"]
+                ): weight
+                for name, weight in mix.items()
+            }
+            report = self.run(scenarios, options)
+        finally:
+            delete_load_users(load_users)
+
+            if options["keep"]:
+                self.stdout.write(f"Kept dataset, reuse with: --reuse {dataset.prefix}")
+            else:
+                self.stdout.write("Removing generated data...")
+                dataset.clear()
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+
+            self.stdout.write(f"Wrote report to {options['output']}")
+
+        max_error_rate = options["max_error_rate"]
+        if (
+            max_error_rate is not None
+            and report["total"]["error_rate"] > max_error_rate
+        ):
+            raise CommandError(
+                f"Error rate {report['total']['error_rate']:.2%} is above "
+                f"{max_error_rate:.2%}."
+            )
+
+    def get_dataset(self, options) -> BenchDataset:
+        if options["reuse"]:
+            dataset = BenchDataset.load(options["reuse"])
+
+            if len(dataset.club_ids) == 0:
+                raise CommandError(f"No dataset found with prefix {options['reuse']}.")
+
+            dataset.user_ids = dataset.user_ids[: options["users"]]
+            return dataset
+
+        generator = BenchDataGenerator(
+            users=options["users"],
+            clubs=options["clubs"],
+            visits=options["visits"],
+            log=self.stdout.write,
+        )
+        return generator.generate()
+
+    def run(self, scenarios, options) -> LoadTestReport:
+        with ExitStack() as stack:
+            url = options["url"]
+
+            # Repeated queries would be logged for every request
+            middleware_logger = logging.getLogger("core.middleware")
+            middleware_logger.setLevel(logging.ERROR)
+            stack.callback(middleware_logger.setLevel, logging.NOTSET)
+
+            if url is None:
+                stack.enter_context(
+                    override_settings(
+                        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "127.0.0.1"]
+                    )
+                )
+
+                if options["conn_max_age"] is not None:
+                    stack.enter_context(override_conn_max_age(options["conn_max_age"]))
+
+                server = LoadTestServer.start(threads=options["threads"])
+                stack.callback(server.stop)
+                url = server.url
+
+            self.stdout.write(
+                f"Sending requests to {url} from {options['concurrency']} workers "
+                f"for {options['duration']:.0f}s..."
+            )
+
+            load_test = LoadTest(
+                url,
+                scenarios,
+                concurrency=options["concurrency"],
+                duration=options["duration"],
+                ramp_up=options["ramp_up"],
+                timeout=options["timeout"],
+            )
+            report = load_test.run(monitor=LockMonitor())
+
+        self.write_report(report)
+        return report
+
+    def write_result(self, result: LoadScenarioResult):
+        self.stdout.write(
+            f"{result['name']:<16}{result['requests']:>9}{result['throughput']:>9.1f}"
+            f"{result['error_rate']:>9.1%}{result['p50_ms']:>10.1f}"
+            f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+        )
+
+        failed = {
+            status: count
+            for status, count in result["statuses"].items()
+            if status[0] not in ("2", "3")
+        }
+        if failed:
+            self.stdout.write(self.style.WARNING(f"  failed: {failed}"))
+
+    def write_report(self, report: LoadTestReport):
+        self.stdout.write(
+            f"\n{'Scenario':<16}{'requests':>9}{'req/s':>9}{'errors':>9}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+
+        for result in report["scenarios"]:
+            self.write_result(result)
+
+        self.write_result(report["total"])
+
+        locks = report["lock_waits"]
+        self.stdout.write(
+            f"\nLock waits: max {locks['max_waiting']} queries waiting, "
+            f"mean {locks['mean_waiting']:.2f}, "
+            f"longest wait {locks['max_wait_ms']:.1f}ms, "
+            f"deadlocks {locks['deadlocks']}"
+        )
@@ -0,0 +1,256 @@
+"""
+Record performance metrics in process.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Optional, TypedDict
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+"""Upper bounds of latency buckets, in seconds."""
+
+
+class HistogramSummary(TypedDict):
+    name: str
+    description: str
+    labels: dict[str, str]
+    count: int
+    sum: float
+    p50: Optional[float]
+    p95: Optional[float]
+    p99: Optional[float]
+
+
+class Metric:
+    """Base fields for metrics."""
+
+    type = "untyped"
+
+    def __init__(
+        self, name: str, description: str, labels: Optional[dict[str, str]] = None
+    ):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Remove recorded values."""
+
+    def format_labels(self, **extra: str) -> str:
+        labels = {**self.labels, **extra}
+        if len(labels) == 0:
+            return ""
+
+        values = ",".join(
+            f'{key}="{format_label_value(value)}"' for key, value in labels.items()
+        )
+        return "{" + values + "}"
+
+    def render(self) -> list[str]:
+        """Get Prometheus text format lines for metric values."""
+
+        return []
+
+
+class Counter(Metric):
+    """Count how many times something happened."""
+
+    type = "counter"
+
+    def reset(self):
+        with self._lock:
+            self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def render(self):
+        return [f"{self.name}{self.format_labels()} {self.value}"]
+
+
+class Histogram(Metric):
+    """
+    Count observations in buckets, to estimate percentiles.
+
+    Only bucket counts are kept, so memory does not grow with the number
+    of observations. Percentiles are interpolated within their bucket.
+
+    Parameters
+    ----------
+        - name (str): Name of metric, shared by all label values.
+        - description (str): What the metric measures.
+        - labels (dict[str, str]): Dimensions of this series, like the view.
+        - buckets (tuple[float]): Sorted upper bounds of buckets.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Optional[dict[str, str]] = None,
+        buckets=DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(buckets)
+        super().__init__(name, description, labels)
+
+    def reset(self):
+        with self._lock:
+            # Last count is for values larger than every bucket
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe how many seconds the block takes."""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Estimate value below which the percent of observations fall."""
+
+        with self._lock:
+            if self.count == 0:
+                return None
+
+            target = self.count * percent / 100
+            seen = 0
+
+            for index, count in enumerate(self.counts):
+                if count == 0 or seen + count < target:
+                    seen += count
+                    continue
+
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    # Values larger than the last bucket have no upper bound
+                    return lower
+
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (target - seen) / count
+
+        return None
+
+    def summary(self) -> HistogramSummary:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "labels": self.labels,
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+    def render(self):
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(
+                f"{self.name}_bucket{self.format_labels(le=str(bound))} {cumulative}"
+            )
+
+        lines.append(f"{self.name}_bucket{self.format_labels(le='+Inf')} {count}")
+        lines.append(f"{self.name}_sum{self.format_labels()} {total}")
+        lines.append(f"{self.name}_count{self.format_labels()} {count}")
+
+        return lines
+
+
+metrics: dict[tuple[str, tuple], Metric] = {}
+_metrics_lock = threading.Lock()
+
+
+def format_label_value(value: str):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _get_metric(metric_class, name: str, description: str, labels=None, **kwargs):
+    key = (name, tuple(sorted((labels or {}).items())))
+    metric = metrics.get(key, None)
+
+    if metric is None:
+        with _metrics_lock:
+            metric = metrics.setdefault(
+                key, metric_class(name, description, labels=labels, **kwargs)
+            )
+
+    return metric
+
+
+def get_histogram(
+    name: str, description: str, labels: Optional[dict[str, str]] = None, **kwargs
+) -> Histogram:
+    """Get histogram by name and labels, created on first use."""
+
+    return _get_metric(Histogram, name, description, labels, **kwargs)
+
+
+def get_counter(
+    name: str, description: str, labels: Optional[dict[str, str]] = None
+) -> Counter:
+    """Get counter by name and labels, created on first use."""
+
+    return _get_metric(Counter, name, description, labels)
+
+
+def get_histograms(name: Optional[str] = None) -> list[Histogram]:
+    """Get all histograms, or histograms with name for each label value."""
+
+    return [
+        metric
+        for (metric_name, _), metric in list(metrics.items())
+        if isinstance(metric, Histogram) and (name is None or metric_name == name)
+    ]
+
+
+def render_prometheus() -> str:
+    """Format all metrics for Prometheus to scrape."""
+
+    lines = []
+    described = set()
+
+    for (name, _), metric in sorted(list(metrics.items()), key=lambda item: item[0]):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {metric.type}")
+
+        lines.extend(metric.render())
+
+    return "\n".join(lines) + "\n"
@@ -1,24 +1,222 @@
+import logging
+import time
 import zoneinfo
+from collections import Counter
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Optional
 
-from django.http import HttpRequest
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
 from django.utils import timezone
 
 from core.abstracts.middleware import BaseMiddleware
+from core.db.routers import get_replica_alias, has_written, track_writes
+from core.metrics import get_counter, get_histogram
+
+logger = logging.getLogger(__name__)
+
+TIMEZONE_HEADER = "X-Timezone"
+TIMEZONE_COOKIE = "django_timezone"
+TIMEZONE_SESSION_KEY = "django_timezone"
+PRIMARY_PIN_COOKIE = "db_primary_pin"
+
+
+@lru_cache(maxsize=128)
+def get_zoneinfo(tzname: str) -> Optional[zoneinfo.ZoneInfo]:
+    """Get timezone by name, or None if it does not exist."""
+
+    try:
+        return zoneinfo.ZoneInfo(tzname)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError, OSError):
+        # Directories like "America", and names too long for the filesystem
+        return None
 
 
 class TimezoneMiddleware(BaseMiddleware):
     """
     Convert dates to local user timezone.
 
+    The timezone is read from the ``X-Timezone`` header, or the cookie set
+    by the admin site. The session is only checked if the request already
+    has a session cookie, so API and redirect requests do not load it.
+
     Ref: https://docs.djangoproject.com/en/5.1/topics/i18n/timezones/
     """
 
+    def get_timezone_name(self, request: HttpRequest) -> Optional[str]:
+        tzname = request.headers.get(TIMEZONE_HEADER, None)
+
+        if not tzname:
+            tzname = request.COOKIES.get(TIMEZONE_COOKIE, None)
+
+        if not tzname and settings.SESSION_COOKIE_NAME in request.COOKIES:
+            tzname = request.session.get(TIMEZONE_SESSION_KEY, None)
+
+        return tzname
+
     def on_request(self, request: HttpRequest, *args, **kwargs):
-        tzname = request.session.get("django_timezone")
+        tzname = self.get_timezone_name(request)
+        tz = get_zoneinfo(tzname) if tzname else None
 
-        if tzname:
-            timezone.activate(zoneinfo.ZoneInfo(tzname))
+        if tz is not None:
+            timezone.activate(tz)
         else:
             timezone.deactivate()
 
         return super().on_request(request, *args, **kwargs)
+
+
+class DatabaseRoutingMiddleware(BaseMiddleware):
+    """
+    Keep clients on the primary database after they write.
+
+    Once a request writes, the rest of it reads from the primary, and a
+    short lived cookie keeps the client's next requests there as well,
+    until the replica has caught up with the change.
+    """
+
+    def __call__(self, request: HttpRequest):
+        if get_replica_alias() is None:
+            return super().__call__(request)
+
+        with track_writes(pinned=PRIMARY_PIN_COOKIE in request.COOKIES):
+            response = super().__call__(request)
+
+            if has_written():
+                response.set_cookie(
+                    PRIMARY_PIN_COOKIE,
+                    "1",
+                    max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite="Lax",
+                    secure=settings.SESSION_COOKIE_SECURE,
+                )
+
+        return response
+
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+RESPONSE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+DUPLICATE_QUERY_THRESHOLD = 3
+"""Times the same statement can run in a request before it is flagged."""
+
+duplicate_query_samples: dict[str, str] = {}
+"""Last repeated statement for each view, to help find N+1 queries."""
+
+logged_duplicate_queries: set[tuple[str, str]] = set()
+"""Views and statements already logged as repeated, so each is warned once."""
+
+
+class QueryRecorder:
+    """Count and time queries run through a database connection."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def get_duplicates(self) -> list[tuple[str, int]]:
+        return [
+            (sql, count)
+            for sql, count in self.statements.most_common()
+            if count >= DUPLICATE_QUERY_THRESHOLD
+        ]
+
+
+class RequestMetricsMiddleware(BaseMiddleware):
+    """
+    Record latency, queries, and response size for each view.
+
+    Metrics are grouped by url name, and kept in process as histograms,
+    see ``core.metrics``. Statements repeated in a single request are
+    counted, since they are usually N+1 queries, and logged as a warning
+    the first time each view repeats them.
+    """
+
+    def get_view_name(self, request: HttpRequest):
+        match = getattr(request, "resolver_match", None)
+
+        return match.view_name if match else "unresolved"
+
+    def __call__(self, request: HttpRequest):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+
+            response = super().__call__(request)
+
+        duration = time.perf_counter() - started
+        self.record(request, response, recorder, duration)
+
+        return response
+
+    def record(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        recorder: QueryRecorder,
+        duration: float,
+    ):
+        labels = {"view": self.get_view_name(request)}
+
+        get_histogram(
+            "request_duration_seconds", "Time to respond to request.", labels
+        ).observe(duration)
+        get_histogram(
+            "request_queries",
+            "Database queries run for request.",
+            labels,
+            buckets=QUERY_COUNT_BUCKETS,
+        ).observe(recorder.count)
+        get_histogram(
+            "request_db_duration_seconds", "Time spent on database queries.", labels
+        ).observe(recorder.duration)
+
+        if not response.streaming:
+            get_histogram(
+                "response_size_bytes",
+                "Size of response body.",
+                labels,
+                buckets=RESPONSE_SIZE_BUCKETS,
+            ).observe(len(response.content))
+
+        duplicates = recorder.get_duplicates()
+        if len(duplicates) == 0:
+            return
+
+        get_counter(
+            "request_duplicate_queries_total",
+            "Requests that ran the same statement several times.",
+            labels,
+        ).inc()
+
+        sql, count = duplicates[0]
+        duplicate_query_samples[labels["view"]] = sql
+
+        key = (labels["view"], sql)
+        level = logging.DEBUG if key in logged_duplicate_queries else logging.WARNING
+        logged_duplicate_queries.add(key)
+
+        logger.log(
+            level,
+            "%s ran the same query %d times: %s",
+            labels["view"],
+            count,
+            sql[:200],
+        )
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import clear_token_cache
+from users.models import User
+
+
+@receiver(post_delete, sender=Token)
+def on_delete_token(sender, instance: Token, **kwargs):
+    """Deleted tokens should stop working immediately."""
+
+    clear_token_cache(instance.key)
+
+
+@receiver(post_save, sender=User)
+def on_save_user(sender, instance: User, created=False, **kwargs):
+    """Remove cached user fields, like when the user is deactivated."""
+
+    if created:
+        return
+
+    keys = Token.objects.filter(user=instance).values_list("key", flat=True)
+    clear_token_cache(*keys)
@@ -0,0 +1,85 @@
+"""
+Unit tests for cached token authentication.
+"""
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.abstracts.tests import ApiTestsBase
+from core.authentication import get_token_cache_key, local_token_cache
+from users.tests.utils import create_test_user
+
+ME_URL = reverse("api-users:me")
+
+
+class CachedTokenAuthenticationTests(ApiTestsBase):
+    """Tests for authenticating api requests with cached tokens."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.user = create_test_user()
+        self.token = Token.objects.create(user=self.user)
+
+        self.client = self.client_class()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def tearDown(self):
+        local_token_cache.clear()
+        return super().tearDown()
+
+    def test_token_cached(self):
+        """Should only query token once, then authenticate from cache."""
+
+        res = self.client.get(ME_URL)
+        self.assertResOk(res)
+        self.assertEqual(res.json()["email"], self.user.email)
+
+        self.assertIsNotNone(cache.get(get_token_cache_key(self.token.key)))
+        self.assertIsNone(cache.get(f"auth:token:{self.token.key}"))
+
+        # Only the view's own queries are run
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL)
+
+        self.assertResOk(res)
+        self.assertEqual(res.json()["email"], self.user.email)
+
+        self.assertEqual(len(queries), 3)
+        for query in queries.captured_queries:
+            self.assertNotIn("authtoken_token", query["sql"])
+
+    def test_token_deleted(self):
+        """Deleted tokens should not authenticate from cache."""
+
+        self.assertResOk(self.client.get(ME_URL))
+
+        self.token.delete()
+        self.assertResUnauthorized(self.client.get(ME_URL))
+
+    def test_user_deactivated(self):
+        """Deactivated users should not authenticate from cache."""
+
+        self.assertResOk(self.client.get(ME_URL))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertResUnauthorized(self.client.get(ME_URL))
+
+    def test_local_cache(self):
+        """Should keep tokens in process when enabled, and remove on delete."""
+
+        local_token_cache.size = 10
+        self.addCleanup(setattr, local_token_cache, "size", 0)
+
+        cache_key = get_token_cache_key(self.token.key)
+
+        self.assertResOk(self.client.get(ME_URL))
+        self.assertIsNotNone(local_token_cache.get(cache_key))
+
+        self.token.delete()
+        self.assertIsNone(local_token_cache.get(cache_key))
+        self.assertResUnauthorized(self.client.get(ME_URL))
@@ -0,0 +1,77 @@
+"""
+Unit tests for logging in with the custom auth backend.
+"""
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.urls import reverse
+
+from core.abstracts.tests import TestsBase
+from core.backend import login_duration
+from users.tests.utils import create_test_adminuser, create_test_user
+
+
+class CustomBackendLoginTests(TestsBase):
+    """Tests for verifying login credentials."""
+
+    def setUp(self):
+        self.password = "testpass123"
+        self.user = create_test_user(password=self.password)
+
+    def test_login_username_or_email(self):
+        """Should find user by username or email in a single query."""
+
+        for username in [self.user.username, self.user.email]:
+            with self.assertNumQueries(1):
+                user = authenticate(username=username, password=self.password)
+
+            self.assertEqual(user, self.user)
+
+    def test_login_ignores_case(self):
+        """Should find user by username or email in any case."""
+
+        for username in [self.user.username.upper(), self.user.email.upper()]:
+            user = authenticate(username=username, password=self.password)
+            self.assertEqual(user, self.user)
+
+    def test_invalid_credentials(self):
+        """Should not authenticate unknown users or wrong passwords."""
+
+        self.assertIsNone(authenticate(username=self.user.email, password="wrong"))
+        self.assertIsNone(
+            authenticate(username="missing@example.com", password=self.password)
+        )
+
+    def test_rehash_outdated_password(self):
+        """Passwords hashed with fewer iterations should be upgraded on login."""
+
+        hasher = PBKDF2PasswordHasher()
+        self.user.password = hasher.encode(
+            self.password, hasher.salt(), iterations=1000
+        )
+        self.user.save()
+
+        self.assertEqual(
+            authenticate(username=self.user.username, password=self.password),
+            self.user,
+        )
+
+        self.user.refresh_from_db()
+        self.assertEqual(
+            hasher.decode(self.user.password)["iterations"], hasher.iterations
+        )
+
+    def test_login_latency(self):
+        """Should record login latency, visible to staff."""
+
+        login_duration.reset()
+        authenticate(username=self.user.username, password=self.password)
+        authenticate(username=self.user.username, password="wrong")
+
+        self.assertEqual(login_duration.count, 2)
+        self.assertIsNotNone(login_duration.percentile(95))
+
+        self.client.force_login(create_test_adminuser())
+        res = self.client.get(reverse("core:metrics"))
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(f"{login_duration.name}_count 2", res.content.decode())
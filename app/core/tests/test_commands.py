@@ -2,15 +2,25 @@
 Test custom Django management commands.
 """
 
+import json
 import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.core.management import call_command
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.db import connections
 from django.db.utils import OperationalError
-from django.test import TestCase
+from django.test import LiveServerTestCase, TestCase, override_settings
 from psycopg2 import OperationalError as Psycopg2Error  # type: ignore
 
+from clubs.models import Club
+from core.benchmarks.load import parse_mix
+from core.benchmarks.scenarios import compare_results
+from core.management.commands.importtime import parse_import_times
+
 User = get_user_model()
 
 
@@ -79,3 +89,193 @@ class CommandTests(TestCase):
 
         call_command("init_superuser")
         self.assertEqual(User.objects.count(), 1)
+
+
+class BenchCommandTests(TestCase):
+    """Test running benchmarks against generated data."""
+
+    def test_bench(self):
+        """Should report each scenario, write results, and remove data."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.json")
+
+            with override_settings(DEBUG=True):
+                call_command(
+                    "bench",
+                    scenario=["club_list", "checkin", "link_redirect"],
+                    users=20,
+                    clubs=2,
+                    visits=40,
+                    iterations=3,
+                    warmup=1,
+                    output=path,
+                    stdout=StringIO(),
+                )
+
+            with open(path) as file:
+                results = json.load(file)["results"]
+
+        self.assertEqual(
+            [result["name"] for result in results],
+            ["club_list", "checkin", "link_redirect"],
+        )
+        for result in results:
+            self.assertGreater(result["throughput"], 0)
+            self.assertGreater(result["max_queries"], 0)
+
+        self.assertEqual(User.objects.count(), 0)
+        self.assertFalse(Club.objects.exists())
+
+        # Compare against baseline with fewer queries
+        baseline = [{**results[0], "max_queries": results[0]["max_queries"] - 1}]
+        self.assertEqual(len(compare_results(results, results, threshold=0)), 0)
+        self.assertEqual(len(compare_results(baseline, results, threshold=10)), 1)
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    """Test sending concurrent requests to a server."""
+
+    def test_loadtest(self):
+        """Should report requests for each scenario in the mix."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "load.json")
+
+            with override_settings(DEBUG=True):
+                call_command(
+                    "loadtest",
+                    url=self.live_server_url,
+                    mix="checkin=1,link_redirect=1",
+                    users=5,
+                    clubs=1,
+                    visits=10,
+                    concurrency=4,
+                    duration=1,
+                    ramp_up=0,
+                    max_error_rate=0,
+                    output=path,
+                    stdout=StringIO(),
+                )
+
+            with open(path) as file:
+                report = json.load(file)
+
+        self.assertEqual(
+            {result["name"] for result in report["scenarios"]},
+            {"checkin", "link_redirect"},
+        )
+        self.assertGreater(report["total"]["requests"], 0)
+        self.assertEqual(report["total"]["errors"], 0)
+        self.assertGreater(report["lock_waits"]["samples"], 0)
+
+        self.assertEqual(User.objects.count(), 0)
+        self.assertEqual(Session.objects.count(), 0)
+
+    def test_loadtest_local_server(self):
+        """Should start a server that keeps database connections open."""
+
+        max_age = connections["default"].settings_dict["CONN_MAX_AGE"]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "load.json")
+
+            with override_settings(DEBUG=True):
+                call_command(
+                    "loadtest",
+                    mix="link_redirect",
+                    users=2,
+                    clubs=1,
+                    visits=10,
+                    concurrency=4,
+                    duration=1,
+                    ramp_up=0,
+                    threads=2,
+                    conn_max_age=max_age + 1,
+                    max_error_rate=0,
+                    output=path,
+                    stdout=StringIO(),
+                )
+
+            with open(path) as file:
+                report = json.load(file)
+
+        self.assertGreater(report["total"]["requests"], 0)
+        self.assertEqual(connections["default"].settings_dict["CONN_MAX_AGE"], max_age)
+
+    def test_invalid_mix(self):
+        """Should not run unknown scenarios."""
+
+        with self.assertRaises(ValueError):
+            parse_mix("checkin=1,unknown=2")
+
+        self.assertEqual(
+            parse_mix("checkin=3, poll_render"), {"checkin": 3, "poll_render": 1}
+        )
+
+
+class ImportTimeCommandTests(TestCase):
+    """Test reporting import times at boot."""
+
+    def test_importtime(self):
+        """Should boot without loading deferred libraries."""
+
+        out = StringIO()
+        call_command("importtime", "--top", "5", stdout=out)
+        self.assertIn("max RSS", out.getvalue())
+
+        with self.assertRaisesMessage(CommandError, "over 0.0MB"):
+            call_command("importtime", "--max-rss", "0", stdout=StringIO())
+
+    def test_parse_import_times(self):
+        """Should group import times by top level package."""
+
+        output = "\n".join(
+            [
+                "import time: self [us] | cumulative | imported package",
+                "import time:       100 |        100 |   django.utils",
+                "import time:       200 |        300 | django",
+                "import time:      1500 |       1500 | pandas",
+            ]
+        )
+
+        self.assertEqual(
+            parse_import_times(output),
+            [
+                {"package": "pandas", "self_ms": 1.5, "modules": 1},
+                {"package": "django", "self_ms": 0.3, "modules": 2},
+            ],
+        )
+
+
+class BenchJsonCommandTests(TestCase):
+    """Test comparing json libraries."""
+
+    def test_benchjson(self):
+        """Should report each payload, and remove generated data."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchjson.json")
+
+            with override_settings(DEBUG=True):
+                call_command(
+                    "benchjson",
+                    users=10,
+                    clubs=2,
+                    questions=3,
+                    iterations=2,
+                    output=path,
+                    stdout=StringIO(),
+                )
+
+            with open(path) as file:
+                results = json.load(file)
+
+        self.assertEqual(
+            [result["name"] for result in results], ["clubs", "memberships", "poll"]
+        )
+        for result in results:
+            self.assertTrue(result["identical"])
+
+        self.assertEqual(User.objects.count(), 0)
+        self.assertFalse(Club.objects.exists())
@@ -2,7 +2,15 @@
 Tests for core views and health checks.
 """
 
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.urls import reverse
+
+from clubs.catalog import get_page_cache_key
+from clubs.models import ClubTag
+from clubs.tests.utils import create_test_club
 from core.abstracts.tests import ApiTestsBase
+from users.tests.utils import create_test_user
 
 
 class CoreViewTests(ApiTestsBase):
@@ -17,3 +25,68 @@ class CoreViewTests(ApiTestsBase):
         """Should return 200."""
 
         self.assertOk("core:index")
+
+    def test_index_view_cached(self):
+        """Should render landing page from cache until clubs change."""
+
+        cache.clear()
+        club = create_test_club()
+        url = reverse("core:index")
+
+        res = self.client.get(url)
+        self.assertContains(res, club.name)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+        self.assertContains(res, club.name)
+
+        club.name = "Renamed Club"
+        club.save()
+
+        res = self.client.get(url)
+        self.assertContains(res, "Renamed Club")
+
+        ClubTag.objects.create(name="Tag")
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_index_view_cached_query_params(self):
+        """Should not cache a page for each query string."""
+
+        cache.clear()
+        url = reverse("core:index")
+        self.client.get(url)
+
+        for query in ["utm_source=test", "x=1", "x=2"]:
+            with self.assertNumQueries(0):
+                self.assertResOk(self.client.get(f"{url}?{query}"))
+
+    def test_page_cache_key_query_params(self):
+        """Should only key pages by query params they use."""
+
+        factory = RequestFactory()
+
+        def get_key(query: str):
+            return get_page_cache_key(factory.get(f"/?{query}"), ("page", "tag"))
+
+        self.assertEqual(get_key("utm_source=test"), get_key(""))
+        self.assertEqual(get_key("tag=a&page=2&x=1"), get_key("page=2&tag=a"))
+        self.assertNotEqual(get_key("page=2"), get_key("page=3"))
+
+    def test_index_view_logged_in(self):
+        """Should render page for users, with the list of clubs cached."""
+
+        cache.clear()
+        club = create_test_club()
+        user = create_test_user()
+        self.client.force_login(user)
+
+        res = self.client.get(reverse("core:index"))
+        self.assertContains(res, user.username)
+        self.assertContains(res, club.name)
+
+        other_user = create_test_user()
+        self.client.force_login(other_user)
+
+        res = self.client.get(reverse("core:index"))
+        self.assertContains(res, other_user.username)
@@ -0,0 +1,145 @@
+"""
+Tests for the database backend and router.
+"""
+
+from unittest.mock import patch
+
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from clubs.models import Club
+from clubs.tests.utils import create_test_club
+from core.abstracts.tests import QueryBudgetAPIClient, TestsBase
+from core.db.routers import use_replica
+from core.metrics import get_counter, get_histogram
+from core.middleware import PRIMARY_PIN_COOKIE
+from users.models import User
+from users.tests.utils import create_test_adminuser, create_test_user
+
+
+class DatabaseWrapperTests(TestsBase):
+    """Tests for recording connection metrics."""
+
+    def setUp(self):
+        self.labels = {"alias": "default"}
+        self.connect_duration = get_histogram(
+            "db_connect_duration_seconds", "", self.labels
+        )
+        self.health_check_failures = get_counter(
+            "db_health_check_failures_total", "", self.labels
+        )
+        self.connect_duration.reset()
+        self.health_check_failures.reset()
+
+        # Separate from the connection running the test transaction
+        self.conn = connections.create_connection("default")
+        self.addCleanup(self.conn.close)
+
+    def test_connect(self):
+        """Should record time to open each connection."""
+
+        self.conn.ensure_connection()
+        self.conn.ensure_connection()
+        self.assertEqual(self.connect_duration.count, 1)
+
+        self.conn.close()
+        self.conn.ensure_connection()
+        self.assertEqual(self.connect_duration.count, 2)
+
+    def test_health_check_failed(self):
+        """Should count connections closed by a failed health check."""
+
+        self.conn.ensure_connection()
+        self.conn.health_check_enabled = True
+
+        self.conn.close_if_health_check_failed()
+        self.assertEqual(self.health_check_failures.value, 0)
+
+        self.conn.health_check_done = False
+        with patch.object(self.conn, "is_usable", return_value=False):
+            self.conn.close_if_health_check_failed()
+
+        self.assertIsNone(self.conn.connection)
+        self.assertEqual(self.health_check_failures.value, 1)
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica")
+class ReplicaRouterTests(TransactionTestCase):
+    """
+    Tests for sending reads to the replica.
+
+    In tests the replica mirrors the default database, using a second
+    connection, so committed data is visible to both.
+    """
+
+    databases = {"default", "replica"}
+
+    def test_use_replica(self):
+        """Should only read from the replica in use_replica blocks."""
+
+        self.assertEqual(User.objects.all().db, "default")
+
+        with use_replica():
+            self.assertEqual(User.objects.all().db, "replica")
+
+            with transaction.atomic():
+                self.assertEqual(User.objects.all().db, "default")
+
+        self.assertEqual(User.objects.all().db, "default")
+
+    def test_read_own_writes(self):
+        """Should read from the primary after writing in the same block."""
+
+        with use_replica():
+            user = create_test_user()
+            self.assertEqual(user._state.db, "default")
+            self.assertEqual(User.objects.all().db, "default")
+
+        with use_replica():
+            self.assertEqual(User.objects.all().db, "replica")
+
+    def test_viewset_reads(self):
+        """Should use the replica for GET requests, until the client writes."""
+
+        club = create_test_club()
+        client = APIClient()
+        client.force_authenticate(create_test_adminuser())
+
+        list_url = reverse("api-clubs:club-list")
+        detail_url = reverse("api-clubs:club-detail", args=[club.id])
+
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            res = client.get(list_url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(len(replica_queries), 0)
+        self.assertNotIn(PRIMARY_PIN_COOKIE, res.cookies)
+
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            res = client.patch(detail_url, {"name": "Updated"})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(replica_queries), 0)
+        self.assertIn(PRIMARY_PIN_COOKIE, res.cookies)
+
+        # Client sees its change, even if the replica is behind
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            res = client.get(detail_url)
+
+        self.assertEqual(res.json()["name"], "Updated")
+        self.assertEqual(len(replica_queries), 0)
+        self.assertEqual(Club.objects.get(id=club.id).name, "Updated")
+
+    def test_query_budget_counts_replica(self):
+        """Should count queries on the replica against api query budgets."""
+
+        create_test_club()
+        client = QueryBudgetAPIClient()
+        client.force_authenticate(create_test_adminuser())
+        client.budgets = {"api-clubs:club-list": 0}
+
+        with self.assertRaisesRegex(AssertionError, r"\[replica\]"):
+            client.get(reverse("api-clubs:club-list"))
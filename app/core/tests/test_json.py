@@ -0,0 +1,117 @@
+"""
+Tests for rendering and parsing api json.
+"""
+
+import io
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from clubs.serializers import ClubSerializer
+from clubs.tests.utils import create_test_club
+from clubs.viewsets import ClubViewSet
+from core.abstracts import renderers
+from core.abstracts.parsers import FastJSONParser
+from core.abstracts.renderers import FastJSONRenderer
+from core.abstracts.tests import AuthApiTestsBase, TestsBase
+
+
+class FastJSONTests(TestsBase):
+    """Tests for the orjson renderer and parser."""
+
+    def setUp(self):
+        self.data = {
+            "datetime": datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            "naive": datetime(2025, 1, 2, 3, 4, 5),
+            "date": date(2025, 1, 2),
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "decimal": Decimal("1.50"),
+            "lazy": gettext_lazy("Member"),
+            "text": "café  ",
+            "items": [1, 2.5, None, True],
+        }
+
+    def test_render_same_as_json(self):
+        """Should render the same bytes as the default renderer."""
+
+        club = create_test_club()
+        payloads = [self.data, ClubSerializer(club).data, {1: "int key"}, []]
+
+        for data in payloads:
+            self.assertEqual(
+                FastJSONRenderer().render(data), JSONRenderer().render(data)
+            )
+
+        body = FastJSONRenderer().render(ClubSerializer(club).data)
+        self.assertIn(
+            club.created_at.strftime(ClubSerializer.datetime_format), body.decode()
+        )
+
+    def test_render_indent(self):
+        """Should use the default renderer for indented json."""
+
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, "application/json; indent=4"),
+            JSONRenderer().render(self.data, "application/json; indent=4"),
+        )
+
+    def test_parse(self):
+        """Should parse the same data as the default parser."""
+
+        body = JSONRenderer().render(self.data)
+
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body)),
+            JSONParser().parse(io.BytesIO(body)),
+        )
+
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"value": NaN}'))
+
+    def test_without_orjson(self):
+        """Should use the json module if orjson is not installed."""
+
+        with patch.object(renderers, "orjson", None):
+            self.assertEqual(
+                FastJSONRenderer().render(self.data), JSONRenderer().render(self.data)
+            )
+
+
+class FastJSONApiTests(AuthApiTestsBase):
+    """
+    Tests for using the orjson renderer and parser in views.
+
+    Views read renderer settings on import, so they are patched instead.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        for name, value in [
+            ("renderer_classes", [FastJSONRenderer]),
+            ("parser_classes", [FastJSONParser]),
+        ]:
+            patcher = patch.object(ClubViewSet, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_club_api(self):
+        """Should read and write clubs as json."""
+
+        club = create_test_club()
+        url = reverse("api-clubs:club-detail", args=[club.id])
+
+        res = self.client.patch(url, {"name": "Café Club"}, format="json")
+        self.assertResOk(res)
+        self.assertEqual(res.json()["name"], "Café Club")
+
+        res = self.client.get(url)
+        self.assertEqual(res.json()["id"], club.id)
+        self.assertIsInstance(res.accepted_renderer, FastJSONRenderer)
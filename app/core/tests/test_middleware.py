@@ -0,0 +1,179 @@
+"""
+Unit tests for core middleware.
+"""
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import ResolverMatch, reverse
+from django.utils import timezone
+
+from core.abstracts.tests import TestsBase
+from core.metrics import get_counter, get_histogram
+from core.middleware import (
+    TIMEZONE_SESSION_KEY,
+    RequestMetricsMiddleware,
+    TimezoneMiddleware,
+    duplicate_query_samples,
+    logged_duplicate_queries,
+)
+from users.models import User
+from users.tests.utils import create_test_adminuser
+
+
+class TimezoneMiddlewareTests(TestsBase):
+    """Tests for activating the user's timezone."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = TimezoneMiddleware(
+            lambda request: HttpResponse(timezone.get_current_timezone_name())
+        )
+
+    def tearDown(self):
+        timezone.deactivate()
+        return super().tearDown()
+
+    def get_timezone(self, **kwargs):
+        request = self.factory.get("/", **kwargs)
+        SessionMiddleware(lambda request: None).process_request(request)
+
+        return self.middleware(request).content.decode()
+
+    def create_session(self, **data):
+        session = SessionStore()
+        session.update(data)
+        session.save()
+
+        return session
+
+    def test_timezone_header(self):
+        """Should activate timezone from header, ignoring invalid names."""
+
+        self.assertEqual(
+            self.get_timezone(HTTP_X_TIMEZONE="America/New_York"), "America/New_York"
+        )
+        self.assertEqual(
+            self.get_timezone(HTTP_X_TIMEZONE="Not/A_Zone"), settings.TIME_ZONE
+        )
+        self.assertEqual(self.get_timezone(HTTP_X_TIMEZONE="../"), settings.TIME_ZONE)
+
+        for tzname in ["America", "Etc", "a" * 300]:
+            self.assertEqual(
+                self.get_timezone(HTTP_X_TIMEZONE=tzname), settings.TIME_ZONE
+            )
+
+        self.factory.cookies["django_timezone"] = "America"
+        self.assertEqual(self.get_timezone(), settings.TIME_ZONE)
+
+    def test_timezone_cookie(self):
+        """Should activate timezone from cookie, without loading the session."""
+
+        session = self.create_session(**{TIMEZONE_SESSION_KEY: "Europe/Paris"})
+        self.factory.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        self.factory.cookies["django_timezone"] = "America/Chicago"
+
+        with CaptureQueriesContext(connection) as queries:
+            tzname = self.get_timezone()
+
+        self.assertEqual(tzname, "America/Chicago")
+        self.assertEqual(len(queries), 0)
+
+    def test_timezone_session(self):
+        """Should only load session if the request has one."""
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_timezone(), settings.TIME_ZONE)
+
+        self.assertEqual(len(queries), 0)
+
+        session = self.create_session(**{TIMEZONE_SESSION_KEY: "Europe/Paris"})
+        self.factory.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+        self.assertEqual(self.get_timezone(), "Europe/Paris")
+
+
+class RequestMetricsMiddlewareTests(TestsBase):
+    """Tests for recording metrics for each view."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.view_name = "tests:metrics"
+        self.labels = {"view": self.view_name}
+
+        for name in ("request_duration_seconds", "request_queries"):
+            get_histogram(name, "", self.labels).reset()
+
+    def get_response(self, query_count: int):
+        """Run middleware for view that queries users."""
+
+        def view(request):
+            for _ in range(query_count):
+                list(User.objects.filter(id=0))
+
+            return HttpResponse("ok")
+
+        request = self.factory.get("/")
+        request.resolver_match = ResolverMatch(view, (), {}, url_name="metrics")
+        request.resolver_match.view_name = self.view_name
+
+        return RequestMetricsMiddleware(view)(request)
+
+    def test_record_request(self):
+        """Should record latency and queries for view."""
+
+        self.get_response(query_count=2)
+        self.get_response(query_count=2)
+
+        latency = get_histogram("request_duration_seconds", "", self.labels)
+        queries = get_histogram("request_queries", "", self.labels)
+
+        self.assertEqual(latency.count, 2)
+        self.assertEqual(queries.count, 2)
+        self.assertEqual(queries.sum, 4)
+
+    def test_duplicate_queries(self):
+        """Should flag the same statement running many times in a request."""
+
+        duplicates = get_counter("request_duplicate_queries_total", "", self.labels)
+        duplicates.reset()
+        logged_duplicate_queries.clear()
+
+        self.get_response(query_count=2)
+        self.assertEqual(duplicates.value, 0)
+
+        with self.assertLogs("core.middleware", level="WARNING"):
+            self.get_response(query_count=5)
+
+        self.assertEqual(duplicates.value, 1)
+        self.assertIn("users_user", duplicate_query_samples[self.view_name])
+
+        # Only warned once for each view and statement
+        with self.assertNoLogs("core.middleware", level="WARNING"):
+            self.get_response(query_count=5)
+
+        self.assertEqual(duplicates.value, 2)
+
+    def test_metrics_endpoint(self):
+        """Should expose metrics in Prometheus format to staff."""
+
+        url = reverse("core:metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.get(reverse("core:health"))
+        self.client.force_login(create_test_adminuser())
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(
+            'request_duration_seconds_count{view="core:health"}',
+            res.content.decode(),
+        )
+
+        res = self.client.get(reverse("admin-metrics"))
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, "core:health")
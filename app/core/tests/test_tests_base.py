@@ -0,0 +1,59 @@
+"""
+Unit tests for query budget assertions used by other tests.
+"""
+
+from django.urls import reverse
+
+from clubs.tests.utils import create_test_club
+from core.abstracts.tests import AuthApiTestsBase, QueryBudgetAPIClient
+from users.models import User
+from users.tests.utils import create_test_user
+
+
+class QueryAssertionTests(AuthApiTestsBase):
+    """Tests for limiting queries in tests."""
+
+    def test_max_queries(self):
+        """Should fail if more queries than expected are run."""
+
+        with self.assertMaxQueries(2):
+            list(User.objects.all())
+            list(User.objects.all())
+
+        with self.assertRaises(AssertionError):
+            with self.assertMaxQueries(1):
+                list(User.objects.all())
+                list(User.objects.all())
+
+        self.assertMaxQueries(1, list, User.objects.all())
+
+    def test_queries_constant(self):
+        """Should fail if queries grow with the dataset."""
+
+        def create_users(count: int):
+            for _ in range(count):
+                create_test_user()
+
+        self.assertQueriesConstant(lambda: list(User.objects.all()), create_users)
+
+        with self.assertRaises(AssertionError):
+            self.assertQueriesConstant(
+                lambda: [user.profile for user in User.objects.all()], create_users
+            )
+
+    def test_query_budget(self):
+        """Should fail GET requests to routes over their budget."""
+
+        club = create_test_club()
+        url = reverse("api-clubs:club-detail", args=[club.id])
+        self.assertResOk(self.client.get(url))
+
+        self.client.budgets = {"api-clubs:club-detail": 0}
+        self.assertIsInstance(self.client, QueryBudgetAPIClient)
+
+        with self.assertRaisesMessage(AssertionError, "its budget is 0"):
+            self.client.get(url)
+
+        # Other methods and routes are not checked
+        self.client.patch(url, {"name": "Updated"})
+        self.client.get(reverse("api-clubs:club-leaderboard", args=[club.id]))
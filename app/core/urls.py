@@ -7,4 +7,5 @@ app_name = "core"
 urlpatterns = [
     path("", views.index, name="index"),
     path("health/", views.health_check, name="health"),
+    path("metrics/", views.metrics, name="metrics"),
 ]
@@ -2,24 +2,40 @@
 Api Views for core app functionalities.
 """
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST
 from rest_framework.views import exception_handler
 
+from clubs.catalog import cache_catalog_page, get_catalog_version
 from clubs.models import Club
+from core.metrics import get_histograms, render_prometheus
+from core.middleware import duplicate_query_samples
+from utils.admin import get_admin_context
 from utils.logging import print_error
 
 
+@cache_catalog_page
 def index(request):
     """Base view for site."""
     server_time = timezone.now().strftime("%d/%m/%Y, %H:%M:%S")
-    clubs = Club.objects.find()
+
+    # Only queried if the list of clubs is not cached
+    clubs = Club.objects.order_by("id")
 
     return render(
-        request, "core/landing.html", context={"time": server_time, "clubs": clubs}
+        request,
+        "core/landing.html",
+        context={
+            "time": server_time,
+            "clubs": clubs,
+            "catalog_version": get_catalog_version(),
+            "cache_timeout": settings.PAGE_CACHE_TIMEOUT,
+        },
     )
 
 
@@ -29,6 +45,58 @@ def health_check(request):
     return JsonResponse(payload, status=200)
 
 
+def metrics(request):
+    """Performance metrics recorded by this process, in Prometheus format."""
+
+    token = settings.METRICS_TOKEN
+    has_token = token is not None and constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    )
+
+    if not (has_token or request.user.is_staff):
+        return HttpResponseForbidden()
+
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4")
+
+
+def admin_metrics(request):
+    """Summary of request metrics for each view, in the admin site."""
+
+    by_view = {
+        name: {h.labels["view"]: h for h in get_histograms(name)}
+        for name in (
+            "request_duration_seconds",
+            "request_queries",
+            "request_db_duration_seconds",
+            "response_size_bytes",
+        )
+    }
+
+    rows = []
+    for view, latency in sorted(by_view["request_duration_seconds"].items()):
+        queries = by_view["request_queries"].get(view, None)
+        db_time = by_view["request_db_duration_seconds"].get(view, None)
+        size = by_view["response_size_bytes"].get(view, None)
+        count = latency.count or 1
+
+        rows.append(
+            {
+                "view": view,
+                "count": latency.count,
+                "p50_ms": (latency.percentile(50) or 0) * 1000,
+                "p95_ms": (latency.percentile(95) or 0) * 1000,
+                "avg_queries": queries.sum / count if queries else 0,
+                "p95_queries": queries.percentile(95) if queries else 0,
+                "avg_db_ms": db_time.sum / count * 1000 if db_time else 0,
+                "avg_size_kb": size.sum / max(size.count, 1) / 1024 if size else 0,
+                "duplicate_query": duplicate_query_samples.get(view, None),
+            }
+        )
+
+    context = get_admin_context(request, {"title": "Request Metrics", "rows": rows})
+    return render(request, "admin/core/metrics.html", context)
+
+
 def api_exception_handler(exc, context):
     """Custom exception handler for api."""
     response = exception_handler(exc, context)
@@ -5,11 +5,17 @@ Reference: https://realpython.com/python-generate-qr-code/
 """
 
 import uuid
+from typing import TYPE_CHECKING
 
-import segno
 from django.utils import timezone
 
 from utils.files import get_media_path
+from utils.helpers import lazy_import
+
+if TYPE_CHECKING:
+    import segno
+else:
+    segno = lazy_import("segno")
 
 
 def create_qrcode_image(url: str):
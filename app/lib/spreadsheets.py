@@ -1,5 +1,13 @@
-import numpy as np
-import pandas as pd
+from typing import TYPE_CHECKING
+
+from utils.helpers import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
 
 SPREADSHEET_EXTS = ("csv", "xls", "xlsx")
 """Tuple of supported spreadsheet extensions."""
@@ -1,5 +1,85 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils.timesince import timesince
 
-from querycsv.models import QueryCsvUploadJob
+from querycsv.models import CsvUploadStatus, QueryCsvUploadChunk, QueryCsvUploadJob
+from querycsv.signals import send_process_csv_job_signal
 
-admin.site.register(QueryCsvUploadJob)
+
+class QueryCsvUploadChunkInlineAdmin(admin.TabularInline):
+    """List saved chunks of an upload job."""
+
+    model = QueryCsvUploadChunk
+    extra = 0
+    fields = ("offset", "success_rows", "error_rows", "created_at")
+    readonly_fields = fields
+
+    def success_rows(self, obj):
+        return len(obj.success)
+
+    def error_rows(self, obj):
+        return len(obj.errors)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class QueryCsvUploadJobAdmin(admin.ModelAdmin):
+    """Show progress of csv upload jobs, saved by the worker after each chunk."""
+
+    list_display = (
+        "__str__",
+        "serializer",
+        "status",
+        "progress_display",
+        "success_count",
+        "error_count",
+        "last_heartbeat",
+        "created_at",
+    )
+    list_filter = ("status",)
+    readonly_fields = (
+        "status",
+        "progress_display",
+        "total_rows",
+        "processed_rows",
+        "success_count",
+        "error_count",
+        "heartbeat_at",
+        "error",
+    )
+    inlines = (QueryCsvUploadChunkInlineAdmin,)
+    actions = ("resume_jobs",)
+
+    @admin.display(description="Progress")
+    def progress_display(self, obj: QueryCsvUploadJob):
+        if obj.progress is None:
+            return "-"
+
+        return f"{obj.processed_rows} / {obj.total_rows} ({obj.progress:.0f}%)"
+
+    @admin.display(description="Last heartbeat", ordering="heartbeat_at")
+    def last_heartbeat(self, obj: QueryCsvUploadJob):
+        if obj.heartbeat_at is None:
+            return "-"
+
+        label = f"{timesince(obj.heartbeat_at)} ago"
+        return f"{label} (stalled)" if obj.is_stalled else label
+
+    @admin.action(description="Resume failed or stalled jobs")
+    def resume_jobs(self, request, queryset):
+        jobs = [
+            job
+            for job in queryset
+            if job.status == CsvUploadStatus.FAILED or job.is_stalled
+        ]
+
+        for job in jobs:
+            send_process_csv_job_signal(job)
+
+        self.message_user(request, f"Resumed {len(jobs)} jobs.", messages.SUCCESS)
+
+
+admin.site.register(QueryCsvUploadJob, QueryCsvUploadJobAdmin)
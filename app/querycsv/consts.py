@@ -3,4 +3,27 @@ QUERYCSV_MEDIA_SUBDIR = "core/querycsv/"
 
 EXTRA_QUERYCSV_FIELDS = ("SKIP",)
 
-__all__ = ["QUERYCSV_MEDIA_SUBDIR", "EXTRA_QUERYCSV_FIELDS"]
+QUERYCSV_UPLOAD_CHUNK_SIZE = 100
+"""Rows saved in each transaction of an upload job, progress is saved after each."""
+
+QUERYCSV_UPLOAD_TASK_ROWS = 2000
+"""Rows each worker saves when a large upload job is split across workers."""
+
+QUERYCSV_UPLOAD_PARALLEL_MIN_ROWS = 5000
+"""Upload jobs with fewer rows are processed by a single worker."""
+
+QUERYCSV_DRY_RUN_REPORT_ROWS = 100
+"""Rejected rows shown after validating an upload, before it is processed."""
+
+QUERYCSV_UPLOAD_STALLED_SECONDS = 60 * 5
+"""Processing jobs without progress for this long likely stopped."""
+
+__all__ = [
+    "QUERYCSV_MEDIA_SUBDIR",
+    "EXTRA_QUERYCSV_FIELDS",
+    "QUERYCSV_UPLOAD_CHUNK_SIZE",
+    "QUERYCSV_UPLOAD_TASK_ROWS",
+    "QUERYCSV_UPLOAD_PARALLEL_MIN_ROWS",
+    "QUERYCSV_DRY_RUN_REPORT_ROWS",
+    "QUERYCSV_UPLOAD_STALLED_SECONDS",
+]
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:51
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("querycsv", "0002_alter_querycsvuploadjob_serializer"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="querycsvuploadjob",
+            name="error",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="querycsvuploadjob",
+            name="error_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="querycsvuploadjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True, help_text="Last time the job saved progress.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="querycsvuploadjob",
+            name="processed_rows",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Rows saved so far, processing resumes after them."
+            ),
+        ),
+        migrations.AddField(
+            model_name="querycsvuploadjob",
+            name="success_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="querycsvuploadjob",
+            name="total_rows",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="QueryCsvUploadChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "offset",
+                    models.PositiveIntegerField(
+                        help_text="Index of the chunk's first row."
+                    ),
+                ),
+                (
+                    "success",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                (
+                    "errors",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="querycsv.querycsvuploadjob",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="querycsvuploadchunk",
+            constraint=models.UniqueConstraint(
+                fields=("job", "offset"), name="unique_offset_per_upload_job"
+            ),
+        ),
+    ]
@@ -2,18 +2,21 @@
 CSV data logging models.
 """
 
+from datetime import timedelta
 from pathlib import Path
 from typing import ClassVar, Optional, Type, TypedDict
 
 from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import FileExtensionValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
 from core.abstracts.models import ManagerBase, ModelBase
 from lib.spreadsheets import SPREADSHEET_EXTS, read_spreadsheet
-from querycsv.consts import QUERYCSV_MEDIA_SUBDIR
+from querycsv.consts import QUERYCSV_MEDIA_SUBDIR, QUERYCSV_UPLOAD_STALLED_SECONDS
 from querycsv.serializers import CsvModelSerializer
 from utils.files import get_file_path
 from utils.helpers import get_import_path, import_from_path
@@ -90,6 +93,21 @@ class QueryCsvUploadJob(ModelBase):
         blank=True, help_text="Key value pairs, column name => model field"
     )
 
+    # Progress fields
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(
+        default=0, help_text="Rows saved so far, processing resumes after them."
+    )
+    success_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True, help_text="Last time the job saved progress."
+    )
+    error = models.TextField(null=True, blank=True)
+
+    # Foreign Relationships
+    chunks: models.QuerySet["QueryCsvUploadChunk"]
+
     # Overrides
     objects: ClassVar[QueryCsvUploadJobManager] = QueryCsvUploadJobManager()
 
@@ -128,6 +146,26 @@ class QueryCsvUploadJob(ModelBase):
     def csv_headers(self):
         return list(self.spreadsheet.columns)
 
+    @property
+    def progress(self) -> Optional[float]:
+        """Percent of rows processed, if the job started."""
+
+        if not self.total_rows:
+            return None
+
+        return self.processed_rows / self.total_rows * 100
+
+    @property
+    def is_stalled(self) -> bool:
+        """Whether the job is processing, but has not saved progress recently."""
+
+        return (
+            self.status == CsvUploadStatus.PROCESSING
+            and self.heartbeat_at is not None
+            and timezone.now() - self.heartbeat_at
+            > timedelta(seconds=QUERYCSV_UPLOAD_STALLED_SECONDS)
+        )
+
     # Methods
     def add_field_mapping(self, column_name: str, field_name: str, commit=True):
         """Add custom field mapping."""
@@ -143,3 +181,49 @@ class QueryCsvUploadJob(ModelBase):
 
         if commit:
             self.save()
+
+    def update_progress(self, **fields):
+        """Save fields without saving the rest of the job, and record a heartbeat."""
+
+        fields = {"heartbeat_at": timezone.now(), **fields}
+
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+        QueryCsvUploadJob.objects.filter(id=self.id).update(
+            **fields, updated_at=timezone.now()
+        )
+
+    def get_results(self) -> tuple[list[dict], list[dict]]:
+        """Get reports of rows saved successfully, and rows with errors."""
+
+        success, errors = [], []
+
+        for chunk in self.chunks.order_by("offset"):
+            success.extend(chunk.success)
+            errors.extend(chunk.errors)
+
+        return success, errors
+
+
+class QueryCsvUploadChunk(ModelBase):
+    """
+    Rows of an upload job saved in the same transaction.
+
+    Created with the job's progress, so the job's report includes each
+    row once, even if processing was restarted.
+    """
+
+    job = models.ForeignKey(
+        QueryCsvUploadJob, on_delete=models.CASCADE, related_name="chunks"
+    )
+    offset = models.PositiveIntegerField(help_text="Index of the chunk's first row.")
+    success = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    errors = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("job", "offset"), name="unique_offset_per_upload_job"
+            )
+        ]
@@ -1,16 +1,32 @@
 import re
 from enum import Enum
-from typing import Literal, Optional, OrderedDict, Type, TypedDict
+from typing import TYPE_CHECKING, Literal, Optional, OrderedDict, Type, TypedDict
 
-import pandas as pd
-from django.db import models
+from django.db import DatabaseError, models, transaction
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils import humanize_datetime
 
 from core.abstracts.serializers import ModelSerializerBase
+from core.db.routers import use_replica
 from lib.spreadsheets import read_spreadsheet
-from querycsv.consts import QUERYCSV_MEDIA_SUBDIR
-from querycsv.models import QueryCsvUploadJob
-from querycsv.serializers import CsvModelSerializer
+from querycsv.consts import (
+    QUERYCSV_MEDIA_SUBDIR,
+    QUERYCSV_UPLOAD_CHUNK_SIZE,
+    QUERYCSV_UPLOAD_TASK_ROWS,
+)
+from querycsv.models import CsvUploadStatus, QueryCsvUploadChunk, QueryCsvUploadJob
+from querycsv.serializers import CsvModelSerializer, WritableSlugRelatedField
 from utils.files import get_media_path
+from utils.helpers import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
 
 
 class FieldMappingType(TypedDict):
@@ -18,6 +34,42 @@ class FieldMappingType(TypedDict):
     field_name: str
 
 
+class RejectedRecord(dict):
+    """Csv row that failed validation before saving, see `validate_dataframe`."""
+
+    def __init__(self, data: dict, row: int, errors: dict[str, list[str]]):
+        super().__init__(data)
+
+        self.row = row
+        self.errors = errors
+
+    @classmethod
+    def dump(cls, records: list[dict]) -> list[dict]:
+        """Convert rows to json, keeping errors of rejected rows."""
+
+        return [
+            (
+                {"data": dict(record), "row": record.row, "errors": record.errors}
+                if isinstance(record, cls)
+                else {"data": record}
+            )
+            for record in records
+        ]
+
+    @classmethod
+    def load(cls, data: list[dict]) -> list[dict]:
+        """Convert rows from json, see `dump`."""
+
+        return [
+            (
+                cls(item["data"], row=item["row"], errors=item["errors"])
+                if "errors" in item
+                else item["data"]
+            )
+            for item in data
+        ]
+
+
 class QueryCsvService:
     """Handle uploads and downloads of models using csvs."""
 
@@ -42,13 +94,243 @@ class QueryCsvService:
         self.actions = [action.value for action in self.Actions]
 
     @classmethod
-    def upload_from_job(cls, job: QueryCsvUploadJob):
-        """Upload csv using predefined job."""
+    def upload_from_job(
+        cls, job: QueryCsvUploadJob, chunk_size=QUERYCSV_UPLOAD_CHUNK_SIZE
+    ):
+        """
+        Upload csv using predefined job, saving progress after each chunk.
+
+        Each chunk of rows is saved in a transaction with the job's progress,
+        so if processing stops, calling this again resumes after the last
+        saved chunk. Returns reports for all rows of the job.
+        """
+
+        svc, records = cls.start_job(job)
+        svc.save_job_rows(job, records, chunk_size=chunk_size)
+
+        return job.get_results()
+
+    @classmethod
+    def start_job(cls, job: QueryCsvUploadJob):
+        """Mark job as processing, return service and rows to upload."""
 
         assert job.serializer is not None, "Upload job must container serializer."
 
         svc = cls(serializer_class=job.serializer_class)
-        return svc.upload_csv(job.file, custom_field_maps=job.custom_fields)
+        records = svc.get_upload_records(job.file, custom_field_maps=job.custom_fields)
+
+        job.update_progress(
+            status=CsvUploadStatus.PROCESSING, total_rows=len(records), error=None
+        )
+
+        return svc, records
+
+    def save_job_rows(
+        self,
+        job: QueryCsvUploadJob,
+        records: list[dict],
+        start=0,
+        end: Optional[int] = None,
+        chunk_size=QUERYCSV_UPLOAD_CHUNK_SIZE,
+        records_start=0,
+    ):
+        """
+        Save job's rows from start to end in chunks, skipping saved chunks.
+
+        Chunks are identified by the offset of their first row, so start
+        should be a multiple of the chunk size. If another worker is saving
+        the same chunk, this waits for it and skips the chunk.
+
+        Parameters
+        ----------
+            - records (list[dict]): Rows of the upload job, starting at records_start.
+            - start (int): First row to save.
+            - end (int): Row to stop before, defaults to the last row.
+            - chunk_size (int): Rows saved in each transaction.
+            - records_start (int): Row of the first record, if only some rows are given.
+        """
+
+        records_end = records_start + len(records)
+        end = records_end if end is None else min(end, records_end)
+
+        for offset in range(start, end, chunk_size):
+            chunk_end = min(offset + chunk_size, end)
+
+            with transaction.atomic():
+                chunk, created = QueryCsvUploadChunk.objects.get_or_create(
+                    job=job, offset=offset
+                )
+                if not created:
+                    continue
+
+                first, last = offset - records_start, chunk_end - records_start
+                chunk.success, chunk.errors = self.save_records(records[first:last])
+                chunk.save()
+
+                QueryCsvUploadJob.objects.filter(id=job.id).update(
+                    processed_rows=models.F("processed_rows") + chunk_end - offset,
+                    success_count=models.F("success_count") + len(chunk.success),
+                    error_count=models.F("error_count") + len(chunk.errors),
+                    heartbeat_at=timezone.now(),
+                    updated_at=timezone.now(),
+                )
+
+        job.refresh_from_db(
+            fields=["processed_rows", "success_count", "error_count", "heartbeat_at"]
+        )
+
+    def get_job_row_ranges(
+        self,
+        records: list[dict],
+        task_rows=QUERYCSV_UPLOAD_TASK_ROWS,
+        chunk_size=QUERYCSV_UPLOAD_CHUNK_SIZE,
+    ) -> list[list[tuple[int, int]]]:
+        """
+        Split rows into ranges that can be saved by different workers.
+
+        Ranges are grouped if their rows write the same objects, see
+        `get_row_conflict_keys`. Ranges in a group must be saved in order,
+        and groups can be saved at the same time.
+
+        Parameters
+        ----------
+            - records (list[dict]): Rows of the upload job.
+            - task_rows (int): Rows in each range, rounded up to a multiple of chunk_size.
+            - chunk_size (int): Rows saved in each transaction.
+        """
+
+        task_rows = -(-max(task_rows, 1) // chunk_size) * chunk_size
+        ranges = [
+            (start, min(start + task_rows, len(records)))
+            for start in range(0, len(records), task_rows)
+        ]
+
+        # Union ranges that contain the same unique value
+        parents = list(range(len(ranges)))
+
+        def find(i: int):
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        seen_keys = {}
+        unique_together = self.get_unique_together_columns()
+        missing_slugs = self.get_missing_slug_values(records)
+
+        for index, record in enumerate(records):
+            range_index = index // task_rows
+
+            for key in self.get_row_conflict_keys(
+                record, unique_together, missing_slugs
+            ):
+                other = seen_keys.setdefault(key, range_index)
+                parents[find(range_index)] = find(other)
+
+        groups: dict[int, list[tuple[int, int]]] = {}
+        for range_index, row_range in enumerate(ranges):
+            groups.setdefault(find(range_index), []).append(row_range)
+
+        return list(groups.values())
+
+    @staticmethod
+    def _clean_value(value) -> str:
+        return str(value).strip() if value is not None else ""
+
+    def _get_slug_values(self, record: dict, name: str, scope: list[str]):
+        """Get values of a slug field in a row, with the row's scope values."""
+
+        values = record.get(name, None)
+        if not isinstance(values, list):
+            values = [values]
+
+        scope_values = tuple(self._clean_value(record.get(c, None)) for c in scope)
+
+        return [
+            (self._clean_value(value), *scope_values)
+            for value in values
+            if self._clean_value(value) != ""
+        ]
+
+    def get_missing_slug_values(self, records: list[dict]):
+        """
+        Find values of writable slug fields that do not exist yet, in one query per field.
+
+        Related objects are created for missing values, so rows sharing them
+        may conflict. Relations of the related model that are also columns,
+        like a role's club, scope the values. Returns the scope columns and
+        missing values for each field.
+        """
+
+        columns = self.get_field_columns()
+        missing: dict[str, tuple[list[str], set[tuple[str, ...]]]] = {}
+
+        for name, field in self.fields.items():
+            relation = getattr(field, "child_relation", field)
+            if field.read_only or not isinstance(relation, WritableSlugRelatedField):
+                continue
+
+            model = relation.queryset.model
+            scope_fields = [
+                model_field
+                for model_field in model._meta.concrete_fields
+                if model_field.is_relation and model_field.name in columns
+            ]
+            scope = [columns[model_field.name] for model_field in scope_fields]
+
+            values = {
+                value
+                for record in records
+                for value in self._get_slug_values(record, name, scope)
+            }
+            if len(values) == 0:
+                continue
+
+            existing = model._default_manager.filter(
+                **{f"{relation.slug_field}__in": {value[0] for value in values}}
+            ).values_list(
+                relation.slug_field,
+                *(model_field.attname for model_field in scope_fields),
+            )
+            existing = {tuple(self._clean_value(v) for v in row) for row in existing}
+
+            missing[name] = (scope, values - existing)
+
+        return missing
+
+    def get_row_conflict_keys(
+        self,
+        record: dict,
+        unique_together: list[tuple[list[str], list[str]]],
+        missing_slugs: dict[str, tuple[list[str], set[tuple[str, ...]]]],
+    ):
+        """
+        Get keys for values of a row that other rows may also write.
+
+        Rows sharing a unique value, or values of a unique together
+        constraint, create or update the same object. Rows sharing a value
+        of a writable slug field that does not exist yet may create the
+        same related object, see `get_missing_slug_values`.
+        """
+
+        clean = self._clean_value
+        keys = []
+
+        for name in self.unique_fields:
+            keys.append((name, clean(record.get(name, None))))
+
+        for fields, names in unique_together:
+            values = tuple(clean(record.get(name, None)) for name in names)
+            keys.append((tuple(fields), values) if all(values) else (None, ""))
+
+        for name, (scope, missing) in missing_slugs.items():
+            keys.extend(
+                (name, value)
+                for value in self._get_slug_values(record, name, scope)
+                if value in missing
+            )
+
+        return [key for key in keys if key[1] != ""]
 
     @classmethod
     def queryset_to_csv(
@@ -62,7 +344,9 @@ class QueryCsvService:
     def download_csv(self, queryset: models.QuerySet) -> str:
         """Download: Convert queryset to csv, return path to csv."""
 
-        data = self.serializer_class(queryset, many=True).data
+        with use_replica():
+            data = self.serializer_class(queryset, many=True).data
+
         flattened = [self.serializer_class.json_to_flat(obj) for obj in data]
 
         df = pd.json_normalize(flattened)
@@ -103,11 +387,36 @@ class QueryCsvService:
         return filepath
 
     def upload_csv(
-        self, path: str, custom_field_maps: Optional[list[FieldMappingType]] = None
+        self,
+        path: str,
+        custom_field_maps: Optional[list[FieldMappingType]] = None,
+        dry_run=False,
     ):
         """
         Upload: Given path to csv, create/update models and
         return successful and failed objects.
+
+        If dry_run is set, nothing is saved, and only rows that failed
+        validation are returned as failed, see `validate_dataframe`.
+        """
+
+        records = self.get_upload_records(path, custom_field_maps=custom_field_maps)
+
+        if dry_run:
+            valid = [r for r in records if not isinstance(r, RejectedRecord)]
+            rejected = [r for r in records if isinstance(r, RejectedRecord)]
+            return valid, rejected
+
+        return self.save_records(records)
+
+    def get_upload_records(
+        self, path: str, custom_field_maps: Optional[list[FieldMappingType]] = None
+    ) -> list[dict]:
+        """
+        Read csv rows as data for the serializer, using custom field mappings.
+
+        Rows that fail validation are returned as `RejectedRecord`, and are
+        reported as failed without being passed to the serializer.
         """
 
         # Start by importing csv
@@ -183,24 +492,177 @@ class QueryCsvService:
                     lambda val: val if val != "" else None
                 )
 
+        row_errors = self.validate_dataframe(df)
+
         # Convert df to list of dicts, drop null fields
         upload_data = df.to_dict("records")
-        filtered_data = [
+        records = [
             {k: v for k, v in record.items() if v is not None} for record in upload_data
         ]
 
-        # Finally, save data if valid
+        for row, errors in row_errors.items():
+            records[row] = RejectedRecord(records[row], row=row, errors=errors)
+
+        return records
+
+    def get_field_columns(self) -> dict[str, str]:
+        """Get csv column for each model field, by the serializer field's source."""
+
+        return {field.source or name: name for name, field in self.fields.items()}
+
+    def get_unique_together_columns(self) -> list[tuple[list[str], list[str]]]:
+        """
+        Get model fields and csv columns of each unique together constraint.
+
+        Conditional constraints, like one owner per club, only apply to some
+        rows, so they are left to the database.
+        """
+
+        # Constraints use model fields, which may be read from columns with other names
+        columns = self.get_field_columns()
+
+        return [
+            (list(constraint.fields), [columns.get(n, n) for n in constraint.fields])
+            for constraint in self.serializer.model_class._meta.constraints
+            if isinstance(constraint, models.UniqueConstraint)
+            and constraint.condition is None
+            and len(constraint.fields) > 0
+        ]
+
+    def validate_dataframe(self, df: "pd.DataFrame") -> dict[int, dict[str, list[str]]]:
+        """
+        Find rows that would fail to save, before any database queries.
+
+        Checks required fields, emails, integers, dates, max lengths, and
+        values of unique fields repeated in earlier rows. Only checks that
+        can be done on whole columns are included, the serializer still
+        validates all other rows. Returns errors by field for each row index.
+        """
+
+        checks: list[tuple[str, str, "pd.Series"]] = []
+
+        for name, field in self.fields.items():
+            if field.read_only or isinstance(
+                field,
+                (
+                    serializers.BaseSerializer,
+                    serializers.ManyRelatedField,
+                    serializers.ListField,
+                ),
+            ):
+                continue
+
+            if name not in df.columns:
+                if name in self.required_fields:
+                    missing = pd.Series(True, index=df.index)
+                    checks.append((name, field.error_messages["required"], missing))
+                continue
+
+            column = df[name]
+            present = column.notna()
+            values = column[present].astype(str).str.strip()
+
+            if name in self.required_fields:
+                checks.append((name, field.error_messages["required"], ~present))
+
+            if isinstance(field, serializers.EmailField):
+                invalid = ~values.str.fullmatch(r"[^@\s]+@[^@\s]+")
+                checks.append((name, field.error_messages["invalid"], invalid))
+
+            elif isinstance(field, serializers.IntegerField):
+                numbers = pd.to_numeric(values, errors="coerce")
+                invalid = numbers.isna() | (numbers % 1 != 0)
+                checks.append((name, field.error_messages["invalid"], invalid))
+
+            elif isinstance(field, serializers.DateField):
+                input_formats = field.input_formats or api_settings.DATE_INPUT_FORMATS
+                message = field.error_messages["invalid"].format(
+                    format=humanize_datetime.date_formats(input_formats)
+                )
+
+                # Other formats are left to the serializer
+                if list(input_formats) == [ISO_8601]:
+                    dates = pd.to_datetime(values, errors="coerce", format="ISO8601")
+                    checks.append((name, message, dates.isna()))
+
+            elif isinstance(field, serializers.DateTimeField):
+                input_formats = (
+                    field.input_formats or api_settings.DATETIME_INPUT_FORMATS
+                )
+                message = field.error_messages["invalid"].format(
+                    format=humanize_datetime.datetime_formats(input_formats)
+                )
+
+                if list(input_formats) == [ISO_8601]:
+                    dates = pd.to_datetime(values, errors="coerce", format="ISO8601")
+                    checks.append((name, message, dates.isna()))
+
+            max_length = getattr(field, "max_length", None)
+            if max_length is not None:
+                message = field.error_messages["max_length"].format(
+                    max_length=max_length
+                )
+                checks.append((name, message, values.str.len() > max_length))
+
+        # Rows repeating unique values would update objects created by earlier rows
+        for name in self.unique_fields:
+            if name not in df.columns:
+                continue
+
+            values = df[name].str.strip()
+            repeated = values.notna() & values.duplicated(keep="first")
+            checks.append((name, "This value is used in an earlier row.", repeated))
+
+        for fields, names in self.get_unique_together_columns():
+            if any(name not in df.columns for name in names):
+                continue
+
+            rows = df[names].apply(lambda col: col.str.strip())
+            repeated = rows.notna().all(axis=1) & rows.duplicated(keep="first")
+            message = f"The fields {', '.join(fields)} must make a unique set."
+            checks.append((api_settings.NON_FIELD_ERRORS_KEY, message, repeated))
+
+        row_errors: dict[int, dict[str, list[str]]] = {}
+
+        for name, message, failed in checks:
+            failed = failed.reindex(df.index, fill_value=False).to_numpy(dtype=bool)
+
+            for row in np.flatnonzero(failed):
+                row_errors.setdefault(int(row), {}).setdefault(name, []).append(
+                    str(message)
+                )
+
+        return row_errors
+
+    def save_records(self, records: list[dict]):
+        """Create or update objects from csv rows, return successful and failed rows."""
+
         success = []
         errors = []
 
-        # Note: string stripping is done in the serializer
-        serializers = [
-            self.serializer_class(data=data, flat=True) for data in filtered_data
-        ]
+        for data in records:
+            if isinstance(data, RejectedRecord):
+                errors.append({**data, "errors": data.errors})
+                continue
+
+            # Note: string stripping is done in the serializer
+            serializer = self.serializer_class(data=data, flat=True)
+
+            # Savepoint, so rows failing database constraints don't abort the chunk
+            try:
+                with transaction.atomic():
+                    is_valid = serializer.is_valid()
+                    if is_valid:
+                        serializer.save()
+            except DatabaseError as e:
+                report = {
+                    **data,
+                    "errors": {api_settings.NON_FIELD_ERRORS_KEY: [str(e)]},
+                }
+                errors.append(report)
+                continue
 
-        for serializer in serializers:
-            if serializer.is_valid():
-                serializer.save()
+            if is_valid:
                 success.append(serializer.data)
             else:
                 report = {**serializer.data, "errors": {**serializer.errors}}
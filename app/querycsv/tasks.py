@@ -1,16 +1,23 @@
-import pandas as pd
-from celery import shared_task
+from typing import TYPE_CHECKING
+
+from celery import chain, chord, group, shared_task
 from django.core.mail import EmailMultiAlternatives
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 
-from querycsv.consts import QUERYCSV_MEDIA_SUBDIR
+from app.settings import DJANGO_ENABLE_CELERY
+from querycsv.consts import QUERYCSV_MEDIA_SUBDIR, QUERYCSV_UPLOAD_PARALLEL_MIN_ROWS
 from querycsv.models import CsvUploadStatus, QueryCsvUploadJob
-from querycsv.services import QueryCsvService
+from querycsv.services import QueryCsvService, RejectedRecord
 from utils.files import get_media_path
-from utils.helpers import import_from_path
+from utils.helpers import import_from_path, lazy_import
 from utils.models import save_file_to_model
 
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
 
 @shared_task
 def upload_csv_task(filepath: str, serializer_path: str):
@@ -26,11 +33,76 @@ def process_csv_job_task(job_id: int):
     """
     Processes a predefined upload job.
     Used for larger uploads.
+
+    Progress is saved after each chunk of rows, so if the worker stops and
+    the task runs again, it resumes after the last saved chunk.
+
+    Large jobs are split into ranges of rows, saved by separate workers,
+    then `finalize_csv_job_task` creates the report once all are saved.
+    The file is only read once, each worker gets the rows of its range.
     """
-    # Process job
+
     job = QueryCsvUploadJob.objects.find_by_id(job_id)
-    success, failed = QueryCsvService.upload_from_job(job)
-    job.status = CsvUploadStatus.SUCCESS
+    if job is None or job.status == CsvUploadStatus.SUCCESS:
+        return
+
+    try:
+        svc, records = QueryCsvService.start_job(job)
+
+        if not DJANGO_ENABLE_CELERY or len(records) < QUERYCSV_UPLOAD_PARALLEL_MIN_ROWS:
+            svc.save_job_rows(job, records)
+            finalize_csv_job_task(job_id)
+            return
+
+        groups = svc.get_job_row_ranges(records)
+    except Exception as e:
+        job.update_progress(status=CsvUploadStatus.FAILED, error=str(e))
+        raise
+
+    # Ranges in the same group share unique values, so are saved in order
+    header = group(
+        chain(
+            process_csv_rows_task.si(
+                job_id, start, end, RejectedRecord.dump(records[start:end])
+            )
+            for start, end in ranges
+        )
+        for ranges in groups
+    )
+    chord(header)(finalize_csv_job_task.si(job_id))
+
+
+@shared_task
+def process_csv_rows_task(job_id: int, start: int, end: int, records: list[dict]):
+    """
+    Save a range of rows for an upload job, skipping chunks already saved.
+
+    Records are the rows from start to end, see `RejectedRecord.dump`.
+    """
+
+    job = QueryCsvUploadJob.objects.find_by_id(job_id)
+    if job is None or job.status == CsvUploadStatus.SUCCESS:
+        return
+
+    try:
+        svc = QueryCsvService(serializer_class=job.serializer_class)
+        svc.save_job_rows(
+            job, RejectedRecord.load(records), start=start, end=end, records_start=start
+        )
+    except Exception as e:
+        job.update_progress(status=CsvUploadStatus.FAILED, error=str(e))
+        raise
+
+
+@shared_task
+def finalize_csv_job_task(job_id: int):
+    """Create report from saved chunks of an upload job, in row order."""
+
+    job = QueryCsvUploadJob.objects.find_by_id(job_id)
+    if job is None or job.status != CsvUploadStatus.PROCESSING:
+        return
+
+    success, failed = job.get_results()
 
     # Create report
     report_file_path = get_media_path(
@@ -48,6 +120,7 @@ def process_csv_job_task(job_id: int):
 
     save_file_to_model(job, report_file_path, field="report")
     job.refresh_from_db()
+    job.update_progress(status=CsvUploadStatus.SUCCESS)
 
     # Send admin email
     if job.notify_email:
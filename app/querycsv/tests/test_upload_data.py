@@ -2,11 +2,15 @@
 Import/upload data tests.
 """
 
+from unittest.mock import patch
+
 from django.contrib.postgres.aggregates import StringAgg
-from django.db import models
+from django.core import mail
+from django.db import connection, models
 
-from querycsv.models import QueryCsvUploadJob
+from querycsv.models import CsvUploadStatus, QueryCsvUploadChunk, QueryCsvUploadJob
 from querycsv.services import QueryCsvService
+from querycsv.tasks import process_csv_job_task
 from querycsv.tests.utils import (
     CsvDataM2MTestsBase,
     CsvDataM2OTestsBase,
@@ -117,6 +121,65 @@ class UploadCsvTests(UploadCsvTestsBase):
         # Validate data
         self.assertObjectsHaveFields(updated_records)
 
+    def test_upload_csv_rejected_rows(self):
+        """Should report rows that fail validation without saving them."""
+
+        self.data_to_csv(
+            [
+                {"name": "First", "unique_name": "first"},
+                {"name": "", "unique_name": "missing-name"},
+                {"name": "Repeated", "unique_name": " first "},
+                {"name": "Second", "unique_name": "second"},
+            ]
+        )
+
+        # Dry run does not query the database
+        with self.assertNumQueries(0):
+            valid, rejected = self.service.upload_csv(path=self.filepath, dry_run=True)
+
+        self.assertEqual([r["unique_name"] for r in valid], ["first", "second"])
+        self.assertEqual([r.row for r in rejected], [1, 2])
+        self.assertIn("name", rejected[0].errors)
+        self.assertIn("unique_name", rejected[1].errors)
+        self.assertEqual(self.repo.count(), 0)
+
+        success, failed = self.service.upload_csv(path=self.filepath)
+
+        self.assertEqual(len(success), 2)
+        self.assertEqual(
+            [report["errors"] for report in failed],
+            [rejected[0].errors, rejected[1].errors],
+        )
+        self.assertEqual(self.repo.count(), 2)
+
+    def test_upload_csv_database_errors(self):
+        """Should report rows failing in the database, and save other rows."""
+
+        self.data_to_csv(
+            [
+                {"name": "First", "unique_name": "first"},
+                {"name": "Broken", "unique_name": "broken"},
+                {"name": "Second", "unique_name": "second"},
+            ]
+        )
+        save = self.serializer_class.save
+
+        def save_or_fail(serializer, **kwargs):
+            if serializer.validated_data["unique_name"] == "broken":
+                # Aborts the transaction, like a violated constraint
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1 / 0")
+
+            return save(serializer, **kwargs)
+
+        with patch.object(self.serializer_class, "save", save_or_fail):
+            success, failed = self.service.upload_csv(path=self.filepath)
+
+        self.assertEqual([r["unique_name"] for r in success], ["first", "second"])
+        self.assertEqual(len(failed), 1)
+        self.assertIn("non_field_errors", failed[0]["errors"])
+        self.assertEqual(self.repo.count(), 2)
+
 
 class UploadCsvJobTests(UploadCsvTestsBase):
     """Tests for uploading with QSCsv Model."""
@@ -164,6 +227,154 @@ class UploadCsvJobTests(UploadCsvTestsBase):
         self.assertObjectsExist(pre_queryset=objects_before)
         self.assertObjectsHaveFields(expected_objects=objects_before)
 
+    def test_upload_from_job_progress(self):
+        """Should save progress after each chunk of rows."""
+
+        objects_before = self.initialize_csv_data()
+        job = QueryCsvUploadJob.objects.create(
+            filepath=self.filepath, serializer_class=self.serializer_class
+        )
+
+        success, failed = QueryCsvService.upload_from_job(job, chunk_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CsvUploadStatus.PROCESSING)
+        self.assertEqual(job.total_rows, self.dataset_size)
+        self.assertEqual(job.processed_rows, self.dataset_size)
+        self.assertEqual(job.success_count, len(success))
+        self.assertEqual(job.error_count, len(failed))
+        self.assertEqual(job.progress, 100)
+        self.assertIsNotNone(job.heartbeat_at)
+        self.assertEqual(list(job.chunks.values_list("offset", flat=True)), [0, 2, 4])
+        self.assertObjectsExist(objects_before, failed)
+
+    def test_upload_from_job_resume(self):
+        """Should resume after the last saved chunk if processing stopped."""
+
+        objects_before = self.initialize_csv_data()
+        job = QueryCsvUploadJob.objects.create(
+            filepath=self.filepath, serializer_class=self.serializer_class
+        )
+        save_records = QueryCsvService.save_records
+        calls = []
+
+        def crash_on_second_chunk(service, records):
+            calls.append(len(records))
+            if len(calls) == 2:
+                raise RuntimeError("Worker stopped")
+
+            return save_records(service, records)
+
+        with patch.object(QueryCsvService, "save_records", crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                QueryCsvService.upload_from_job(job, chunk_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.processed_rows, 2)
+        self.assertEqual(self.repo.count(), 2)
+
+        success, failed = QueryCsvService.upload_from_job(job, chunk_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.processed_rows, self.dataset_size)
+        self.assertEqual(len(success) + len(failed), self.dataset_size)
+        self.assertEqual(job.success_count, len(success))
+        self.assertObjectsExist(objects_before, failed)
+
+    def test_process_job_task(self):
+        """Should mark job successful and save report, or mark job failed."""
+
+        self.initialize_csv_data()
+        job = QueryCsvUploadJob.objects.create(
+            filepath=self.filepath, serializer_class=self.serializer_class
+        )
+
+        with patch.object(
+            QueryCsvService, "save_records", side_effect=RuntimeError("Bad row")
+        ):
+            with self.assertRaises(RuntimeError):
+                process_csv_job_task(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CsvUploadStatus.FAILED)
+        self.assertEqual(job.error, "Bad row")
+
+        process_csv_job_task(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CsvUploadStatus.SUCCESS)
+        self.assertIsNone(job.error)
+        self.assertEqual(job.success_count, self.dataset_size)
+        self.assertTrue(job.report)
+
+    def test_job_row_ranges(self):
+        """Should group ranges of rows that share unique values."""
+
+        records = [
+            {"unique_name": "a"},
+            {"unique_name": "b"},
+            {"unique_name": "c"},
+            {"unique_name": " a "},
+            {"unique_name": "d"},
+            {"name": "No unique values"},
+        ]
+
+        groups = self.service.get_job_row_ranges(records, task_rows=2, chunk_size=2)
+        self.assertEqual(groups, [[(0, 2), (2, 4)], [(4, 6)]])
+
+        # Ranges are rounded up to whole chunks
+        groups = self.service.get_job_row_ranges(records, task_rows=3, chunk_size=2)
+        self.assertEqual(groups, [[(0, 4)], [(4, 6)]])
+
+    def test_process_job_task_parallel(self):
+        """Should split large jobs into ranges, then report rows in order."""
+
+        objects_before = self.initialize_csv_data()
+        job = QueryCsvUploadJob.objects.create(
+            filepath=self.filepath,
+            serializer_class=self.serializer_class,
+            notify_email="admin@example.com",
+        )
+
+        get_upload_records = QueryCsvService.get_upload_records
+
+        with (
+            patch("querycsv.tasks.DJANGO_ENABLE_CELERY", True),
+            patch("querycsv.tasks.QUERYCSV_UPLOAD_PARALLEL_MIN_ROWS", 0),
+            patch.object(
+                QueryCsvService,
+                "get_job_row_ranges",
+                lambda svc, records: [[(0, 2)], [(2, 4), (4, 5)]],
+            ),
+            patch.object(
+                QueryCsvService,
+                "get_upload_records",
+                autospec=True,
+                side_effect=get_upload_records,
+            ) as read_records,
+        ):
+            process_csv_job_task(job.id)
+
+        # File is read once, not by each range
+        self.assertEqual(read_records.call_count, 1)
+        self.assertEqual(
+            sorted(QueryCsvUploadChunk.objects.filter(job=job).values_list("offset")),
+            [(0,), (2,), (4,)],
+        )
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CsvUploadStatus.SUCCESS)
+        self.assertEqual(job.processed_rows, self.dataset_size)
+        self.assertTrue(job.report)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertObjectsExist(objects_before)
+
+        success, _ = job.get_results()
+        self.assertEqual(
+            [row["unique_name"] for row in success],
+            list(self.df["unique_name"]),
+        )
+
 
 class UploadCsvM2OFieldsTests(UploadCsvTestsBase, CsvDataM2OTestsBase):
     """Test uploading csvs for models with many-to-one fields."""
@@ -106,3 +106,37 @@ class UploadCsvViewsTests(UploadCsvTestsBase):
 
         self.assertEqual(job.custom_fields[0]["column_name"], "Test Name")
         self.assertEqual(job.custom_fields[0]["field_name"], "name")
+
+    def test_map_upload_csv_headers_dry_run(self):
+        """Should show rows that would be rejected, without processing the job."""
+
+        self.initialize_csv_data()
+        self.df.loc[0, "name"] = ""
+        self.df_to_csv(self.df, self.filepath)
+
+        job = QueryCsvUploadJob.objects.create(
+            serializer_class=self.serializer_class, filepath=self.filepath
+        )
+        data = {
+            "form-TOTAL_FORMS": "1",
+            "form-INITIAL_FORMS": "0",
+            "form-0-csv_header": "name",
+            "form-0-object_field": "name",
+            "dry_run": "",
+        }
+
+        req = self.req_factory.post("/", data=data)
+        res: TemplateResponse = self.views.map_upload_csv_headers(
+            request=req, id=job.id
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        validation = res.context_data["validation"]
+        self.assertEqual(validation["valid_count"], self.dataset_size - 1)
+        self.assertEqual(validation["rejected_count"], 1)
+        self.assertEqual(validation["rejected"][0].row, 0)
+
+        # Job was not processed
+        self.assertEqual(self.repo.count(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.custom_fields, [])
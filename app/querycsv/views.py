@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
 
 from core.abstracts.serializers import ModelSerializerBase
+from querycsv.consts import QUERYCSV_DRY_RUN_REPORT_ROWS
 from querycsv.forms import CsvHeaderMappingFormSet, CsvUploadForm
 from querycsv.models import QueryCsvUploadJob
 from querycsv.services import QueryCsvService
@@ -96,6 +97,32 @@ class QueryCsvViewSet:
                     if mapping["csv_header"] != mapping["object_field"]
                 ]
 
+                # Validate rows with the mappings, without saving the job
+                if "dry_run" in request.POST:
+                    field_maps = [
+                        {
+                            "column_name": mapping["csv_header"],
+                            "field_name": mapping["object_field"],
+                        }
+                        for mapping in custom_mappings
+                    ]
+                    valid, rejected = self.service.upload_csv(
+                        job.file, custom_field_maps=field_maps, dry_run=True
+                    )
+
+                    context["formset"] = formset
+                    context["validation"] = {
+                        "valid_count": len(valid),
+                        "rejected_count": len(rejected),
+                        "rejected": rejected[:QUERYCSV_DRY_RUN_REPORT_ROWS],
+                    }
+
+                    return TemplateResponse(
+                        request,
+                        "admin/querycsv/upload_csv_headermapping.html",
+                        context=context,
+                    )
+
                 for mapping in custom_mappings:
                     job.add_field_mapping(
                         column_name=mapping["csv_header"],
@@ -33,14 +33,9 @@ class UserService:
     ) -> User:
         """Verify user credentials, return user if valid."""
 
-        if "@" in username_or_email:
-            user = cls.model.objects.get(profile__email=username_or_email)
-        else:
-            user = cls.model.objects.get(username=username_or_email)
+        user = authenticate(request, username=username_or_email, password=password)
 
-        auth_user = authenticate(request, username=user.username, password=password)
-
-        if auth_user is None:
+        if user is None:
             raise ValidationError("Invalid user credentials.")
 
         return user
@@ -2,6 +2,7 @@
 Views for the user API.
 """
 
+from django.contrib.auth import get_user_model
 from django.urls import reverse_lazy
 from rest_framework import authentication, generics, mixins
 from rest_framework.authtoken.models import Token
@@ -10,6 +11,7 @@ from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
 from core.abstracts.viewsets import ModelViewSetBase, ViewSetBase
+from core.authentication import CachedTokenAuthentication
 from users.serializers import OauthDirectorySerializer, UserSerializer
 
 
@@ -28,7 +30,7 @@ class AuthTokenView(
 
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
     authentication_classes = [
-        authentication.TokenAuthentication,
+        CachedTokenAuthentication,
         authentication.SessionAuthentication,
     ]
 
@@ -46,7 +48,9 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         """Retrieve and return the authenticated user."""
-        return self.request.user
+
+        # Cached token users only have a few fields loaded
+        return get_user_model().objects.get(id=self.request.user.id)
 
 
 class OauthDirectoryView(generics.RetrieveAPIView):
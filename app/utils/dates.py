@@ -1,7 +1,68 @@
-from datetime import date, timedelta
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Optional
 
+from utils.helpers import lazy_import
 
-def get_day_count(start: date, end: date, weekday: int):
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = lazy_import("numpy")
+
+NUMPY_EPOCH_WEEKDAY = 3
+"""Weekday of 1970-01-01 (Thursday), day zero for numpy dates."""
+
+
+def _to_date(value: date) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def get_weekday_dates(
+    start: date,
+    end: date,
+    weekday: int,
+    skip_dates: Optional[list[date]] = None,
+) -> "np.ndarray":
+    """
+    Get every date of a weekday in a time range, including start and end.
+
+    Dates are calculated as a numpy array of ``datetime64[D]``, so long
+    ranges cost the same as short ones.
+
+    Parameters
+    ----------
+        - start (date): First date in range.
+        - end (date): Last date in range.
+        - weekday (int): Python weekday, Monday is 0.
+        - skip_dates (list[date]): Dates to leave out of the result.
+
+    Example
+    -------
+    Wednesdays (2) between 10-4-24 and 10-31-24
+
+    Result: [2024-10-09, 2024-10-16, 2024-10-23, 2024-10-30]
+    """
+    start_day = np.datetime64(_to_date(start), "D")
+    end_day = np.datetime64(_to_date(end), "D")
+
+    # Move start forward to the target weekday
+    start_weekday = (start_day.astype(np.int64) + NUMPY_EPOCH_WEEKDAY) % 7
+    first_day = start_day + (weekday - start_weekday) % 7
+
+    if first_day > end_day:
+        return np.array([], dtype="datetime64[D]")
+
+    dates = np.arange(first_day, end_day + 1, np.timedelta64(7, "D"))
+
+    if skip_dates:
+        skipped = np.array([_to_date(d) for d in skip_dates], dtype="datetime64[D]")
+        dates = dates[~np.isin(dates, skipped)]
+
+    return dates
+
+
+def get_day_count(
+    start: date, end: date, weekday: int, skip_dates: Optional[list[date]] = None
+):
     """
     Calculate the remaining amount of a weekday in a time range.
 
@@ -12,22 +73,11 @@ def get_day_count(start: date, end: date, weekday: int):
     Result: 4 Wednesdays in that range, between 5 calendar weeks,
     with the 1st Wednesday truncated because it falls before the range.
     """
-    start_day = start.weekday()
-    end_day = end.weekday()
-
-    # Normalize dates, set to target weekday in that week
-    start_date = start - timedelta(days=start.weekday()) + timedelta(days=weekday)
-    end_date = end - timedelta(days=end.weekday()) + timedelta(days=weekday)
 
-    # Weeks between normalized dates
-    weeks = ((end_date - start_date).days / 7) + 1  # account for first week
+    return len(get_weekday_dates(start, end, weekday, skip_dates))
 
-    # If start is before weekday, remove day
-    if start_day > weekday:
-        weeks -= 1
 
-    # If end is after weekday, remove day
-    if end_day < weekday:
-        weeks -= 1
+def to_dates(dates: "np.ndarray") -> list[date]:
+    """Convert numpy dates to python dates."""
 
-    return int(weeks)
+    return dates.astype(object).tolist()
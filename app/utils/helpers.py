@@ -1,3 +1,6 @@
+import importlib
+import sys
+from types import ModuleType
 from urllib.parse import urljoin
 
 from django.http import HttpRequest
@@ -77,6 +80,50 @@ def import_from_path(path: str):
     return import_string(path)
 
 
+class LazyModule(ModuleType):
+    """
+    Placeholder for a module that is imported when first used.
+
+    Use with `lazy_import` instead of importing large libraries at
+    the top of a file, so workers do not load them at boot.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        if self.__dict__["_module"] is None:
+            self.__dict__["_module"] = importlib.import_module(self.__name__)
+
+        return self.__dict__["_module"]
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str):
+    """
+    Get a module that is only imported when one of its attributes is used.
+
+    If the module was already imported, it is returned directly.
+
+    Example
+    -------
+    ```
+    pd = lazy_import("pandas")
+
+    def read(path):
+        return pd.read_csv(path)  # pandas is imported here
+    ```
+    """
+
+    return sys.modules.get(name) or LazyModule(name)
+
+
 def clean_list(target: list):
     """Remove None values and empty strings from list."""
 
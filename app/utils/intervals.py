@@ -0,0 +1,83 @@
+"""
+Find overlapping intervals in memory.
+"""
+
+from bisect import bisect_left
+from typing import Any, Generic, Iterable, TypeVar
+
+K = TypeVar("K")
+T = TypeVar("T")
+
+
+class IntervalTree(Generic[K, T]):
+    """
+    Static interval tree for finding intervals that overlap a range.
+
+    Intervals are half-open ``[start, end)``, so intervals that only touch
+    do not overlap. Intervals are sorted by start, and the tree is stored
+    implicitly over the sorted list with the max end of each subtree, so a
+    query takes O(log n + k) for k matches.
+
+    Parameters
+    ----------
+        - intervals (Iterable[tuple[K, K, T]]): Start, end, and data of each interval.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[K, K, T]]):
+        items = sorted(
+            (item for item in intervals if item[0] < item[1]),
+            key=lambda item: item[0],
+        )
+
+        self.starts: list[K] = [item[0] for item in items]
+        self.ends: list[K] = [item[1] for item in items]
+        self.data: list[T] = [item[2] for item in items]
+
+        self.max_ends: list[Any] = [None] * (4 * len(items))
+        if len(items) > 0:
+            self._build(1, 0, len(items))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _build(self, node: int, lo: int, hi: int):
+        """Set max end of subtree covering ``[lo, hi)``, with the middle item as root."""
+
+        mid = (lo + hi) // 2
+        max_end = self.ends[mid]
+
+        if lo < mid:
+            max_end = max(max_end, self._build(2 * node, lo, mid))
+        if mid + 1 < hi:
+            max_end = max(max_end, self._build(2 * node + 1, mid + 1, hi))
+
+        self.max_ends[node] = max_end
+        return max_end
+
+    def overlap(self, start: K, end: K) -> list[T]:
+        """Get data for intervals that overlap the range, sorted by start."""
+
+        results: list[T] = []
+
+        # Intervals at or after this index start too late to overlap
+        last = bisect_left(self.starts, end)
+
+        if last > 0 and start < end:
+            self._search(1, 0, len(self.starts), start, last, results)
+
+        return results
+
+    def _search(self, node: int, lo: int, hi: int, start: K, last: int, results: list):
+        if lo >= last or not self.max_ends[node] > start:
+            return
+
+        mid = (lo + hi) // 2
+
+        if lo < mid:
+            self._search(2 * node, lo, mid, start, last, results)
+
+        if mid < last and self.ends[mid] > start:
+            results.append(self.data[mid])
+
+        if mid + 1 < hi:
+            self._search(2 * node + 1, mid + 1, hi, start, last, results)
@@ -2,6 +2,7 @@ import os
 import uuid
 from pathlib import Path
 
+from django.contrib.postgres.fields import DateTimeRangeField
 from django.core.files import File
 from django.db import models
 from django.db.models.fields.related_descriptors import ReverseOneToOneDescriptor
@@ -62,6 +63,24 @@ class ValidateImportString(object):
         ), f"Imported object needs to be of type {self.target_type}, but got {type(symbol)}."
 
 
+class TsTzRange(models.Func):
+    """
+    Create postgres datetime range from two datetime expressions.
+
+    Parameters
+    ----------
+        - lower (expression): Start of range.
+        - upper (expression): End of range.
+        - bounds (str): Postgres range bounds, defaults to "[)".
+    """
+
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+    def __init__(self, lower, upper, bounds="[)", **extra):
+        super().__init__(lower, upper, models.Value(bounds), **extra)
+
+
 class ReverseOneToOneOrNoneDescriptor(ReverseOneToOneDescriptor):
     def __get__(self, instance, cls=None):
         try:
@@ -0,0 +1,103 @@
+"""
+Utilities for ordered collections stored in the database.
+"""
+
+from bisect import bisect_left
+from typing import Optional
+
+ORDER_GAP = 1024
+"""Default distance between order keys, leaves room for later inserts."""
+
+
+def get_stable_positions(keys: list[Optional[int]]) -> set[int]:
+    """
+    Get the positions of keys that can keep their current value.
+
+    This is the longest strictly increasing subsequence of the given keys,
+    skipping ``None`` values, calculated in O(n log n).
+    """
+
+    tails: list[int] = []  # Smallest key ending a subsequence of each length
+    tail_positions: list[int] = []
+    parents: dict[int, Optional[int]] = {}
+
+    for position, key in enumerate(keys):
+        if key is None:
+            continue
+
+        length = bisect_left(tails, key)
+        parents[position] = tail_positions[length - 1] if length > 0 else None
+
+        if length == len(tails):
+            tails.append(key)
+            tail_positions.append(position)
+        else:
+            tails[length] = key
+            tail_positions[length] = position
+
+    stable = set()
+    position = tail_positions[-1] if tail_positions else None
+
+    while position is not None:
+        stable.add(position)
+        position = parents[position]
+
+    return stable
+
+
+def get_gapped_orders(keys: list[Optional[int]], gap=ORDER_GAP) -> list[int]:
+    """
+    Calculate order keys for a list of items in their new positions.
+
+    Items keep their current key whenever possible, so moving one item
+    only changes that item's key. New items (key is ``None``) and moved
+    items are given a key between their neighbors. If there is no room
+    between two neighbors, all items are renumbered with the given gap.
+
+    Parameters
+    ----------
+        - keys (list[int | None]): Current key of each item, in the new order.
+        - gap (int): Distance between keys when numbering from scratch.
+
+    Example
+    -------
+    IN : [1024, 3072, 2048, None]
+    OUT: [1024, 1536, 2048, 3072]
+    """
+
+    stable = get_stable_positions(keys)
+    orders: list[int] = [0] * len(keys)
+    position = 0
+
+    while position < len(keys):
+        if position in stable:
+            orders[position] = keys[position]
+            position += 1
+            continue
+
+        # Collect run of items that need a new key
+        run_start = position
+        while position < len(keys) and position not in stable:
+            position += 1
+
+        count = position - run_start
+        lower = orders[run_start - 1] if run_start > 0 else None
+        upper = keys[position] if position < len(keys) else None
+
+        if lower is None and upper is None:
+            new_keys = [gap * (i + 1) for i in range(count)]
+        elif lower is None:
+            new_keys = [upper - gap * (count - i) for i in range(count)]
+        elif upper is None:
+            new_keys = [lower + gap * (i + 1) for i in range(count)]
+        else:
+            step = (upper - lower) // (count + 1)
+
+            if step < 1:
+                return [gap * (i + 1) for i in range(len(keys))]
+
+            new_keys = [lower + step * (i + 1) for i in range(count)]
+
+        orders[run_start:position] = new_keys
+
+    return orders